@@ -21,6 +21,21 @@ def main():
 
         sys.exit(rerun())
 
+    elif parsed_opts.cli_args.action == "flaky":
+        from enge.flaky.__main__ import main as flaky
+
+        sys.exit(flaky())
+
+    elif parsed_opts.cli_args.action == "stats":
+        from enge.stats.__main__ import main as stats
+
+        sys.exit(stats())
+
+    elif parsed_opts.cli_args.action == "logs":
+        from enge.logs.__main__ import main as logs
+
+        sys.exit(logs())
+
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -2,10 +2,10 @@
 import logging
 import sys
 
-import requests
-
+from enge.utils import http
 from enge.utils.globals import ARTIFACT_MAPPING
 from enge.utils.opt_manager import parsed_opts
+from enge.utils.profiler import profiler
 from .tf_send_request import SubmitTest
 
 LOGGER = logging.getLogger(__name__)
@@ -53,9 +53,10 @@ def main():
     submit_test.parallel_limit = (
         parsed_opts.cli_args.parallel_limit or parsed_opts.parallel_limit or None
     )
+    submit_test.parallel_limit_max = parsed_opts.parallel_limit_max
     submit_test.print_header = True
 
-    git_response = requests.get(tests_repo_base_url)
+    git_response = http.get(tests_repo_base_url)
 
     if git_response.status_code == 404:
         LOGGER.critical(f"There is an issue with reaching the tests repository url.")
@@ -84,14 +85,15 @@ def main():
         if parsed_opts.cli_args.target:
             req_compose = parsed_opts.cli_args.target
 
-        if parsed_opts.cli_args.copr:
-            info = parsed_opts.cli_args.copr.get_info(
-                copr_pkg_name, copr_repo, reference, req_compose, parsed_opts
-            )
-        else:
-            info = parsed_opts.cli_args.brew.get_info(
-                brew_pkg_name, reference, req_compose, parsed_opts
-            )
+        with profiler.phase("artifact resolution"):
+            if parsed_opts.cli_args.copr:
+                info = parsed_opts.cli_args.copr.get_info(
+                    copr_pkg_name, copr_repo, reference, req_compose, parsed_opts
+                )
+            else:
+                info = parsed_opts.cli_args.brew.get_info(
+                    brew_pkg_name, reference, req_compose, parsed_opts
+                )
 
         for build in info:
             submit_test.compose = build["compose"]
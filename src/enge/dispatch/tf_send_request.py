@@ -4,11 +4,12 @@ import logging
 import os
 import time
 
-import requests
-
-from enge.utils import FormatText, get_datetime
+from enge.utils import FormatText, get_datetime, http
 from enge.utils.globals import TESTING_FARM_ENDPOINT, LOG_ARTIFACT_BASE_URL
+from enge.utils.metrics import metrics
 from enge.utils.opt_manager import parsed_opts
+from enge.utils.plan_history import PlanHistory
+from enge.utils.profiler import profiler
 
 LOGGER = logging.getLogger(__name__)
 
@@ -30,6 +31,8 @@ class SubmitTest:
         self.tmt_distro = None
         self.boot_method = None
         self.parallel_limit = None
+        self.parallel_limit_max = None
+        self.plan_history = None
         self.authorization_header = {}
         self.payload_raw = {}
         self.latest_tasks_file = None
@@ -71,6 +74,19 @@ class SubmitTest:
         latest_jobs_file.write(f"{task_id}\n")
         latest_jobs_archive.write(f"{task_id}\n")
 
+    def get_parallel_limit(self):
+        """
+        Get the parallel-limit for the current request.
+
+        With the 'auto' value the limit is computed from the recorded history
+        of the requested plan, capped by the configured maximum.
+        """
+        if self.parallel_limit != "auto":
+            return self.parallel_limit
+        if self.plan_history is None:
+            self.plan_history = PlanHistory(parsed_opts.plan_history_file)
+        return self.plan_history.parallel_limit(self.plan, self.parallel_limit_max)
+
     def build_payload(self):
         # Payload documentation > https://testing-farm.gitlab.io/api/#operation/requestsPost
         self.authorization_header = {"Authorization": f"Bearer {self.api_key}"}
@@ -114,16 +130,18 @@ class SubmitTest:
                     },
                 }
             ],
-            "settings": {"pipeline": {"parallel-limit": self.parallel_limit}},
+            "settings": {"pipeline": {"parallel-limit": self.get_parallel_limit()}},
         }
 
         return self.authorization_header, self.payload_raw
 
+    @profiler.phase("status polling")
+    @metrics.timer("enge_wait_seconds_total")
     def _response_watcher(self, log_artifact_url):
         response_timeout = parsed_opts.cli_args.wait
         clear_line = "\x1b[2K"
         while True:
-            response = requests.get(log_artifact_url)
+            response = http.get(log_artifact_url)
             response_status = response.status_code
             response_message = response.reason
             print(end=clear_line)
@@ -181,12 +199,21 @@ class SubmitTest:
 
         return self.dispatch_summary
 
-    def send_request(self, payload_raw, header):
+    @profiler.phase("dispatch")
+    def post_request(self, payload_raw, header):
+        """
+        Send the payload to the Testing Farm endpoint.
+
+        Does not touch any state of the instance, so it is safe
+        to post several requests from multiple threads at once.
+        """
+        return http.post(self.testing_farm_endpoint, json=payload_raw, headers=header)
+
+    def process_response(self, response):
+        """Print the summary for the posted request and archive its ID."""
         try:
-            response = requests.post(
-                self.testing_farm_endpoint, json=payload_raw, headers=header
-            )
             task_id = response.json()["id"]
+            metrics.inc("enge_requests_dispatched_total")
             self.log_artifact_url = f"{self.log_artifact_base_url}/{task_id}"
             self.dispatch_summary = self.assess_summary_message()
             if parsed_opts.cli_args.action != "rerun" and parsed_opts.cli_args.wait:
@@ -195,5 +222,10 @@ class SubmitTest:
                 print(self.dispatch_summary)
 
             self.record_task_ids(task_id)
+            return task_id
         except KeyError as ke:
             LOGGER.error(json.dumps(response.json(), indent=2, sort_keys=True))
+
+    def send_request(self, payload_raw, header):
+        response = self.post_request(payload_raw, header)
+        return self.process_response(response)
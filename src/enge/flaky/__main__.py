@@ -0,0 +1,229 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from prettytable import PrettyTable
+
+from enge.report.__main__ import _split_name, parse_request_xunit, parse_tasks
+from enge.utils import FormatText
+from enge.utils.local_store import load_json, save_json
+from enge.utils.opt_manager import parsed_opts
+from enge.utils.results import Result
+
+LOGGER = logging.getLogger(__name__)
+
+# Results taken into account for the flip rate, coded by a single character in the history
+RESULT_CODES = {Result.PASSED: "P", Result.FAILED: "F"}
+# The requests created this long before the latest ingested one are not ingested anymore
+REQUESTS_RETENTION = timedelta(days=90)
+
+
+def _utcnow():
+    """Get the current time in the format of the request creation time."""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class FlakyHistory:
+    """
+    Keep the sliding window of the recent results of each test and the flips within it.
+
+    The statistics are updated incrementally, each ingested result adds one flip at most
+    and the result falling out of the window removes one flip at most.
+    Only the requests created within the retention before the latest ingested one are
+    remembered, the older requests are behind the horizon and are not ingested at all,
+    as their results would be added out of order.
+    The history is stored as a JSON document in the following format:
+    {
+        "window": 10,
+        "horizon": "2024-01-01T00:00:00",
+        "requests": {"<uuid of an ingested request>": "2024-03-25T08:14:02.391862"},
+        "tests": {
+            "<plan>\\t<test>\\t<compose>\\t<arch>": {
+                "history": "PPFPP",
+                "flips": 2,
+                "updated": 1711360000,
+            },
+        },
+    }
+
+    Attributes:
+        path (str): Path to the history file.
+        window (int): Number of the recent results kept for each test.
+        horizon (str): Creation time of the oldest request to ingest, None if not known yet.
+        requests (dict): UUIDs of the already ingested requests to their creation time.
+        tests (dict): Test key to the test statistics mapping.
+    """
+
+    def __init__(self, path, window):
+        self.path = path
+        self.window = max(2, window)
+        data = load_json(path, default={})
+        self.horizon = data.get("horizon")
+        self.requests = data.get("requests", {})
+        if isinstance(self.requests, list):
+            # The older histories kept just the UUIDs, keep them for the whole retention
+            self.requests = dict.fromkeys(self.requests, _utcnow())
+        self.tests = data.get("tests", {})
+        if data.get("window", self.window) != self.window:
+            self._resize()
+
+    def _resize(self):
+        """Cut the histories down to the current window, a larger window fills up with the new runs."""
+        for entry in self.tests.values():
+            history = entry["history"][-self.window :]
+            entry["history"] = history
+            entry["flips"] = sum(a != b for a, b in zip(history, history[1:]))
+
+    def add(self, key, result):
+        code = RESULT_CODES.get(result)
+        if code is None:
+            return
+        entry = self.tests.setdefault(key, {"history": "", "flips": 0})
+        history = entry["history"]
+        if history and history[-1] != code:
+            entry["flips"] += 1
+        history += code
+        if len(history) > self.window:
+            if history[0] != history[1]:
+                entry["flips"] -= 1
+            history = history[1:]
+        entry["history"] = history
+        entry["updated"] = int(time.time())
+
+    def ingest(self, request_result):
+        """
+        Add the results of the request to the history of its tests.
+
+        Returns:
+            bool: False if the request was already ingested before.
+        """
+        if request_result.uuid in self.requests:
+            return False
+        created = request_result.created or _utcnow()
+        if self.horizon and created < self.horizon:
+            LOGGER.debug(
+                f"Skipping {request_result.uuid}, it was created before the history horizon {self.horizon}."
+            )
+            return False
+        for testsuite in request_result.testsuites:
+            for testcase in testsuite.testcases:
+                key = "\t".join(
+                    (
+                        testsuite.name,
+                        testcase.name,
+                        testsuite.compose or "",
+                        testsuite.arch,
+                    )
+                )
+                self.add(key, testcase.result)
+        self.requests[request_result.uuid] = created
+        return True
+
+    def prune(self):
+        """Forget the requests created before the retention, move the horizon past them."""
+        if not self.requests:
+            return
+        latest = datetime.fromisoformat(max(self.requests.values()))
+        horizon = (latest - REQUESTS_RETENTION).isoformat()
+        self.horizon = max(self.horizon or horizon, horizon)
+        self.requests = {
+            request_uuid: created
+            for request_uuid, created in self.requests.items()
+            if created >= self.horizon
+        }
+
+    def save(self):
+        self.prune()
+        save_json(
+            self.path,
+            {
+                "window": self.window,
+                "horizon": self.horizon,
+                "requests": dict(sorted(self.requests.items())),
+                "tests": self.tests,
+            },
+        )
+
+    def ranked(self):
+        """
+        Get the tests, that flipped at least once within the window, the flakiest first.
+
+        Returns:
+            list: List of (plan, test, compose, arch, history, flips, flip rate) tuples.
+        """
+        flaky = []
+        for key, entry in self.tests.items():
+            history, flips = entry["history"], entry["flips"]
+            if not flips:
+                continue
+            flaky.append((*key.split("\t"), history, flips, flips / (len(history) - 1)))
+        return sorted(flaky, key=lambda test: (-test[6], -test[5], test[:4]))
+
+
+def colorize_history(history):
+    colors = {"P": FormatText.green, "F": FormatText.red}
+    return "".join(colors[code] + code for code in history) + FormatText.end
+
+
+def main():
+    history = FlakyHistory(parsed_opts.flaky_history_file, parsed_opts.cli_args.window)
+
+    # Fetch and parse only the requests, that were not ingested yet,
+    # the archives tagged before the history horizon hold just the older ones
+    since = (
+        datetime.fromisoformat(history.horizon).date()
+        if history.horizon and parsed_opts.cli_args.tag
+        else None
+    )
+    request_url_list, tasks_source = parse_tasks(since)
+    new_request_urls = [
+        url for url in request_url_list if url.split("/")[-1] not in history.requests
+    ]
+    if new_request_urls:
+        parsed_dict = parse_request_xunit(new_request_urls, tasks_source)
+        # The runs need to be ingested in the order they were created in
+        for request_result in sorted(
+            parsed_dict.values(), key=lambda request: request.created or ""
+        ):
+            history.ingest(request_result)
+        history.save()
+        LOGGER.info(f"Ingested the results of {len(parsed_dict)} request(s).")
+    else:
+        LOGGER.info("The results of all the requested tasks were already ingested.")
+
+    split_index = -1 if parsed_opts.cli_args.short else 0
+    flaky_table = PrettyTable()
+    flaky_table.field_names = [
+        "Test Plan",
+        "Test Case",
+        "Target",
+        "Arch",
+        "Flips",
+        "Flip Rate",
+        "History",
+    ]
+    for plan, test, compose, arch, test_history, flips, flip_rate in history.ranked()[
+        : parsed_opts.cli_args.top
+    ]:
+        flaky_table.add_row(
+            (
+                _split_name(plan, split_index),
+                _split_name(test, split_index),
+                compose,
+                arch,
+                f"{flips}/{len(test_history) - 1}",
+                f"{flip_rate:.0%}",
+                colorize_history(test_history),
+            )
+        )
+    flaky_table.align = "l"
+
+    if flaky_table.rowcount > 0:
+        print(flaky_table)
+    else:
+        LOGGER.info(f"None of the tests flipped within the last {history.window} runs.")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import collections
+import logging
+import os
+import re
+
+from enge.report.__main__ import UUID_PATTERN, get_archived_tasks
+from enge.utils.artifact_store import COMPRESSED_SUFFIXES
+from enge.utils.globals import LOGS_MANIFEST
+from enge.utils.local_store import load_json
+from enge.utils.log_retention import mark_used
+from enge.utils.opt_manager import parsed_opts
+
+LOGGER = logging.getLogger(__name__)
+
+# A log file downloaded by the report command, result is None if not known
+LogFile = collections.namedtuple(
+    "LogFile", ["request", "plan", "target", "testcase", "path", "result"]
+)
+
+
+def find_logs():
+    """
+    Find the downloaded log files selected by the command-line options.
+
+    The report command stores the logs in the following layout:
+    <logs directory>/<request uuid>_logs/<last part of the plan name>/<target>_<last part of the test name>.log
+
+    The results of the test cases are read from the manifest stored next to the plan directories.
+    The logs linked from the artifact store keep the suffix of their compression.
+
+    Returns:
+        list: List of the LogFile tuples, ordered by their path.
+    """
+    cli_args = parsed_opts.cli_args
+    uuids = set()
+    for value in cli_args.uuid or []:
+        match = UUID_PATTERN.search(value)
+        uuids.add(match.group(0) if match else value)
+    if cli_args.tag:
+        _, task_ids = get_archived_tasks(cli_args.tag)
+        for task_id in task_ids:
+            match = UUID_PATTERN.search(task_id)
+            if match:
+                uuids.add(match.group(0))
+    plan_pattern = re.compile(cli_args.plan) if cli_args.plan else None
+
+    logs_directory = parsed_opts.logs_directory
+    if not os.path.isdir(logs_directory):
+        LOGGER.critical(f"There are no downloaded logs in {logs_directory}.")
+        LOGGER.critical("Use the report command with --download-logs to get them.")
+        return []
+
+    logs = []
+    for request_dir in sorted(os.listdir(logs_directory)):
+        request_uuid, _, suffix = request_dir.rpartition("_")
+        if suffix != "logs" or (
+            (cli_args.uuid or cli_args.tag) and request_uuid not in uuids
+        ):
+            continue
+        request_path = os.path.join(logs_directory, request_dir)
+        request_logs = len(logs)
+        # The logs downloaded by the older versions come without the manifest
+        manifest = load_json(os.path.join(request_path, LOGS_MANIFEST), default={})
+        for plan in sorted(os.listdir(request_path)):
+            plan_path = os.path.join(request_path, plan)
+            if not os.path.isdir(plan_path) or (
+                plan_pattern and not plan_pattern.search(plan)
+            ):
+                continue
+            for log_name in sorted(os.listdir(plan_path)):
+                # The logs linked from the artifact store are compressed
+                base_name = log_name
+                for suffix in COMPRESSED_SUFFIXES:
+                    base_name = base_name.removesuffix(suffix)
+                if not base_name.endswith(".log"):
+                    continue
+                target, _, testcase = base_name[: -len(".log")].partition("_")
+                if cli_args.target and target not in cli_args.target:
+                    continue
+                logs.append(
+                    LogFile(
+                        request_uuid,
+                        plan,
+                        target,
+                        testcase,
+                        os.path.join(plan_path, log_name),
+                        manifest.get(f"{plan}/{log_name}", {}).get("result"),
+                    )
+                )
+        if len(logs) > request_logs:
+            mark_used(request_path)
+    LOGGER.debug(f"Found {len(logs)} log file(s) in {logs_directory}.")
+    return logs
+
+
+def main():
+    if parsed_opts.cli_args.logs_command == "gc":
+        from .gc import collect_garbage
+
+        return collect_garbage()
+
+    try:
+        logs = find_logs()
+    except re.error as err:
+        LOGGER.critical(f"Invalid plan pattern {parsed_opts.cli_args.plan}: {err}")
+        return 1
+
+    if parsed_opts.cli_args.logs_command == "grep":
+        from .grep import grep_logs
+
+        return grep_logs(logs)
+    elif parsed_opts.cli_args.logs_command == "triage":
+        from .triage import triage_logs
+
+        return triage_logs(logs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Eviction of the downloaded logs exceeding the configured limits."""
+import logging
+import os
+from datetime import datetime
+
+from prettytable import PrettyTable
+
+from enge.utils import format_size
+from enge.utils.artifact_store import ArtifactStore
+from enge.utils.log_retention import evict_logs, symlinked_targets
+from enge.utils.opt_manager import parsed_opts
+
+LOGGER = logging.getLogger(__name__)
+
+
+def prune_artifact_store(dry_run=False):
+    """
+    Remove the artifacts not linked from the logs directory anymore.
+
+    Returns:
+        tuple: The number of the removed artifacts and the number of the bytes freed.
+    """
+    if not os.path.isdir(parsed_opts.artifact_store_directory):
+        return 0, 0
+    artifact_store = ArtifactStore(parsed_opts.artifact_store_directory)
+    return artifact_store.prune(
+        keep=symlinked_targets(parsed_opts.logs_directory), dry_run=dry_run
+    )
+
+
+def collect_garbage():
+    """
+    Evict the logs over the age limit and the least recently used logs over the size cap.
+
+    The limits from the [logs] section of the configuration can be overridden on the command line.
+    """
+    cli_args = parsed_opts.cli_args
+    max_size = (
+        cli_args.max_size
+        if cli_args.max_size is not None
+        else parsed_opts.logs_max_size
+    )
+    max_age = (
+        cli_args.max_age if cli_args.max_age is not None else parsed_opts.logs_max_age
+    )
+    if max_size is None and max_age is None:
+        LOGGER.warning(
+            "There is neither a size cap nor an age limit set for the logs, "
+            "just the unused artifacts are removed."
+        )
+
+    evicted, kept_size = evict_logs(
+        parsed_opts.logs_directory, max_size, max_age, dry_run=cli_args.dry_run
+    )
+    if evicted:
+        evicted_table = PrettyTable()
+        evicted_table.field_names = ["Logs", "Last Used", "Size"]
+        for path, last_used, size in evicted:
+            evicted_table.add_row(
+                (
+                    os.path.basename(path),
+                    datetime.fromtimestamp(last_used).strftime("%Y-%m-%d %H:%M"),
+                    format_size(size),
+                )
+            )
+        evicted_table.align = "l"
+        evicted_table.align["Size"] = "r"
+        print(evicted_table)
+
+    removed_artifacts, freed_artifacts = prune_artifact_store(dry_run=cli_args.dry_run)
+    action = "Would evict" if cli_args.dry_run else "Evicted"
+    LOGGER.info(
+        f"{action} the logs of {len(evicted)} request(s), "
+        f"{format_size(sum(size for _, _, size in evicted))} in total, "
+        f"{format_size(kept_size)} of logs kept in {parsed_opts.logs_directory}."
+    )
+    if removed_artifacts:
+        LOGGER.info(
+            f"{'Would remove' if cli_args.dry_run else 'Removed'} {removed_artifacts} "
+            f"unused artifact(s), {format_size(freed_artifacts)} in total."
+        )
+    return 0
@@ -0,0 +1,95 @@
+"""Parallel search of the downloaded log files."""
+import functools
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from enge.utils import FormatText
+from enge.utils.artifact_store import open_artifact
+from enge.utils.opt_manager import parsed_opts
+
+LOGGER = logging.getLogger(__name__)
+
+
+def search_file(path, pattern, flags=0):
+    """
+    Search the memory mapped log file for the regular expression.
+
+    Runs in the worker processes, the file is never read into the memory as a whole,
+    only the matching lines are copied out of the mapping.
+    The compressed logs linked from the artifact store are decompressed to the memory.
+
+    Returns:
+        list: List of (line number, line) tuples of the matching lines.
+    """
+    regex = re.compile(pattern.encode(), flags)
+    matches = []
+    with open_artifact(path) as data:
+        line_number, counted_to = 1, 0
+        last_line_start = -1
+        for match in regex.finditer(data):
+            line_start = data.rfind(b"\n", 0, match.start()) + 1
+            if line_start == last_line_start:
+                # Report each line just once
+                continue
+            line_number += data[counted_to:line_start].count(b"\n")
+            counted_to = last_line_start = line_start
+            line_end = data.find(b"\n", match.end())
+            line = data[line_start : line_end if line_end != -1 else len(data)]
+            matches.append((line_number, line.decode(errors="replace").rstrip()))
+    return matches
+
+
+def grep_logs(logs):
+    """
+    Search the log files in parallel and print the matches grouped by request, target, plan and test.
+
+    Returns:
+        int: 0 if any of the logs matches, 1 otherwise.
+    """
+    flags = re.IGNORECASE if parsed_opts.cli_args.ignore_case else 0
+    try:
+        highlight = re.compile(parsed_opts.cli_args.pattern, flags)
+    except re.error as err:
+        LOGGER.critical(f"Invalid pattern {parsed_opts.cli_args.pattern}: {err}")
+        return 1
+
+    search = functools.partial(
+        search_file, pattern=parsed_opts.cli_args.pattern, flags=flags
+    )
+    matched_logs = 0
+    last_group = None
+    with ProcessPoolExecutor(max_workers=parsed_opts.cli_args.workers) as executor:
+        # The results are returned in the order of the logs, so the groups stay together
+        for log, matches in zip(
+            logs,
+            executor.map(search, [log.path for log in logs], chunksize=16),
+        ):
+            if not matches:
+                continue
+            matched_logs += 1
+            group = (log.request, log.target, log.plan)
+            if group != last_group:
+                last_group = group
+                print(
+                    FormatText.format_text(
+                        f"{log.request} {log.target} {log.plan}",
+                        text_col=FormatText.blue,
+                        bold=True,
+                    )
+                )
+            if parsed_opts.cli_args.count:
+                print(f"  {log.testcase}: {len(matches)}")
+                continue
+            print(f"  {FormatText.bold}{log.testcase}{FormatText.end}")
+            for line_number, line in matches:
+                line = highlight.sub(
+                    lambda match: FormatText.format_text(
+                        match.group(0), text_col=FormatText.red, bold=True
+                    ),
+                    line,
+                )
+                print(f"    {line_number}: {line}")
+
+    LOGGER.info(f"Found matches in {matched_logs} of {len(logs)} log file(s).")
+    return 0 if matched_logs else 1
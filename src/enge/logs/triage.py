@@ -0,0 +1,153 @@
+"""Clustering of the failing test logs by their error signatures."""
+import functools
+import hashlib
+import logging
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from prettytable import PrettyTable
+
+from enge.utils.artifact_store import open_artifact
+from enge.utils.opt_manager import parsed_opts
+from enge.utils.results import Result
+
+LOGGER = logging.getLogger(__name__)
+
+# Results of the test cases, whose logs are triaged
+TRIAGED_RESULTS = (Result.FAILED, Result.ERROR)
+
+# A line reporting an error, for a python traceback the exception line at its end
+ERROR_LINE = re.compile(
+    rb"(?im)^traceback.*\n(?:[ \t].*\n)*(.*)$"
+    rb"|^(.*\b(?:error|fail(?:ed|ure)?|fatal|exception|assert\w*|denied|timed? ?out|panic)\b.*)$"
+)
+
+# Variable parts of the error lines replaced by placeholders, the order matters
+NORMALIZATIONS = (
+    (
+        re.compile(
+            r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+        ),
+        "<time>",
+    ),
+    (re.compile(r"\b[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}\b"), "<time>"),
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<time>"),
+    (
+        re.compile(
+            r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+        ),
+        "<uuid>",
+    ),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<host>"),
+    (
+        re.compile(
+            r"\b(?:[a-zA-Z0-9-]+\.)+(?:com|org|net|io|local|localdomain|internal|lan)\b"
+        ),
+        "<host>",
+    ),
+    # The absolute paths, or the relative ones with at least two separators,
+    # so the words like and/or are kept
+    (
+        re.compile(
+            r"(?<![\w.~/-])(?:(?:~|\.{1,2})?(?:/[\w.@+:-]+)+|[\w.@+-]+(?:/[\w.@+:-]+){2,})/?"
+        ),
+        "<path>",
+    ),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<hex>"),
+    (re.compile(r"\b\d{3,}\b"), "<n>"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def normalize(line):
+    """Strip the parts of the error line, that differ between the runs of the same failure."""
+    for pattern, placeholder in NORMALIZATIONS:
+        line = pattern.sub(placeholder, line)
+    return line.strip()
+
+
+def log_signature(path, lines=3):
+    """
+    Build the signature of the log file from its first error lines.
+
+    Runs in the worker processes, the log file is memory mapped and just the error
+    lines are copied out of the mapping, the compressed logs are decompressed to the memory.
+
+    Returns:
+        tuple: The signature hash and the normalized error lines,
+            None and an empty tuple if the log reports no error.
+    """
+    errors = []
+    with open_artifact(path) as data:
+        for match in ERROR_LINE.finditer(data):
+            line = normalize(
+                (match.group(1) or match.group(2)).decode(errors="replace")
+            )
+            if line and line not in errors:
+                errors.append(line)
+            if len(errors) == lines:
+                break
+    if not errors:
+        return None, ()
+    signature = hashlib.sha1("\n".join(errors).encode()).hexdigest()[:12]
+    return signature, tuple(errors)
+
+
+def triage_logs(logs):
+    """
+    Cluster the logs of the failing test cases by their error signatures and print the clusters.
+
+    The logs downloaded without the results manifest are all triaged.
+
+    Returns:
+        int: 0 if there were any logs to triage, 1 otherwise.
+    """
+    failing_logs = [
+        log for log in logs if log.result is None or log.result in TRIAGED_RESULTS
+    ]
+    unknown = {log.request for log in failing_logs if log.result is None}
+    for request_uuid in sorted(unknown):
+        LOGGER.warning(
+            f"The results of the logs of {request_uuid} are not known, triaging all of them."
+        )
+    if not failing_logs:
+        LOGGER.info("There are no logs of failing tests to triage.")
+        return 1
+
+    signatures = functools.partial(log_signature, lines=parsed_opts.cli_args.lines)
+    clusters = {}
+    with ProcessPoolExecutor(max_workers=parsed_opts.cli_args.workers) as executor:
+        for log, (signature, errors) in zip(
+            failing_logs,
+            executor.map(signatures, [log.path for log in failing_logs], chunksize=16),
+        ):
+            cluster = clusters.setdefault(signature, {"errors": errors, "logs": []})
+            cluster["logs"].append(log)
+
+    result_table = PrettyTable()
+    fields = ["Signature", "Tests", "Plans", "Targets", "Errors"]
+    if parsed_opts.cli_args.show_tests:
+        fields.insert(2, "Test Cases")
+    result_table.field_names = fields
+    for signature, cluster in sorted(
+        clusters.items(), key=lambda cluster: len(cluster[1]["logs"]), reverse=True
+    ):
+        cluster_logs = cluster["logs"]
+        row = [
+            signature or "-",
+            len(cluster_logs),
+            "\n".join(sorted({log.plan for log in cluster_logs})),
+            "\n".join(sorted({log.target for log in cluster_logs})),
+            "\n".join(cluster["errors"]) or "No error lines found",
+        ]
+        if parsed_opts.cli_args.show_tests:
+            row.insert(2, "\n".join(sorted({log.testcase for log in cluster_logs})))
+        result_table.add_row(row, divider=True)
+    result_table.align = "l"
+    result_table.max_width["Errors"] = 100
+    print(result_table)
+
+    LOGGER.info(
+        f"Found {len(clusters)} distinct signature(s) in {len(failing_logs)} log file(s)."
+    )
+    return 0
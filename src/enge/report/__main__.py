@@ -1,19 +1,35 @@
 import logging
+import multiprocessing
 import os
 import re
 import sys
 import time
-import urllib.request
 import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
 
 import lxml.etree
 import requests
 from prettytable import PrettyTable
 from requests.exceptions import ConnectionError
 
-from enge.utils import FormatText
-from enge.utils.globals import TESTING_FARM_ENDPOINT, LOG_ARTIFACT_BASE_URL
+from enge.utils import FormatText, format_duration, http
+from enge.utils.globals import (
+    LOGS_MANIFEST,
+    LOG_ARTIFACT_BASE_URL,
+    TESTING_FARM_ENDPOINT,
+)
 from enge.utils.opt_manager import parsed_opts
+from enge.utils.artifact_store import ArtifactStore
+from enge.utils.lineage import RerunLineage
+from enge.utils.local_store import load_json, save_json
+from enge.utils.log_retention import evict_logs, mark_used, symlinked_targets
+from enge.utils.metrics import metrics
+from enge.utils.plan_history import PlanHistory
+from enge.utils.profiler import profiler
+from enge.utils.tracer import tracer
+from enge.utils.request_store import request_store
+from enge.utils.results import RequestResult, Result, TestcaseResult, TestsuiteResult
 
 RETURN_VALUE = None
 """
@@ -30,7 +46,14 @@ ERROR_HERE = 3
 NO_RESULT = 4
 
 LOGGER = logging.getLogger(__name__)
+# Number of the threads downloading the request documents and the xunit results
+FETCH_WORKERS = 8
+# Total size of the xunit documents in a batch worth parsing in the worker processes
+PARSE_POOL_MIN_SIZE = 4 * 1024 * 1024
 LATEST_TASKS_FILE = parsed_opts.archive_tasks_latest
+UUID_PATTERN = re.compile(
+    r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
+)
 
 
 def update_retval(new_value):
@@ -39,7 +62,55 @@ def update_retval(new_value):
         RETURN_VALUE = new_value
 
 
-def parse_tasks():
+def _archived_within(archive_file, since=None, until=None):
+    """
+    Check if the archive file was created within the date range, both ends included.
+
+    The archive files are named enge_jobs_archive_<YYYYmmddHHMMSS>[.<tag>],
+    the files without the timestamp are always included.
+    """
+    match = re.search(r"_(\d{14})", archive_file)
+    if not match or not (since or until):
+        return True
+    archived = datetime.strptime(match.group(1), "%Y%m%d%H%M%S").date()
+    return (since is None or since <= archived) and (until is None or archived <= until)
+
+
+def get_archived_tasks(tag=None, since=None, until=None):
+    """
+    Read the tasks from the archive files with the tag, archived within the date range.
+
+    Returns:
+        tuple: A list of the archive file names and a list of the lines read from them.
+    """
+    default_path = parsed_opts.archive_tasks_default
+    if not os.path.exists(default_path):
+        LOGGER.critical(f"The given path {default_path} does not exist!")
+        sys.exit(1)
+    archive_files = [
+        file
+        for file in os.listdir(default_path)
+        if (not tag or tag[0] in file.split(".")[-1])
+        and _archived_within(file, since, until)
+    ]
+    task_ids = []
+    for file in archive_files:
+        with open(os.path.join(default_path, file)) as archive_file:
+            task_ids.extend(archive_file.readlines())
+    return archive_files, task_ids
+
+
+def parse_tasks(since=None):
+    """
+    Get the URLs of the requested tasks.
+
+    Args:
+        since (datetime.date): Read just the archives of the tasks tagged since the date,
+            the --since option of the stats commands is used if not given.
+
+    Returns:
+        tuple: A list of the request URLs and the source of the tasks.
+    """
     request_url_list = []
 
     def _get_tasks_source_data():
@@ -61,26 +132,23 @@ def parse_tasks():
                     )
                     sys.exit(1)
 
-        if parsed_opts.cli_args.tag:
-            default_path = parsed_opts.archive_tasks_default
-            if not os.path.exists(default_path):
-                LOGGER.critical(f"The given path {default_path} does not exist!")
-                sys.exit(1)
-            source = [
-                file
-                for file in os.listdir(default_path)
-                if parsed_opts.cli_args.tag[0] in file.split(".")[-1]
-            ]
-            for file in source:
-                file = os.path.join(default_path, file)
-                task_ids = open(file).readlines()
-                source_data.extend(task_ids)
+        # The date range is available for the stats commands only,
+        # the flaky command skips the archives older than its history
+        since_date = since or getattr(parsed_opts.cli_args, "since", None)
+        until = getattr(parsed_opts.cli_args, "until", None)
+        if parsed_opts.cli_args.tag or since_date or until:
+            source, task_ids = get_archived_tasks(
+                parsed_opts.cli_args.tag, since_date, until
+            )
+            source_data.extend(task_ids)
 
         if not any(
             (
                 parsed_opts.cli_args.file,
                 parsed_opts.cli_args.cmd,
                 parsed_opts.cli_args.tag,
+                since_date,
+                until,
             )
         ):
             if not os.path.exists(LATEST_TASKS_FILE):
@@ -99,16 +167,12 @@ def parse_tasks():
 
     tasks_source, tasks_source_data = _get_tasks_source_data()
 
-    uuid_pattern = re.compile(
-        r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
-    )
-
     for task in tasks_source_data:
         task = task.strip().rstrip("/")
         if not task:
             continue
 
-        match = uuid_pattern.search(task)
+        match = UUID_PATTERN.search(task)
         if not match:
             LOGGER.debug(f"Cannot parse the UUID from {task}")
             continue
@@ -129,8 +193,273 @@ def parse_tasks():
     return request_url_list, tasks_source
 
 
-def parse_request_xunit(request_url_list=None, tasks_source=None, skip_pass=False):
-    logs_base_directory = "/var/tmp/enge/logs"
+@profiler.phase("log download")
+def download_log(url, tail=None, max_size=None):
+    """
+    Download the log file, or just its end.
+
+    With the tail size the last bytes of the log are requested with the HTTP Range header,
+    if the server ignores it the whole log is streamed and just its end is kept.
+    The maximum size does not apply to the streamed tail, cutting the stream would keep
+    the middle of the log instead of its end. The partial first line of a cut tail is dropped.
+
+    Args:
+        url (str): URL of the log file.
+        tail (int): Number of the last bytes of the log to download, None for the whole log.
+        max_size (int): Maximum number of the bytes to download, None for no limit.
+
+    Returns:
+        tuple: The log content and a flag whether the log was cut.
+    """
+    headers = {}
+    if tail is not None:
+        tail = min(tail, max_size) if max_size is not None else tail
+        headers["Range"] = f"bytes=-{tail}"
+
+    with http.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 416:
+            # The range of an empty log is not satisfiable
+            return b"", False
+        response.raise_for_status()
+
+        if response.status_code == 206:
+            # Content-Range: bytes <first>-<last>/<total>
+            first = response.headers.get("Content-Range", "").split(" ")[-1]
+            metrics.inc("enge_log_downloaded_bytes_total", len(response.content))
+            data = response.content[-tail:]
+            truncated = not first.startswith("0-")
+        else:
+            if tail is not None:
+                LOGGER.debug(f"The server ignored the range request for {url}.")
+                # Only the last bytes are kept, the end of the log is reached in any case
+                max_size = None
+            data = bytearray()
+            received = 0
+            truncated = False
+            chunk_size = min(64 * 1024, max_size or 64 * 1024)
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                received += len(chunk)
+                metrics.inc("enge_log_downloaded_bytes_total", len(chunk))
+                data += chunk
+                if tail is not None and len(data) > tail:
+                    del data[:-tail]
+                    truncated = True
+                if max_size is not None and received > max_size:
+                    truncated = True
+                    break
+            if tail is None and max_size is not None:
+                del data[max_size:]
+            data = bytes(data)
+
+    if truncated and tail is not None:
+        data = data[data.find(b"\n") + 1 :]
+    return data, truncated
+
+
+def evict_downloaded_logs(artifact_store=None):
+    """Keep the logs directory within the size cap and age limit set in the configuration."""
+    if parsed_opts.logs_max_size is None and parsed_opts.logs_max_age is None:
+        return
+    evicted, _ = evict_logs(
+        parsed_opts.logs_directory, parsed_opts.logs_max_size, parsed_opts.logs_max_age
+    )
+    if evicted:
+        LOGGER.info(
+            f"Evicted the logs of {len(evicted)} least recently used request(s) "
+            f"from {parsed_opts.logs_directory}."
+        )
+        if artifact_store is not None:
+            artifact_store.prune(keep=symlinked_targets(parsed_opts.logs_directory))
+
+
+@profiler.phase("log download")
+def _store_testcase_artifacts(artifact_store, testcase_logs, testcase_log_path):
+    """
+    Store all the logs of the test case in the artifact store and link them to the logs directory.
+
+    The testout.log is linked next to the logs downloaded without the store,
+    the other logs to the directory of the test case.
+
+    Args:
+        artifact_store (ArtifactStore): The store to keep the logs in.
+        testcase_logs (list): The (name, href) pairs of the test case logs.
+        testcase_log_path (str): Path to the test case logs without the .log suffix.
+
+    Returns:
+        str: Path to the linked testout.log, None if not stored.
+    """
+    testout_path = None
+    for name, href in testcase_logs:
+        # Do not let the log names escape the test case directory
+        relative_name = os.path.normpath(name or "").lstrip(os.sep)
+        if not href or not name or relative_name.startswith(".."):
+            continue
+        try:
+            blob_path = artifact_store.fetch(href)
+        except requests.RequestException as err:
+            LOGGER.warning(f"Unable to download the artifact {href}: {err}")
+            continue
+        if name == "testout.log":
+            testout_path = artifact_store.link(blob_path, f"{testcase_log_path}.log")
+        else:
+            artifact_store.link(
+                blob_path, os.path.join(testcase_log_path, relative_name)
+            )
+    return testout_path
+
+
+def parse_xunit(xunit, default_compose=None, with_logs=False):
+    """
+    Parse the xunit document into the plain records of its plans and test cases.
+
+    Runs in the parse worker processes, so just the records, cheap to send back
+    to the parent process, are returned, never the lxml elements.
+
+    Args:
+        xunit (bytes): The xunit document.
+        default_compose (str): Compose to use for the testsuites not reporting one.
+        with_logs (bool): Whether to collect the logs of the test cases.
+
+    Returns:
+        tuple: The overall result, a flag whether the xunit holds just the pipeline testsuite
+            and a list of the (testsuite, logs) pairs. The testsuite is in the TestsuiteResult.to_dict
+            format, the logs hold the list of the (name, href) pairs of each of its test cases,
+            None without with_logs.
+    """
+    xml = lxml.etree.fromstring(xunit)
+    job_result_overall = xml.xpath("/testsuites/@overall-result")[0]
+    job_test_suite = xml.xpath("//testsuite")
+    # If there is just a single test suite returned and the name of the test suite
+    # is pipeline, we can assume that the response contains only information about the pipeline.
+    pipeline_only = (
+        len(job_test_suite) == 1 and job_test_suite[0].get("name") == "pipeline"
+    )
+
+    testsuites = []
+    for elem in job_test_suite:
+        testsuite_data = TestsuiteResult.from_element(elem, default_compose)
+        testcases_logs = [] if with_logs else None
+        for test in elem.iterfind("./testcase"):
+            testsuite_data.testcases.append(TestcaseResult.from_element(test))
+            if with_logs:
+                testcases_logs.append(
+                    [
+                        (log.get("name"), log.get("href"))
+                        for log in test.iterfind("./logs/log")
+                    ]
+                )
+        testsuites.append((testsuite_data.to_dict(), testcases_logs))
+    return job_result_overall, pipeline_only, testsuites
+
+
+def _get_request_json(url):
+    request_json = request_store.get_finished(url.split("/")[-1])
+    if request_json is None:
+        request_json = http.get(url).json()
+    return request_json
+
+
+def _get_xunit(request_json):
+    return http.get(request_json["result"]["xunit_url"])
+
+
+def _fetch_and_parse_xunits(finished_requests, with_logs=False):
+    """
+    Fetch and parse the xunit results of the finished requests, in batches.
+
+    The xunit documents of a batch are downloaded by the threads, then parsed by the worker
+    processes. The worker processes are forked only once the download threads are joined,
+    as forking a multi-threaded process is not safe. The small batches are parsed in-process,
+    where starting the workers would take longer than the parsing itself.
+
+    Args:
+        finished_requests (list): The (request URL, request document) pairs.
+        with_logs (bool): Whether to collect the logs of the test cases.
+
+    Yields:
+        tuple: The request URL, the request document and the records returned by parse_xunit,
+            None if the xunit is not available, in the order of the requests.
+    """
+    parse_workers = getattr(parsed_opts.cli_args, "parse_workers", None) or (
+        os.cpu_count() or 1
+    )
+    batch_size = 2 * parse_workers
+    parse_pool = None
+    processes = 1
+    try:
+        for start in range(0, len(finished_requests), batch_size):
+            batch = finished_requests[start : start + batch_size]
+            try:
+                with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+                    responses = list(
+                        executor.map(
+                            _get_xunit, (request_json for _, request_json in batch)
+                        )
+                    )
+            except ConnectionError as err:
+                LOGGER.critical(
+                    "There was an issue while attempting to create an API connection."
+                )
+                LOGGER.critical("Please verify, that you're connected to the VPN.")
+                LOGGER.debug(err)
+                sys.exit(99)
+
+            xunits = [response.content for response in responses if response]
+            size = sum(len(xunit) for xunit in xunits)
+            if (
+                parse_pool is None
+                and parse_workers > 1
+                and len(xunits) > 1
+                and size >= PARSE_POOL_MIN_SIZE
+            ):
+                processes = min(parse_workers, len(finished_requests))
+                parse_pool = ProcessPoolExecutor(
+                    max_workers=processes,
+                    mp_context=multiprocessing.get_context("fork"),
+                )
+            with tracer.span(
+                "parse xunit",
+                "parse",
+                documents=len(xunits),
+                size=size,
+                processes=processes,
+            ):
+                parse_map = parse_pool.map if parse_pool else map
+                records = list(
+                    parse_map(
+                        parse_xunit,
+                        xunits,
+                        [
+                            request_json["environments_requested"][0]["os"]["compose"]
+                            for (_, request_json), response in zip(batch, responses)
+                            if response
+                        ],
+                        [with_logs] * len(xunits),
+                    )
+                )
+
+            records = iter(records)
+            for (url, request_json), response in zip(batch, responses):
+                yield url, request_json, next(records) if response else None
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown(cancel_futures=True)
+
+
+@profiler.phase("xunit fetch and parse")
+def parse_request_xunit(
+    request_url_list=None, tasks_source=None, skip_pass=False, result_callback=None
+):
+    # The rerun command always waits for the results, only the report command downloads the logs
+    action = parsed_opts.cli_args.action
+    wait = action == "rerun" or (action == "report" and parsed_opts.cli_args.wait)
+    store_artifacts = action == "report" and parsed_opts.cli_args.store_artifacts
+    download_logs = store_artifacts or (
+        action == "report" and parsed_opts.cli_args.download_logs
+    )
+    artifact_store = (
+        ArtifactStore(parsed_opts.artifact_store_directory) if store_artifacts else None
+    )
 
     if request_url_list is None or tasks_source is None:
         request_url_list, tasks_source = parse_tasks()
@@ -140,25 +469,25 @@ def parse_request_xunit(request_url_list=None, tasks_source=None, skip_pass=Fals
         sys.exit(1)
 
     parsed_dict = {}
+    plan_history = PlanHistory(parsed_opts.plan_history_file)
     clear_line = "\x1b[2K"
     spacer = " " * 10
     loading_chars = ["/", "-", "\\", "|"]
     index = 0
 
     LOGGER.info("Reporting for the requested tasks:")
-    for url in request_url_list:
-        LOGGER.debug(f"Gathering the results for '{url}'")
-        request = requests.get(url)
-        request_state = request.json()["state"].upper()
-        request_uuid = request.json()["id"]
-        request_target = request.json()["environments_requested"][0]["os"]["compose"]
-        request_arch = request.json()["environments_requested"][0]["arch"]
-        request_datetime_created = request.json()["created"]
-        request_datetime_parsed = request_datetime_created.split(".")[0]
-        request_plan = request.json()["test"]["fmf"]["name"] or ""
-        potential_pipeline_error = False
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        request_jsons = list(executor.map(_get_request_json, request_url_list))
 
-        log_dir = f"{request_uuid}_logs"
+    finished_requests = []
+    for url, request_json in zip(request_url_list, request_jsons):
+        LOGGER.debug(f"Gathering the results for '{url}'")
+        if wait and request_json["state"] not in ("complete", "error", "canceled"):
+            # The document fetched ahead is outdated once the previous requests are waited for
+            request_json = http.get(url).json()
+        request_state = request_json["state"].upper()
+        request_target = request_json["environments_requested"][0]["os"]["compose"]
+        request_plan = request_json["test"]["fmf"]["name"] or ""
 
         background = None
         if request_state == "COMPLETE":
@@ -185,24 +514,24 @@ def parse_request_xunit(request_url_list=None, tasks_source=None, skip_pass=Fals
             + request_state
         )
 
-        if parsed_opts.cli_args.action == "rerun" or parsed_opts.cli_args.wait:
-            while request.json()["state"] not in ("complete", "error", "canceled"):
-                print(end=clear_line)
-                print(
-                    f"Waiting for the job to finish.{spacer}{loading_chars[index]}",
-                    end="\r",
-                    flush=True,
-                )
-                index = (index + 1) % len(loading_chars)
-                time.sleep(30)
-                request = requests.get(url)
-            else:
-                LOGGER.info("Job finished!")
-        else:
-            if (
-                request.json()["state"] != "complete"
-                and request.json()["state"] != "error"
+        if wait:
+            with profiler.phase("status polling"), metrics.timer(
+                "enge_wait_seconds_total"
             ):
+                while request_json["state"] not in ("complete", "error", "canceled"):
+                    print(end=clear_line)
+                    print(
+                        f"Waiting for the job to finish.{spacer}{loading_chars[index]}",
+                        end="\r",
+                        flush=True,
+                    )
+                    index = (index + 1) % len(loading_chars)
+                    time.sleep(30)
+                    request_json = http.get(url).json()
+                else:
+                    LOGGER.info("Job finished!")
+        else:
+            if request_json["state"] != "complete" and request_json["state"] != "error":
                 LOGGER.warning(
                     f"Request {url} is still running, wait for it to finish or use --wait."
                 )
@@ -211,9 +540,17 @@ def parse_request_xunit(request_url_list=None, tasks_source=None, skip_pass=Fals
                 update_retval(NO_RESULT)
                 continue
 
-        request_summary = request.json()["result"]["summary"]
-        request_result_overall = request.json()["result"]["overall"]
-        if request.json()["state"] == "error":
+        # Keep the finished request document for the other modules to reuse
+        request_store.put(request_json)
+
+        request_summary = request_json["result"]["summary"]
+        request_result_overall = request_json["result"]["overall"]
+        metrics.inc(
+            "enge_request_results_total",
+            state=request_json["state"],
+            result=request_result_overall or "",
+        )
+        if request_json["state"] == "error":
             error_reason = request_summary
             message = (
                 f"The request state reports as ERROR, because of {error_reason}.\n"
@@ -222,23 +559,20 @@ def parse_request_xunit(request_url_list=None, tasks_source=None, skip_pass=Fals
             LOGGER.warning(FormatText.format_text(message, bold=True))
             update_retval(ERROR_HERE)
 
-        results_xml_url = request.json()["result"]["xunit_url"]
-        if not results_xml_url:
-            continue
+        if request_json["result"]["xunit_url"]:
+            finished_requests.append((url, request_json))
 
-        try:
-            results_xml_response = requests.get(results_xml_url)
-        except ConnectionError as err:
-            LOGGER.critical(
-                "There was an issue while attempting to create an API connection."
-            )
-            LOGGER.critical("Please verify, that you're connected to the VPN.")
-            LOGGER.debug(err)
-            sys.exit(99)
+    for url, request_json, xunit_records in _fetch_and_parse_xunits(
+        finished_requests, with_logs=download_logs
+    ):
+        request_uuid = request_json["id"]
+        request_target = request_json["environments_requested"][0]["os"]["compose"]
+        request_datetime_created = request_json["created"]
+        request_summary = request_json["result"]["summary"]
+        request_result_overall = request_json["result"]["overall"]
+        log_dir = f"{request_uuid}_logs"
 
-        if results_xml_response:
-            xunit = results_xml_response.text
-        else:
+        if xunit_records is None:
             LOGGER.critical("Unable to find the xml to parse.")
             LOGGER.critical("Trying to fall back to the request results.")
             if request_result_overall and request_summary:
@@ -254,19 +588,8 @@ def parse_request_xunit(request_url_list=None, tasks_source=None, skip_pass=Fals
             update_retval(ERROR_HERE)
             continue
 
-        xml = lxml.etree.fromstring(xunit.encode())
-
-        job_result_overall = xml.xpath("/testsuites/@overall-result")[0]
-        job_test_suite = xml.xpath("//testsuite")
-
-        # If there is just a single test suite returned and the name of the test suite
-        # is pipeline, we can assume that the response contains only information about the pipeline.
-        # Set the potential_pipeline_error to True and hand over to the overall job result evaluation
-        if (
-            len(job_test_suite) == 1
-            and job_test_suite[0].xpath("./@name")[0] == "pipeline"
-        ):
-            potential_pipeline_error = True
+        # With the potential pipeline error hand over to the overall job result evaluation
+        job_result_overall, potential_pipeline_error, job_test_suite = xunit_records
 
         if job_result_overall == "passed":
             update_retval(ALL_PASS)
@@ -284,96 +607,203 @@ def parse_request_xunit(request_url_list=None, tasks_source=None, skip_pass=Fals
         else:
             update_retval(99)
 
-        if skip_pass and job_result_overall.upper() == "PASSED":
+        # The callback gets all the results, the passes are skipped only from the report
+        skip_request = skip_pass and job_result_overall.upper() == "PASSED"
+        if skip_request and result_callback is None:
             LOGGER.debug(f"Skipping '{url}' as the overall result is pass")
             continue
+        download_request_logs = download_logs and not skip_request
 
-        if (
-            parsed_opts.cli_args.action != "rerun"
-            and parsed_opts.cli_args.download_logs
-        ):
+        if download_request_logs:
             LOGGER.info("  > Downloading the log files.")
             # Create the log directory path for the request
-            log_dir_path = os.path.join(logs_base_directory, log_dir)
+            log_dir_path = os.path.join(parsed_opts.logs_directory, log_dir)
             os.makedirs(log_dir_path, exist_ok=True)
+            # Results of the downloaded logs, the logs commands use them to pick the failures
+            logs_manifest_path = os.path.join(log_dir_path, LOGS_MANIFEST)
+            logs_manifest = load_json(logs_manifest_path, default={})
 
-        if request_uuid not in parsed_dict:
-            parsed_dict[request_uuid] = {
-                "target_name": request_target,
-                "testsuites": [],
-            }
-
-        for elem in job_test_suite:
-            testsuite_testcase = elem.xpath("./testcase")
-            # With the latest Testing Farm release, the testsuite name does not include the target name
-            # it consist of only the plan name
-            testsuite_name = elem.xpath("./@name")[0].split(":")[-1]
-            try:
-                testsuite_arch = elem.xpath(
-                    "./testing-environment/property[@name='arch']/@value"
-                )[0]
-            except IndexError:
-                testsuite_arch = elem.xpath("./@name")[0].split(":")[-1]
-            testsuite_result = elem.xpath("./@result")[0].upper()
-            testsuite_test_count = elem.xpath("./@tests")
-            testsuite_log_dir = testsuite_name.split("/")[-1]
-
-            if skip_pass and testsuite_result == "PASSED":
+        request_result = RequestResult(
+            request_uuid, request_target, request_datetime_created
+        )
+        for testsuite_record, testcases_logs in job_test_suite:
+            testsuite_data = TestsuiteResult.from_dict(testsuite_record)
+            testcases = testsuite_data.testcases
+            testsuite_data.testcases = []
+            testsuite_log_dir = testsuite_data.name.split("/")[-1]
+            plan_history.record(
+                testsuite_data.name,
+                tests=testsuite_data.tests,
+                duration=testsuite_data.duration,
+            )
+
+            request_result.testsuites.append(testsuite_data)
+            download_testsuite_logs = download_request_logs
+            if skip_pass and testsuite_data.result == Result.PASSED:
                 LOGGER.debug(
-                    f"Skipping testsuite '{testsuite_name}' as the result is pass"
+                    f"Skipping testsuite '{testsuite_data.name}' as the result is pass"
                 )
-                continue
+                download_testsuite_logs = False
 
-            testsuite_data = {
-                "testsuite_name": testsuite_name,
-                "testsuite_arch": testsuite_arch,
-                "testsuite_result": testsuite_result,
-                "testcases": [],
-            }
-            parsed_dict[request_uuid]["testsuites"].append(testsuite_data)
-
-            if (
-                parsed_opts.cli_args.action != "rerun"
-                and parsed_opts.cli_args.download_logs
-            ):
+            if download_testsuite_logs:
                 # Create the log directory path for the testsuite
                 testsuite_log_dir_path = os.path.join(log_dir_path, testsuite_log_dir)
                 os.makedirs(testsuite_log_dir_path, exist_ok=True)
 
-            for test in testsuite_testcase:
-                testcase_name = test.xpath("./@name")[0]
-                testcase_result = test.xpath("./@result")[0].upper()
-                if skip_pass and testcase_result == "PASSED":
-                    continue
-                testcase_log_url = test.xpath('./logs/log[@name="testout.log"]/@href')[
-                    0
-                ]
-                log_name = f"{request_target}_{testcase_name.split('/')[-1]}.log"
-
-                # Constructing the parsed dictionary
-                testcase_data = {
-                    "testcase_name": testcase_name,
-                    "testcase_result": testcase_result,
-                }
-                testsuite_data["testcases"].append(testcase_data)
-
-                if (
-                    parsed_opts.cli_args.action != "rerun"
-                    and parsed_opts.cli_args.download_logs
+            for testcase_data, testcase_logs in zip(
+                testcases, testcases_logs or [None] * len(testcases)
+            ):
+                testsuite_data.testcases.append(testcase_data)
+                if not download_testsuite_logs or (
+                    skip_pass and testcase_data.result == Result.PASSED
                 ):
-                    response = urllib.request.urlopen(testcase_log_url)
-                    log_data = response.read().decode("utf-8")
-                    log_file_path = os.path.join(testsuite_log_dir_path, log_name)
-
-                    with open(log_file_path, "w") as logfile:
+                    continue
+                testcase_log_path = os.path.join(
+                    testsuite_log_dir_path,
+                    f"{request_target}_{testcase_data.name.split('/')[-1]}",
+                )
+                if artifact_store is not None:
+                    log_path = _store_testcase_artifacts(
+                        artifact_store, testcase_logs, testcase_log_path
+                    )
+                    truncated = False
+                else:
+                    testcase_log_url = dict(testcase_logs)["testout.log"]
+                    try:
+                        log_data, truncated = download_log(
+                            testcase_log_url,
+                            parsed_opts.cli_args.log_tail,
+                            parsed_opts.cli_args.max_log_size,
+                        )
+                    except requests.RequestException as err:
+                        LOGGER.warning(
+                            f"Unable to download the log {testcase_log_url}: {err}"
+                        )
+                        continue
+                    log_path = f"{testcase_log_path}.log"
+                    with open(log_path, "wb") as logfile:
                         logfile.write(log_data)
 
-        if (
-            parsed_opts.cli_args.action != "rerun"
-            and parsed_opts.cli_args.download_logs
-        ):
+                if log_path is not None:
+                    log_name = os.path.basename(log_path)
+                    logs_manifest[f"{testsuite_log_dir}/{log_name}"] = {
+                        "plan": testsuite_data.name,
+                        "test": testcase_data.name,
+                        "compose": testsuite_data.compose,
+                        "arch": testsuite_data.arch,
+                        "result": str(testcase_data.result),
+                        "truncated": truncated,
+                    }
+
+        if download_request_logs:
+            save_json(logs_manifest_path, logs_manifest)
+            mark_used(log_dir_path)
+            if artifact_store is not None:
+                artifact_store.save()
             LOGGER.info(f"    > Logfiles stored in {log_dir_path}")
 
+        if result_callback is not None:
+            result_callback(request_result)
+        if skip_request:
+            LOGGER.debug(f"Skipping '{url}' as the overall result is pass")
+            continue
+        parsed_dict[request_uuid] = (
+            request_result.with_testsuites(_without_passed(request_result))
+            if skip_pass
+            else request_result
+        )
+
+    plan_history.save()
+    if artifact_store is not None:
+        LOGGER.info(
+            f"Stored {artifact_store.downloaded} new artifact(s), "
+            f"{artifact_store.reused} known artifact(s) were not downloaded again."
+        )
+    if download_logs:
+        evict_downloaded_logs(artifact_store)
+
+    return parsed_dict
+
+
+def _without_passed(request_result):
+    """Get the plan results of the request without the PASSED plans and test cases."""
+    return [
+        testsuite.with_testcases(
+            [
+                testcase
+                for testcase in testsuite.testcases
+                if testcase.result != Result.PASSED
+            ]
+        )
+        for testsuite in request_result.testsuites
+        if testsuite.result != Result.PASSED
+    ]
+
+
+def filter_passed(parsed_dict):
+    """Drop the PASSED plans and test cases from the parsed results, keep the requests with no result."""
+    filtered_dict = {}
+    for request_uuid, details in parsed_dict.items():
+        testsuites = _without_passed(details)
+        if testsuites or not details.testsuites:
+            filtered_dict[request_uuid] = details.with_testsuites(testsuites)
+    return filtered_dict
+
+
+def parse_latest_attempts(
+    request_url_list=None, tasks_source=None, skip_pass=False, result_callback=None
+):
+    """
+    Parse the results of the requests and their finished re-runs, merged to the latest attempts.
+
+    Each plan is reported only under the request of its latest attempt,
+    the stale results of the previous attempts are dropped.
+    The result_callback gets the unmerged results of each request and re-run.
+    """
+    lineage = RerunLineage(parsed_opts.rerun_lineage_file)
+    if request_url_list is None or tasks_source is None:
+        request_url_list, tasks_source = parse_tasks()
+    finished_reruns, _ = lineage.split_descendants(
+        [url.split("/")[-1] for url in request_url_list]
+    )
+    request_url_list = request_url_list + [
+        os.path.join(TESTING_FARM_ENDPOINT, rerun_uuid)
+        for rerun_uuid in finished_reruns
+    ]
+    # Parse including the passes, a passing re-run overrides the failure of the previous attempt
+    parsed_dict = lineage.latest_attempts(
+        parse_request_xunit(
+            request_url_list, tasks_source, result_callback=result_callback
+        )
+    )
+    return filter_passed(parsed_dict) if skip_pass else parsed_dict
+
+
+def parse_results():
+    """Parse the results of the requested tasks according to the report options."""
+    skip_pass = parsed_opts.cli_args.skip_pass
+    export = None
+    if parsed_opts.cli_args.export:
+        from enge.report.export import ParquetExport
+
+        export = ParquetExport(parsed_opts.cli_args.export)
+
+    # Export each request as soon as it is parsed, with all its results and under its own UUID,
+    # the passes are skipped and the re-runs merged only in the report
+    try:
+        if parsed_opts.cli_args.latest:
+            parsed_dict = parse_latest_attempts(
+                skip_pass=skip_pass, result_callback=export.write if export else None
+            )
+        else:
+            parsed_dict = parse_request_xunit(
+                skip_pass=skip_pass,
+                result_callback=export.write if export else None,
+            )
+    finally:
+        if export:
+            export.close()
+
     return parsed_dict
 
 
@@ -387,6 +817,17 @@ def _split_name(name, index):
     return "/".join(name_raw[index:])
 
 
+def _get_unified_names_map():
+    """Map the plan names to be treated as one to the plan1=plan2 key they are reported under"""
+    unified_names_map = {}
+    for plan_name in parsed_opts.cli_args.unify_results or []:
+        name1, name2 = plan_name.split("=", 2)
+        unified_names_map[name1] = plan_name
+        unified_names_map[name2] = plan_name
+    return unified_names_map
+
+
+@profiler.phase("rendering")
 def build_table_comparison():
     """
     Generate a table holding comparable results of several tests.
@@ -405,59 +846,34 @@ def build_table_comparison():
         planname_split_index = -1
         testname_split_index = -1
 
-    parsed_dict = parse_request_xunit(skip_pass=parsed_opts.cli_args.skip_pass)
+    parsed_dict = parse_results()
     result_table = PrettyTable()
     uuids = list(parsed_dict.keys())
     fields = ["Test Plan"] + uuids
     result_table.field_names = fields
-    # plan_name -> uuid run result for particular plan
+    # plan_name -> uuid -> run result for particular plan
     regroup_results_plans = {}
     # plan_name -> test_name -> uuid run result for particular test
     regroup_results_tests = {}
-    unified_names_map = {}
-    for plan_name in parsed_opts.cli_args.unify_results or []:
-        name1, name2 = plan_name.split("=", 2)
-        unified_names_map[name1] = plan_name
-        unified_names_map[name2] = plan_name
+    unified_names_map = _get_unified_names_map()
 
     def _get_plan_key(testsuite_data):
-        plan_key = _split_name(testsuite_data["testsuite_name"], planname_split_index)
+        plan_key = _split_name(testsuite_data.name, planname_split_index)
         # check against unifed map to combine results
         return unified_names_map.get(plan_key) or plan_key
 
     for task_uuid, data in parsed_dict.items():
-        for testsuite_data in data["testsuites"]:
-            res_uuid = {
-                "result": testsuite_data["testsuite_result"],
-                "testcases": sorted(
-                    (x for x in testsuite_data["testcases"]),
-                    key=lambda x: x["testcase_name"],
-                ),
-            }
+        for testsuite_data in data.testsuites:
             plan_key = _get_plan_key(testsuite_data)
-            try:
-                regroup_results_plans[plan_key][task_uuid] = res_uuid
-            except KeyError:
-                regroup_results_plans[plan_key] = {task_uuid: res_uuid}
+            regroup_results_plans.setdefault(plan_key, {})[
+                task_uuid
+            ] = testsuite_data.result
             # Preparation for plans -> tests mapping
-            if plan_key not in regroup_results_tests:
-                regroup_results_tests[plan_key] = {}
+            plan_tests = regroup_results_tests.setdefault(plan_key, {})
             # Now process testcases for easier level2 table processing
-            for testcase_data in testsuite_data["testcases"]:
-                plan_key = _get_plan_key(testsuite_data)
-                test_key = _split_name(
-                    testcase_data["testcase_name"], testname_split_index
-                )
-                if test_key not in regroup_results_tests[plan_key]:
-                    regroup_results_tests[plan_key][test_key] = {}
-                try:
-                    regroup_results_tests[plan_key][test_key][
-                        task_uuid
-                    ] = testcase_data["testcase_result"]
-                except KeyError:
-                    regroup_results_tests[plan_key][test_key] = {
-                        task_uuid: testcase_data["testcase_result"]
-                    }
+            for testcase_data in testsuite_data.testcases:
+                test_key = _split_name(testcase_data.name, testname_split_index)
+                plan_tests.setdefault(test_key, {})[task_uuid] = testcase_data.result
 
     for plan_name, plan_data in regroup_results_plans.items():
         if parsed_opts.cli_args.level2:
@@ -477,15 +893,16 @@ def build_table_comparison():
                     # this plan has not been executed for this run
                     row_data.append("-")
                 else:
-                    row_data.append(colorize(plan_data[uuid]["result"]))
+                    row_data.append(colorize(plan_data[uuid]))
             result_table.add_row(row_data)
     result_table.align = "l"
 
     return result_table
 
 
+@profiler.phase("rendering")
 def build_table():
-    parsed_dict = parse_request_xunit(skip_pass=parsed_opts.cli_args.skip_pass)
+    parsed_dict = parse_results()
 
     result_table = PrettyTable()
     # prepare field names
@@ -535,29 +952,27 @@ def build_table():
         result_table.add_row(tuple(_gen_row(*args, **kwargs)))
 
     for task_uuid, data in parsed_dict.items():
-        add_row(task_uuid, data["target_name"])
+        add_row(task_uuid, data.target)
         last_arch = None
-        for testsuite_data in data["testsuites"]:
-            if last_arch != testsuite_data["testsuite_arch"] and "Arch" in fields:
-                last_arch = testsuite_data["testsuite_arch"]
+        for testsuite_data in data.testsuites:
+            if last_arch != testsuite_data.arch and "Arch" in fields:
+                last_arch = testsuite_data.arch
                 add_row(arch=last_arch)
-            testsuite_result = testsuite_data["testsuite_result"]
+            testsuite_result = testsuite_data.result
             add_row(
                 testplan=colorize(
                     testsuite_result,
-                    _split_name(testsuite_data["testsuite_name"], planname_split_index),
+                    _split_name(testsuite_data.name, planname_split_index),
                 ),
                 testplan_result=colorize(testsuite_result),
             )
             if "Test Case" in fields:
-                for testcase in testsuite_data["testcases"]:
-                    testcase_result = testcase["testcase_result"]
+                for testcase in testsuite_data.testcases:
+                    testcase_result = testcase.result
                     add_row(
                         testcase=colorize(
                             testcase_result,
-                            _split_name(
-                                testcase["testcase_name"], testname_split_index
-                            ),
+                            _split_name(testcase.name, testname_split_index),
                         ),
                         testcase_result=colorize(testcase_result),
                     )
@@ -567,6 +982,154 @@ def build_table():
     return result_table
 
 
+@profiler.phase("rendering")
+def build_durations_table():
+    """
+    Generate a table of the slowest plans and tests for each target of the requested tasks.
+
+    The plans of a request run in parallel, so the longest plan is the critical path
+    of the request, while the total is the machine time taken by all of its plans.
+    For plans the total is the time taken by their tests, the rest is spent on the setup.
+    Sample format:
+    UUID   Target         Test Plan       Test Case   Duration   Total
+    uuid1  C9S x86_64                                 00:20:00   00:35:00
+                          * tier1                     00:20:00   00:18:30
+                            tier0                     00:15:00   00:14:00
+                            tier1         test_a      00:10:00
+    """
+    top = parsed_opts.cli_args.durations
+    split_index = -1 if parsed_opts.cli_args.short else 0
+
+    parsed_dict = parse_results()
+    result_table = PrettyTable()
+    result_table.field_names = [
+        "UUID",
+        "Target",
+        "Test Plan",
+        "Test Case",
+        "Duration",
+        "Total",
+    ]
+
+    def _duration(result):
+        return result.duration or 0
+
+    for task_uuid, data in parsed_dict.items():
+        targets = {}
+        for testsuite_data in data.testsuites:
+            target = (testsuite_data.compose, testsuite_data.arch)
+            targets.setdefault(target, []).append(testsuite_data)
+
+        for (compose, arch), testsuites in targets.items():
+            critical_path = max(testsuites, key=_duration)
+            result_table.add_row(
+                (
+                    task_uuid,
+                    f"{compose} {arch}",
+                    "",
+                    "",
+                    format_duration(critical_path.duration),
+                    format_duration(sum(map(_duration, testsuites))),
+                )
+            )
+            # Show the UUID just once for multi-environment requests
+            task_uuid = ""
+
+            for testsuite_data in sorted(testsuites, key=_duration, reverse=True)[:top]:
+                marker = "* " if testsuite_data is critical_path else "  "
+                result_table.add_row(
+                    (
+                        "",
+                        "",
+                        marker + _split_name(testsuite_data.name, split_index),
+                        "",
+                        format_duration(testsuite_data.duration),
+                        format_duration(sum(map(_duration, testsuite_data.testcases))),
+                    )
+                )
+
+            slowest_tests = sorted(
+                (
+                    (testsuite_data, testcase)
+                    for testsuite_data in testsuites
+                    for testcase in testsuite_data.testcases
+                ),
+                key=lambda test: _duration(test[1]),
+                reverse=True,
+            )[:top]
+            for testsuite_data, testcase in slowest_tests:
+                result_table.add_row(
+                    (
+                        "",
+                        "",
+                        "  " + _split_name(testsuite_data.name, split_index),
+                        _split_name(testcase.name, split_index),
+                        format_duration(testcase.duration),
+                        "",
+                    )
+                )
+    result_table.align = "l"
+
+    return result_table
+
+
+@profiler.phase("rendering")
+def build_durations_comparison():
+    """
+    Generate a table holding the durations of the plans in several runs side by side.
+
+    The plans (and the tests with --level2) are ordered by the largest change of the duration
+    between the first and the last run they were reported in.
+    Sample format:
+    **           tft_run_uuid1  tft_run_uuid2  Delta
+    tier1        00:20:00       00:31:00       +00:11:00
+    tier0        00:15:00       00:14:00       -00:01:00
+    """
+    top = parsed_opts.cli_args.durations
+    split_index = -1 if parsed_opts.cli_args.short else 0
+    unified_names_map = _get_unified_names_map()
+
+    parsed_dict = parse_results()
+    uuids = list(parsed_dict.keys())
+    result_table = PrettyTable()
+    result_table.field_names = ["Test Plan", "Test Case"] + uuids + ["Delta"]
+
+    # (plan_name, test_name) -> uuid -> duration of the plan or the test
+    regroup_durations = {}
+    for task_uuid, data in parsed_dict.items():
+        for testsuite_data in data.testsuites:
+            plan_key = _split_name(testsuite_data.name, split_index)
+            plan_key = unified_names_map.get(plan_key) or plan_key
+            regroup_durations.setdefault((plan_key, ""), {})[
+                task_uuid
+            ] = testsuite_data.duration
+            if parsed_opts.cli_args.level2:
+                for testcase_data in testsuite_data.testcases:
+                    test_key = _split_name(testcase_data.name, split_index)
+                    regroup_durations.setdefault((plan_key, test_key), {})[
+                        task_uuid
+                    ] = testcase_data.duration
+
+    def _delta(durations):
+        known = [durations[uuid] for uuid in uuids if durations.get(uuid) is not None]
+        return known[-1] - known[0] if len(known) > 1 else None
+
+    deltas = {key: _delta(durations) for key, durations in regroup_durations.items()}
+    for key in sorted(
+        deltas,
+        key=lambda key: (deltas[key] is None, -abs(deltas[key] or 0)),
+    )[:top]:
+        plan_name, test_name = key
+        result_table.add_row(
+            [plan_name, test_name]
+            + [format_duration(regroup_durations[key].get(uuid)) for uuid in uuids]
+            + [format_duration(deltas[key], sign=True)]
+        )
+    result_table.align = "l"
+
+    return result_table
+
+
 def get_color_format(result):
     color_format_default = FormatText.end
     if result == "PASSED":
@@ -590,12 +1153,19 @@ def colorize(result, label=None, color_format_default=FormatText.end):
 
 
 def main(result_table=None):
-    if result_table is None:
+    if result_table is None and parsed_opts.cli_args.durations:
+        result_table = (
+            build_durations_comparison()
+            if parsed_opts.cli_args.compare
+            else build_durations_table()
+        )
+    elif result_table is None:
         result_table = (
             build_table_comparison() if parsed_opts.cli_args.compare else build_table()
         )
-    if result_table.rowcount > 0:
-        print(result_table)
-    else:
-        LOGGER.info("Nothing to report!")
+    with profiler.phase("rendering"):
+        if result_table.rowcount > 0:
+            print(result_table)
+        else:
+            LOGGER.info("Nothing to report!")
     return RETURN_VALUE
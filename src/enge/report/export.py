@@ -0,0 +1,173 @@
+"""Export of the parsed results to a columnar Parquet dataset."""
+import logging
+import os
+import sys
+import uuid
+from datetime import datetime
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from enge.utils import get_datetime
+
+LOGGER = logging.getLogger(__name__)
+
+TABLES = ("requests", "testsuites", "testcases")
+
+
+def _schemas():
+    string = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    request_fields = [
+        ("uuid", pyarrow.string()),
+        ("created", pyarrow.timestamp("us")),
+        ("target", string),
+    ]
+    testsuite_fields = request_fields + [
+        ("arch", string),
+        ("compose", string),
+        ("plan", string),
+    ]
+    return {
+        "requests": pyarrow.schema(request_fields + [("testsuites", pyarrow.int32())]),
+        "testsuites": pyarrow.schema(
+            testsuite_fields
+            + [
+                ("result", string),
+                ("tests", pyarrow.int32()),
+                ("duration", pyarrow.float64()),
+            ]
+        ),
+        "testcases": pyarrow.schema(
+            testsuite_fields
+            + [
+                ("test", string),
+                ("result", string),
+                ("duration", pyarrow.float64()),
+            ]
+        ),
+    }
+
+
+def _parse_created(created):
+    try:
+        return datetime.fromisoformat(created) if created else None
+    except ValueError:
+        LOGGER.debug(f"Unable to parse the request creation time {created}.")
+        return None
+
+
+class ParquetExport:
+    """
+    Write the parsed results to a Parquet dataset, one row group per request.
+
+    The dataset is a directory with the requests, testsuites and testcases subdirectories,
+    each export adds a new part file to every one of them, so the existing dataset is appended to
+    and can be read at once with pyarrow.dataset or pandas.read_parquet on the subdirectory.
+    The requests already present in the dataset are not exported again.
+
+    Attributes:
+        path (str): Path to the dataset directory.
+        exported (set): UUIDs of the requests already present in the dataset.
+        written (int): Number of the requests written by this export.
+    """
+
+    def __init__(self, path):
+        if pyarrow is None:
+            LOGGER.critical("The export requires the pyarrow package.")
+            LOGGER.critical("Install it with 'pip install enge[parquet]'.")
+            sys.exit(1)
+        self.path = os.path.expanduser(path)
+        if os.path.exists(self.path) and not os.path.isdir(self.path):
+            LOGGER.critical(f"The export path {self.path} is not a dataset directory!")
+            sys.exit(1)
+
+        self.schemas = _schemas()
+        self.exported = self._exported_requests()
+        self.written = 0
+        self._rows = dict.fromkeys(TABLES, 0)
+        part_name = f"part-{get_datetime()}-{uuid.uuid4().hex[:8]}.parquet"
+        self._writers = {}
+        for table in TABLES:
+            os.makedirs(os.path.join(self.path, table), exist_ok=True)
+            self._writers[table] = pyarrow.parquet.ParquetWriter(
+                os.path.join(self.path, table, part_name), self.schemas[table]
+            )
+
+    def _exported_requests(self):
+        requests_path = os.path.join(self.path, "requests")
+        if not os.path.isdir(requests_path) or not os.listdir(requests_path):
+            return set()
+        # Reading just the uuid column of the requests is cheap even for large datasets
+        return set(
+            pyarrow.parquet.read_table(requests_path, columns=["uuid"])
+            .column("uuid")
+            .to_pylist()
+        )
+
+    def write(self, request):
+        """
+        Write the results of a single request as a new row group of each table.
+
+        Args:
+            request (RequestResult): Results of the request.
+        """
+        if request.uuid in self.exported:
+            LOGGER.debug(f"Request {request.uuid} is already exported, skipping.")
+            return
+        self.exported.add(request.uuid)
+
+        created = _parse_created(request.created)
+        rows = {table: [] for table in TABLES}
+        rows["requests"].append(
+            {
+                "uuid": request.uuid,
+                "created": created,
+                "target": request.target,
+                "testsuites": len(request.testsuites),
+            }
+        )
+        for testsuite in request.testsuites:
+            testsuite_row = {
+                "uuid": request.uuid,
+                "created": created,
+                "target": request.target,
+                "arch": testsuite.arch,
+                "compose": testsuite.compose,
+                "plan": testsuite.name,
+            }
+            rows["testsuites"].append(
+                dict(
+                    testsuite_row,
+                    result=str(testsuite.result),
+                    tests=testsuite.tests,
+                    duration=testsuite.duration,
+                )
+            )
+            rows["testcases"].extend(
+                dict(
+                    testsuite_row,
+                    test=testcase.name,
+                    result=str(testcase.result),
+                    duration=testcase.duration,
+                )
+                for testcase in testsuite.testcases
+            )
+
+        for table in TABLES:
+            if rows[table]:
+                self._writers[table].write_table(
+                    pyarrow.Table.from_pylist(rows[table], schema=self.schemas[table])
+                )
+                self._rows[table] += len(rows[table])
+        self.written += 1
+
+    def close(self):
+        for table, writer in self._writers.items():
+            writer.close()
+            # Do not leave the empty parts behind
+            if not self._rows[table]:
+                os.remove(writer.where)
+        LOGGER.info(f"Exported the results of {self.written} request(s) to {self.path}")
@@ -1,14 +1,19 @@
+import copy
 import logging
-import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from prettytable import PrettyTable
 
 from enge.dispatch.tf_send_request import SubmitTest
-from enge.report.__main__ import parse_tasks, parse_request_xunit
-from enge.utils.globals import TESTING_FARM_ENDPOINT
+from enge.report.__main__ import parse_tasks, parse_latest_attempts
+from enge.utils.lineage import RerunLineage
 from enge.utils.opt_manager import parsed_opts
+from enge.utils.metrics import metrics
+from enge.utils.profiler import profiler
+from enge.utils.request_store import request_store
 from enge.utils import FormatText
 
 colorize = FormatText()
@@ -26,22 +31,33 @@ class RerunJobs:
     obtained from the Testing Farm API.
 
     Attributes:
-        rerun_payloads (list): A list to store payloads prepared for re-running tasks.
+        rerun_payloads (list): A list of (original UUID, payload) pairs prepared for re-running tasks.
         parsed_dict (dict): Stores the parsed results from test plans, organized by their UUIDs.
-        processed_data (dict): Stores filtered and processed task data for re-run.
+        processed_data (dict): Stores filtered and processed task data for re-run, a list of
+            (plan names, compose, test names, arch) for each environment of the task.
         rerun_uuids (list): Stores the UUIDs of tasks that qualify for re-run.
         req_url_list (list): URLs of requested tasks for analysis.
         task_source (str): The source from which tasks were retrieved.
+        result_filter (str): Re-run only plans with this result, all non-passing plans if None.
     """
 
-    def __init__(self):
+    def __init__(self, req_url_list=None, task_source=None):
         self.rerun_payloads = []
         self.parsed_dict = {}
         self.processed_data = {}
         self.rerun_uuids = []
 
         # Retrieve task URLs and their source from the report module
-        self.req_url_list, self.task_source = parse_tasks()
+        if req_url_list is None:
+            req_url_list, task_source = parse_tasks()
+        self.req_url_list, self.task_source = req_url_list, task_source
+
+        # Determine the result filter based on CLI arguments
+        self.result_filter = None
+        if parsed_opts.cli_args.error:
+            self.result_filter = "ERROR"
+        elif parsed_opts.cli_args.fail:
+            self.result_filter = "FAILED"
 
     def qualify_results(self):
         """
@@ -55,40 +71,95 @@ class RerunJobs:
         # Parse test results from the specified URLs
         for i in self.req_url_list:
             logger.debug(f"Parsing the payload from: {i}")
-        self.parsed_dict = parse_request_xunit(
+        # Skip the plans, that were already re-run and the re-run did not finish yet,
+        # the finished re-runs replace the results of the previous attempts
+        lineage = RerunLineage(parsed_opts.rerun_lineage_file)
+        _, pending_reruns = lineage.split_descendants(
+            [url.split("/")[-1] for url in self.req_url_list],
+            parsed_opts.cli_args.workers,
+        )
+        self.parsed_dict = parse_latest_attempts(
             self.req_url_list, self.task_source, True
         )
 
+        def _is_pending(request_uuid, suite):
+            root_uuid = lineage.root(request_uuid)
+            for rerun_uuid in pending_reruns:
+                if lineage.root(rerun_uuid) == root_uuid and lineage.covers(
+                    rerun_uuid, suite.name, suite.arch, suite.compose
+                ):
+                    logger.info(
+                        f"Skipping {suite.name} on {suite.compose} {suite.arch} of {request_uuid}, "
+                        f"its re-run {rerun_uuid} is still pending."
+                    )
+                    return True
+            return False
+
+        result_filter = self.result_filter
         for key, details in self.parsed_dict.items():
-            # Determine the result filter based on CLI arguments
-            result_filter = None
-            if parsed_opts.cli_args.error:
-                result_filter = "ERROR"
-            elif parsed_opts.cli_args.fail:
-                result_filter = "FAILED"
-
             # Filter test suites based on the result filter
             filtered_suites = [
                 suite
-                for suite in details["testsuites"]
-                if result_filter is None or suite["testsuite_result"] == result_filter
+                for suite in details.testsuites
+                if (result_filter is None or suite.result == result_filter)
+                and not _is_pending(key, suite)
             ]
 
-            # Process and store data for filtered test suites
-            suite_names = "|".join(suite["testsuite_name"] for suite in filtered_suites)
-            if suite_names:
-                self.processed_data[key] = (suite_names, details["target_name"])
+            # Group the suites by the environment they ran in, so each environment
+            # of a multi-environment request gets re-run with its own plans only
+            environment_suites = {}
+            for suite in filtered_suites:
+                environment = (suite.arch, suite.compose)
+                environment_suites.setdefault(environment, []).append(suite)
+
+            for (arch, compose), suites in environment_suites.items():
+                # Collect the failing test cases when re-running on the test level
+                # Fall back to the whole plans if any of the suites reports no test case,
+                # e.g. when the plan errored out before the tests got to run
+                test_names = None
+                if parsed_opts.cli_args.granularity == "test" and all(
+                    suite.testcases for suite in suites
+                ):
+                    test_names = sorted(
+                        {
+                            testcase.name
+                            for suite in suites
+                            for testcase in suite.testcases
+                            if result_filter is None or testcase.result == result_filter
+                        }
+                    )
+
+                # Process and store data for filtered test suites
+                suite_names = "|".join(suite.name for suite in suites)
+                self.processed_data.setdefault(key, []).append(
+                    (suite_names, compose, test_names, arch)
+                )
+            if key in self.processed_data:
                 self.rerun_uuids.append(key)
 
         # Log and display qualifying plans for a re-run
         if self.processed_data:
             info_table = PrettyTable()
-            info_table.field_names = ["Original Request", "Target", "Re-run Plans"]
+            info_table.field_names = [
+                "Original Request",
+                "Target",
+                "Re-run Plans",
+                "Re-run Tests",
+            ]
             logger.info("The following plans qualify for a re-run:")
-            for req in self.processed_data.keys():
-                rerun_plans = "\n".join(self.processed_data.get(req)[0].split("|"))
-                rerun_target = self.processed_data.get(req)[1]
-                info_table.add_row((req, rerun_target, rerun_plans), divider=True)
+            for req, environments in self.processed_data.items():
+                for i, (suite_names, compose, test_names, arch) in enumerate(
+                    environments
+                ):
+                    rerun_plans = "\n".join(suite_names.split("|"))
+                    rerun_target = (
+                        f"{compose} {arch}" if len(environments) > 1 else compose
+                    )
+                    rerun_tests = "\n".join(test_names or ["*"])
+                    info_table.add_row(
+                        (req if i == 0 else "", rerun_target, rerun_plans, rerun_tests),
+                        divider=i == len(environments) - 1,
+                    )
             info_table.align = "l"
             print(info_table)
             if parsed_opts.cli_args.dryrun:
@@ -105,77 +176,155 @@ class RerunJobs:
 
     def build_rerun_payloads(self, uuids):
         """
-        Build re-run payloads for the qualifying tasks by retrieving detailed information
-        from the Testing Farm API.
+        Build re-run payloads for the qualifying tasks from the request details
+        already fetched from the Testing Farm API while qualifying the results.
 
         Args:
             uuids (list): List of UUIDs for tasks that qualify for re-run.
 
         Returns:
-            list: A list of filtered payloads ready for re-submission.
+            list: A list of (original UUID, filtered payload) pairs ready for re-submission.
         """
         self.rerun_payloads = []
 
         for request in uuids:
-            # Fetch the task details from the API
-            response = requests.get(os.path.join(TESTING_FARM_ENDPOINT, request))
-            request_details = response.json()
-
+            request_details = request_store.get(request)
             match_uuid = request_details.get("id")
-            if len(request_details.get("environments_requested")) > 1:
-                logger.critical(
-                    "There were multiple environments requested in the original task."
-                )
-                logger.critical(
-                    "Cowardly refusing to continue due to the inability to correctly assign environments to failed plans."
-                )
-                sys.exit(99)
-
-            # Determine the test plan to use for re-run based on the task state
-            if request_details.get("state") == "error":
-                logger.info(
-                    "The original plan filtering will be used, since no plan from the original request finished successfully."
-                )
-                self.plan = (
-                    request_details["test"]["fmf"]["name"]
-                    or request_details["test"]["fmf"]["plan_filter"]
+            environments_requested = request_details.get("environments_requested")
+
+            for suite_names, compose, test_names, arch in self.processed_data.get(
+                match_uuid, []
+            ):
+                # Assign the environment the failed plans ran in,
+                # the only one is used for single-environment requests
+                environments = [
+                    environment
+                    for environment in environments_requested
+                    if len(environments_requested) == 1
+                    or (
+                        environment.get("arch") == arch
+                        and environment.get("os", {}).get("compose") == compose
+                    )
+                ][:1]
+                if not environments:
+                    logger.error(
+                        f"Unable to assign any requested environment of {match_uuid} to {compose} {arch}."
+                    )
+                    logger.error(f"Skipping the re-run of {suite_names}.")
+                    continue
+
+                # Copy the stored task details, so the payload changes do not leak back
+                payload = copy.deepcopy(request_details)
+                payload["environments_requested"] = copy.deepcopy(environments)
+
+                # Determine the test plan to use for re-run based on the task state
+                if payload.get("state") == "error":
+                    logger.info(
+                        "The original plan filtering will be used, since no plan from the original request finished successfully."
+                    )
+                else:
+                    payload["test"]["fmf"]["name"] = suite_names
+                    if test_names:
+                        # Select just the failing tests by the exact name match
+                        test_names_pattern = "|".join(map(re.escape, test_names))
+                        payload["test"]["fmf"][
+                            "test_name"
+                        ] = f"^({test_names_pattern})$"
+
+                # Remove unnecessary keys from the payload
+                keys_to_remove = {
+                    "id",
+                    "user_id",
+                    "token_id",
+                    "notes",
+                    "result",
+                    "run",
+                    "user",
+                    "queued_time",
+                    "run_time",
+                    "created",
+                    "updated",
+                    "state",
+                }
+                filtered_payload = {
+                    k: v for k, v in payload.items() if k not in keys_to_remove
+                }
+
+                # Update environment key for re-run compatibility
+                filtered_payload["environments"] = filtered_payload.pop(
+                    "environments_requested"
                 )
-            else:
-                if match_uuid in self.processed_data:
-                    request_details["test"]["fmf"]["name"] = self.processed_data[
-                        match_uuid
-                    ][0]
-
-            # Remove unnecessary keys from the payload
-            keys_to_remove = {
-                "id",
-                "user_id",
-                "token_id",
-                "notes",
-                "result",
-                "run",
-                "user",
-                "queued_time",
-                "run_time",
-                "created",
-                "updated",
-                "state",
-            }
-            filtered_payload = {
-                k: v for k, v in request_details.items() if k not in keys_to_remove
-            }
-
-            # Update environment key for re-run compatibility
-            filtered_payload["environments"] = filtered_payload.pop(
-                "environments_requested"
-            )
 
-            # Append the filtered payload for re-run
-            self.rerun_payloads.append(filtered_payload)
+                # Append the filtered payload for re-run
+                self.rerun_payloads.append((match_uuid, filtered_payload))
 
         return self.rerun_payloads
 
 
+def _post_rerun(submit, payload, header):
+    """Post the re-run payload, return the exception instead of raising it."""
+    try:
+        return submit.post_request(payload, header)
+    except requests.RequestException as err:
+        return err
+
+
+@profiler.phase("dispatch")
+def submit_rerun_payloads(submit, rerun_payloads):
+    """
+    Send the re-run payloads concurrently, the responses are processed in the order of the payloads.
+
+    A failed submission is logged and the rest of the payloads are still submitted,
+    the lineage of the submitted re-runs is saved in any case.
+
+    Args:
+        submit (SubmitTest): Submitter with the API key set.
+        rerun_payloads (list): List of (original UUID, payload) pairs.
+
+    Returns:
+        list: List of (original UUID, re-run UUID) pairs of the successfully submitted requests.
+    """
+    submitted = []
+    lineage = RerunLineage(parsed_opts.rerun_lineage_file)
+    req_header, _ = submit.build_payload()
+    try:
+        with ThreadPoolExecutor(max_workers=parsed_opts.cli_args.workers) as executor:
+            responses = executor.map(
+                lambda rerun: _post_rerun(submit, rerun[1], req_header),
+                rerun_payloads,
+            )
+            for (original_uuid, payload), response in zip(rerun_payloads, responses):
+                if isinstance(response, requests.RequestException):
+                    logger.error(
+                        f"Unable to submit the re-run of {original_uuid}: {response}"
+                    )
+                    continue
+                environment = payload["environments"][0]
+                submit.compose = environment["os"]["compose"]
+                # The re-runs of the errored requests keep the original plan filtering
+                submit.plan = payload["test"]["fmf"]["name"] or payload["test"][
+                    "fmf"
+                ].get("plan_filter")
+
+                task_id = submit.process_response(response)
+                if task_id:
+                    metrics.inc("enge_reruns_submitted_total")
+                    submitted.append((original_uuid, task_id))
+                    lineage.record(
+                        task_id,
+                        original_uuid,
+                        [plan for plan in (submit.plan or "").split("|") if plan],
+                        environment.get("arch"),
+                        submit.compose,
+                    )
+
+                submit.print_header = False
+    finally:
+        lineage.save()
+
+    return submitted
+
+
 def main():
     """
     Main function to qualify tasks for re-run, build their re-run payloads,
@@ -186,6 +335,13 @@ def main():
 
     # Set up the submitter
     submit.print_header = True
+    # Set API key for submission
+    submit.api_key = parsed_opts.testing_farm.get("api_key")
+
+    if parsed_opts.cli_args.auto:
+        from .auto import AutoRerun
+
+        return AutoRerun(jobs, submit).run()
 
     # Qualify tasks for re-run
     jobs.qualify_results()
@@ -193,18 +349,7 @@ def main():
     # Build re-run payloads
     jobs.build_rerun_payloads(jobs.rerun_uuids)
 
-    # Set API key for submission
-    submit.api_key = parsed_opts.testing_farm.get("api_key")
-
-    # Build request headers and send re-run requests
-    req_header, _ = submit.build_payload()
-    for i, payload in enumerate(jobs.rerun_payloads):
-        submit.compose = list(jobs.processed_data.values())[i][1]
-        submit.plan = list(jobs.processed_data.values())[i][0]
-
-        submit.send_request(payload, req_header)
-
-        submit.print_header = False
+    submit_rerun_payloads(submit, jobs.rerun_payloads)
 
 
 if __name__ == "__main__":
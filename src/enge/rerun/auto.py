@@ -0,0 +1,203 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prettytable import PrettyTable
+
+from enge.report.__main__ import ALL_PASS, ERROR_HERE, FAIL_HERE, colorize
+from enge.utils import http
+from enge.utils.globals import TESTING_FARM_ENDPOINT
+from enge.utils.metrics import metrics
+from enge.utils.opt_manager import parsed_opts
+from enge.utils.profiler import profiler
+from enge.utils.request_store import FINISHED_STATES, request_store
+from .__main__ import RerunJobs, submit_rerun_payloads
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 30
+
+
+class AutoRerun:
+    """
+    Re-run the qualifying tasks repeatedly, until all of them finish without an ERROR.
+
+    The first attempt re-runs all the qualifying plans, following attempts re-run
+    just the plans reporting ERROR again. The loop stops when nothing qualifies
+    for a re-run anymore, the attempt limit is hit, or the machine time budget is used up.
+
+    Attributes:
+        jobs (RerunJobs): Jobs qualified from the requested sources.
+        submit (SubmitTest): Submitter with the API key set.
+        max_attempts (int): Maximum number of re-run attempts.
+        budget (float): Machine hours available for the re-runs, unlimited if None.
+        spent (float): Machine hours spent by the finished re-runs.
+        origins (dict): Re-run UUID to the (original UUID, attempt number) mapping.
+        rerun_again (set): UUIDs of the requests, that were already re-run.
+    """
+
+    def __init__(self, jobs, submit):
+        self.jobs = jobs
+        self.submit = submit
+        self.max_attempts = parsed_opts.cli_args.max_attempts
+        self.budget = parsed_opts.cli_args.budget
+        self.backoff = parsed_opts.cli_args.backoff
+        self.spent = 0.0
+        self.origins = {}
+        self.rerun_again = set()
+
+    @profiler.phase("status polling")
+    @metrics.timer("enge_wait_seconds_total")
+    def watch_requests(self, request_uuids):
+        """Poll the re-run requests concurrently, until all of them finish."""
+        pending = set(request_uuids)
+        clear_line = "\x1b[2K"
+
+        def _fetch(request_uuid):
+            return http.get(os.path.join(TESTING_FARM_ENDPOINT, request_uuid)).json()
+
+        with ThreadPoolExecutor(max_workers=parsed_opts.cli_args.workers) as executor:
+            while pending:
+                for request_json in executor.map(_fetch, sorted(pending)):
+                    request_store.put(request_json)
+                    if request_json["state"] in FINISHED_STATES:
+                        pending.discard(request_json["id"])
+                        self.spent += (request_json.get("run_time") or 0) / 3600
+                if pending:
+                    print(end=clear_line)
+                    print(
+                        f"Waiting for {len(pending)} of {len(request_uuids)} re-run requests to finish.",
+                        end="\r",
+                        flush=True,
+                    )
+                    time.sleep(POLL_INTERVAL)
+
+    def run(self):
+        jobs = self.jobs
+        jobs.qualify_results()
+        attempt = 0
+        while jobs.rerun_uuids:
+            attempt += 1
+            if attempt > self.max_attempts:
+                logger.warning(
+                    f"Stopping, the limit of {self.max_attempts} re-run attempts was hit."
+                )
+                break
+            if self.budget is not None and self.spent >= self.budget:
+                logger.warning(
+                    f"Stopping, {self.spent:.2f} of the {self.budget} machine hours budget was used up."
+                )
+                break
+
+            jobs.build_rerun_payloads(jobs.rerun_uuids)
+            if self.budget is not None:
+                estimate = self.estimate_hours(jobs.rerun_payloads)
+                if self.spent + estimate > self.budget:
+                    logger.warning(
+                        f"Stopping, re-run attempt {attempt} is estimated to take {estimate:.2f} machine hours, "
+                        f"only {self.budget - self.spent:.2f} of the {self.budget} machine hours budget is left."
+                    )
+                    break
+            if attempt > 1:
+                delay = self.backoff * 2 ** (attempt - 2)
+                logger.info(f"Re-run attempt {attempt} starts in {delay} seconds.")
+                time.sleep(delay)
+
+            submitted = self.submit_attempt(jobs.rerun_payloads, attempt)
+            if not submitted:
+                logger.warning(
+                    f"Stopping, none of the requests of re-run attempt {attempt} was submitted."
+                )
+                break
+            self.watch_requests([rerun_uuid for _, rerun_uuid in submitted])
+            logger.info(
+                f"Re-run attempt {attempt} finished, {self.spent:.2f} machine hours spent so far."
+            )
+
+            # Only the plans erroring again qualify for the following attempt
+            jobs = RerunJobs(
+                [
+                    os.path.join(TESTING_FARM_ENDPOINT, rerun_uuid)
+                    for _, rerun_uuid in submitted
+                ],
+                f"re-run attempt {attempt}",
+            )
+            jobs.result_filter = "ERROR"
+            jobs.qualify_results()
+
+        return self.print_report()
+
+    def estimate_hours(self, rerun_payloads):
+        """
+        Estimate the machine hours the re-run payloads are going to take.
+
+        Each re-run is estimated by the run time of the request it re-runs,
+        the same way the finished re-runs are accounted for. The request with several
+        environments is re-run by a payload per environment, each of them is estimated
+        by the share of the run time of a single environment.
+        """
+        estimate = 0.0
+        for original_uuid, _ in rerun_payloads:
+            request_json = request_store.get(original_uuid)
+            environments = len(request_json.get("environments_requested") or []) or 1
+            estimate += (request_json.get("run_time") or 0) / 3600 / environments
+        return estimate
+
+    def submit_attempt(self, rerun_payloads, attempt):
+        submitted = submit_rerun_payloads(self.submit, rerun_payloads)
+        for original_uuid, rerun_uuid in submitted:
+            self.rerun_again.add(original_uuid)
+            root_uuid = self.origins.get(original_uuid, (original_uuid, 0))[0]
+            self.origins[rerun_uuid] = (root_uuid, attempt)
+        return submitted
+
+    def print_report(self):
+        """
+        Print the latest attempt for each of the re-run requests.
+
+        Returns:
+            int: Return code following the report module convention.
+        """
+        retval = ALL_PASS
+        latest = [
+            (rerun_uuid, origin)
+            for rerun_uuid, origin in self.origins.items()
+            if rerun_uuid not in self.rerun_again
+        ]
+        report_table = PrettyTable()
+        report_table.field_names = [
+            "Original Request",
+            "Target",
+            "Attempts",
+            "Latest Request",
+            "State",
+            "Result",
+        ]
+        for rerun_uuid, (root_uuid, attempt) in latest:
+            request_json = request_store.get(rerun_uuid)
+            state = request_json["state"].upper()
+            result = ((request_json.get("result") or {}).get("overall") or "").upper()
+            if state == "ERROR" or result == "ERROR":
+                retval = max(retval, ERROR_HERE)
+            elif result == "FAILED":
+                retval = max(retval, FAIL_HERE)
+            report_table.add_row(
+                (
+                    root_uuid,
+                    request_json["environments_requested"][0]["os"]["compose"],
+                    attempt,
+                    rerun_uuid,
+                    state,
+                    colorize(result or "-"),
+                )
+            )
+        report_table.align = "l"
+        print()
+        attempts = max((attempt for _, attempt in self.origins.values()), default=0)
+        logger.info(
+            f"Re-runs finished in {attempts} attempt(s), {self.spent:.2f} machine hours spent."
+        )
+        if report_table.rowcount:
+            print(report_table)
+        return retval
@@ -0,0 +1,129 @@
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from enge.report.__main__ import FETCH_WORKERS, parse_request_xunit, parse_tasks
+from enge.utils.local_store import load_json, save_json
+from enge.utils.log_retention import evict_cache, mark_used
+from enge.utils.opt_manager import parsed_opts
+from enge.utils.request_store import FINISHED_STATES, request_store
+from enge.utils.results import RequestResult
+
+LOGGER = logging.getLogger(__name__)
+
+# Don't print unnecessary log messages from the report module
+report_logger = logging.getLogger("enge.report")
+report_logger.setLevel(logging.WARNING)
+
+
+def percentile(values, percent):
+    """
+    Get the percentile of the values using the nearest-rank method.
+
+    :return: The value, None if there are no values
+    """
+    ordered = sorted(value for value in values if value is not None)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def collect_requests():
+    """
+    Collect the finished requests from the requested sources with their parsed results.
+
+    The finished requests and their results are stored in the cache directory,
+    so each request is fetched and parsed just once. The entries not used for a while
+    are evicted, within the size and age limits from the stats section of the configuration.
+
+    Returns:
+        list: List of (request document, RequestResult or None) pairs,
+            the result is None for the requests with no xunit to parse.
+    """
+    requests_directory = os.path.join(parsed_opts.cache_directory, "requests")
+    results_directory = os.path.join(parsed_opts.cache_directory, "results")
+    request_store.directory = requests_directory
+
+    request_url_list, tasks_source = parse_tasks()
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        request_jsons = list(
+            executor.map(
+                request_store.get, (url.split("/")[-1] for url in request_url_list)
+            )
+        )
+    finished_requests = []
+    for url, request_json in zip(request_url_list, request_jsons):
+        if request_json["state"] in FINISHED_STATES:
+            finished_requests.append((url, request_json))
+        else:
+            LOGGER.info(f"Skipping the request {url}, it did not finish yet.")
+    if not finished_requests:
+        LOGGER.critical("None of the requested tasks finished yet.")
+        return []
+
+    parsed_dict = {}
+    unparsed_urls = []
+    for url, request_json in finished_requests:
+        result_path = os.path.join(results_directory, f"{request_json['id']}.json")
+        stored = load_json(result_path)
+        if stored is None:
+            unparsed_urls.append(url)
+        else:
+            mark_used(result_path)
+            parsed_dict[request_json["id"]] = RequestResult.from_dict(stored)
+    if unparsed_urls:
+        for request_uuid, request_result in parse_request_xunit(
+            unparsed_urls, tasks_source
+        ).items():
+            save_json(
+                os.path.join(results_directory, f"{request_uuid}.json"),
+                request_result.to_dict(),
+            )
+            parsed_dict[request_uuid] = request_result
+    LOGGER.debug(
+        f"Collected {len(finished_requests)} requests, {len(unparsed_urls)} of them parsed."
+    )
+    for directory in (requests_directory, results_directory):
+        evicted, _ = evict_cache(
+            directory, parsed_opts.stats_cache_max_size, parsed_opts.stats_cache_max_age
+        )
+        if evicted:
+            LOGGER.debug(f"Evicted {len(evicted)} cached file(s) from {directory}.")
+
+    return [
+        (request_json, parsed_dict.get(request_json["id"]))
+        for _, request_json in finished_requests
+    ]
+
+
+def group_key(request_json, environment):
+    """Get the key of the statistics group by the requested properties of the request."""
+    properties = {
+        "compose": environment["os"]["compose"],
+        "arch": environment["arch"],
+        "plan": request_json["test"]["fmf"]["name"] or "*",
+    }
+    return tuple(properties[name] for name in parsed_opts.cli_args.by)
+
+
+def main():
+    if parsed_opts.cli_args.stats_command == "latency":
+        from .latency import build_latency_table
+
+        result_table = build_latency_table(collect_requests())
+    elif parsed_opts.cli_args.stats_command == "cost":
+        from .cost import build_cost_table
+
+        result_table = build_cost_table(collect_requests())
+
+    if result_table.rowcount > 0:
+        print(result_table)
+    else:
+        LOGGER.info("Nothing to report!")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
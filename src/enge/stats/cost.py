@@ -0,0 +1,118 @@
+"""Machine time spent by the Testing Farm requests."""
+from prettytable import PrettyTable
+
+from enge.utils.lineage import RerunLineage
+from enge.utils.opt_manager import parsed_opts
+from enge.utils.results import Result
+
+
+def request_costs(request_json, request_result=None):
+    """
+    Get the machine time spent by each plan of the request.
+
+    Each plan runs on its own guest, so the machine time of a plan is its duration.
+    The environments with no plan results, e.g. when the request errored out before
+    the tests got to run, are accounted with the run time of the whole request.
+
+    Returns:
+        list: List of (properties, seconds, error) tuples, the properties
+            are the tag, compose, arch and plan the time was spent on.
+    """
+    request_error = (
+        request_json["state"] == "error"
+        or (request_json.get("result") or {}).get("overall") == "error"
+    )
+    testsuites = request_result.testsuites if request_result is not None else []
+    costs = []
+    for environment in request_json["environments_requested"]:
+        provisioning = (environment.get("settings") or {}).get("provisioning") or {}
+        properties = {
+            "tag": (provisioning.get("tags") or {}).get("BusinessUnit") or "-",
+            "compose": environment["os"]["compose"],
+            "arch": environment["arch"],
+        }
+        environment_testsuites = [
+            testsuite
+            for testsuite in testsuites
+            if testsuite.arch == environment["arch"]
+            and testsuite.compose == environment["os"]["compose"]
+        ]
+        for testsuite in environment_testsuites:
+            costs.append(
+                (
+                    dict(properties, plan=testsuite.name),
+                    testsuite.duration or 0,
+                    request_error or testsuite.result == Result.ERROR,
+                )
+            )
+        if not environment_testsuites:
+            costs.append(
+                (
+                    dict(properties, plan=request_json["test"]["fmf"]["name"] or "*"),
+                    request_json.get("run_time") or 0,
+                    request_error,
+                )
+            )
+    return costs
+
+
+def build_cost_table(collected):
+    """
+    Generate a table of the machine hours spent by each group of the requests.
+
+    The share of the re-runs is computed from the locally recorded re-run lineage,
+    the share of the errors from the plans and requests reporting ERROR.
+    Sample format:
+    Tag    Plan     Requests  Machine Hours  Share  Re-runs  Errors
+    sst    /tier1   120       310.52         62.1%  12.0%    3.4%
+    """
+    lineage = RerunLineage(parsed_opts.rerun_lineage_file)
+    groups = {}
+    for request_json, request_result in collected:
+        rerun = lineage.attempt(request_json["id"]) > 0
+        for properties, seconds, error in request_costs(request_json, request_result):
+            key = tuple(properties[name] for name in parsed_opts.cli_args.by)
+            group = groups.setdefault(
+                key, {"requests": set(), "total": 0.0, "reruns": 0.0, "errors": 0.0}
+            )
+            group["requests"].add(request_json["id"])
+            group["total"] += seconds
+            group["reruns"] += seconds if rerun else 0
+            group["errors"] += seconds if error else 0
+
+    def _share(part, total):
+        return f"{part / total:.1%}" if total else "-"
+
+    result_table = PrettyTable()
+    fields = [name.capitalize() for name in parsed_opts.cli_args.by]
+    fields += ["Requests", "Machine Hours", "Share", "Re-runs", "Errors"]
+    result_table.field_names = fields
+    total = sum(group["total"] for group in groups.values())
+    for key, group in sorted(
+        groups.items(), key=lambda group: group[1]["total"], reverse=True
+    ):
+        result_table.add_row(
+            list(key)
+            + [
+                len(group["requests"]),
+                f"{group['total'] / 3600:.2f}",
+                _share(group["total"], total),
+                _share(group["reruns"], group["total"]),
+                _share(group["errors"], group["total"]),
+            ]
+        )
+    if groups:
+        result_table.add_row(
+            ["Total"]
+            + [""] * (len(parsed_opts.cli_args.by) - 1)
+            + [
+                len(collected),
+                f"{total / 3600:.2f}",
+                _share(total, total),
+                _share(sum(group["reruns"] for group in groups.values()), total),
+                _share(sum(group["errors"] for group in groups.values()), total),
+            ]
+        )
+    result_table.align = "l"
+
+    return result_table
@@ -0,0 +1,80 @@
+"""Queue, setup and run time percentiles of the Testing Farm requests."""
+
+from prettytable import PrettyTable
+
+from enge.utils import format_duration
+from enge.utils.opt_manager import parsed_opts
+from .__main__ import group_key, percentile
+
+PERCENTILES = (50, 90, 99)
+
+
+def request_latencies(request_json, request_result=None):
+    """
+    Get the latencies of each requested environment of the request.
+
+    The queue and run time are reported by the Testing Farm, the run time includes
+    provisioning of the guests and preparing them for the plans. The setup time is estimated
+    as the run time not spent by the longest plan in the environment, None if there are no results.
+
+    Returns:
+        list: List of (environment, queue time, setup time, run time) tuples in seconds.
+    """
+    # The Testing Farm reports the queue time as a string
+    queued_time, run_time = (
+        float(request_json[key]) if request_json.get(key) is not None else None
+        for key in ("queued_time", "run_time")
+    )
+    latencies = []
+    for environment in request_json["environments_requested"]:
+        setup_time = None
+        if request_result is not None and run_time is not None:
+            durations = [
+                testsuite.duration or 0
+                for testsuite in request_result.testsuites
+                if testsuite.arch == environment["arch"]
+                and testsuite.compose == environment["os"]["compose"]
+            ]
+            if durations:
+                setup_time = max(0, run_time - max(durations))
+        latencies.append((environment, queued_time, setup_time, run_time))
+    return latencies
+
+
+def build_latency_table(collected):
+    """
+    Generate a table of the latency percentiles for each group of the requests.
+
+    Sample format:
+    Compose   Arch     Plan     Runs      Queue p50 / p90 / p99         Setup p50 / p90 / p99 ...
+    C9S       x86_64   /plans   30        00:01:00 00:04:10 00:09:30    00:05:00 00:06:10 00:07:00
+    """
+    groups = {}
+    for request_json, request_result in collected:
+        for environment, *latencies in request_latencies(request_json, request_result):
+            key = group_key(request_json, environment)
+            groups.setdefault(key, []).append(latencies)
+
+    result_table = PrettyTable()
+    labels = " / ".join(f"p{percent}" for percent in PERCENTILES)
+    result_table.field_names = [
+        name.capitalize() for name in parsed_opts.cli_args.by
+    ] + [
+        "Runs",
+        f"Queue {labels}",
+        f"Setup {labels}",
+        f"Run {labels}",
+    ]
+    for key, samples in sorted(groups.items(), key=lambda group: str(group[0])):
+        row = list(key) + [len(samples)]
+        for values in zip(*samples):
+            row.append(
+                " ".join(
+                    format_duration(percentile(values, percent))
+                    for percent in PERCENTILES
+                )
+            )
+        result_table.add_row(row)
+    result_table.align = "l"
+
+    return result_table
@@ -34,3 +34,79 @@ class FormatText:
 def get_datetime():
     datetime_str = datetime.now().strftime("%Y%m%d%H%M%S")
     return datetime_str
+
+
+def parse_duration(value):
+    """
+    Convert a duration reported in the xunit to seconds.
+
+    The Testing Farm reports the durations either as a number of seconds
+    or in the tmt format HH:MM:SS.
+
+    :return: Duration in seconds, None if the value is missing or not parsable
+    :rtype: float
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        seconds = 0.0
+        for part in value.split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+def format_duration(seconds, sign=False):
+    """
+    Format the duration in seconds in the tmt format HH:MM:SS.
+
+    :param sign: Prefix the duration with + or -, useful for the duration deltas
+    :return: Formatted duration, "-" if the duration is not known
+    :rtype: str
+    """
+    if seconds is None:
+        return "-"
+    prefix = ("-" if seconds < 0 else "+") if sign else ""
+    minutes, secs = divmod(round(abs(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{prefix}{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value):
+    """
+    Convert a human readable size like 64K or 10M to bytes.
+
+    The units are powers of 1024, a trailing B or iB is accepted as well.
+
+    :return: Size in bytes
+    :rtype: int
+    :raises ValueError: If the size is not parsable
+    :raises OverflowError: If the size is infinite
+    """
+    size = value.strip().upper().removesuffix("B").removesuffix("I")
+    unit = size[-1:] if size[-1:] in SIZE_UNITS else ""
+    number = float(size[: len(size) - len(unit)])
+    if number < 0:
+        raise ValueError(f"negative size: '{value}'")
+    return int(number * SIZE_UNITS[unit])
+
+
+def format_size(size):
+    """
+    Format the size in bytes in the human readable form, e.g. 1.5M.
+
+    :rtype: str
+    """
+    for unit in ("", "K", "M", "G"):
+        if size < 1024 or unit == "G":
+            break
+        size /= 1024
+    return f"{size:.1f}{unit}" if unit else str(size)
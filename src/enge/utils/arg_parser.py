@@ -1,13 +1,52 @@
 #!/usr/bin/env python3
 
 import argparse
+import datetime
 import pathlib
 
+from . import parse_size
 from .tf_artifact import CoprRef, BrewRef
 
 
-def get_arguments():
-    """Define command-line arguments."""
+def parallel_limit_type(value):
+    """Accept either a number or 'auto' as a parallel limit."""
+    if value == "auto":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid parallel limit value: '{value}', use a number or 'auto'"
+        )
+
+
+def size_type(value):
+    """Accept a size in bytes with an optional K, M or G unit."""
+    try:
+        return parse_size(value)
+    except (ValueError, OverflowError):
+        raise argparse.ArgumentTypeError(
+            f"invalid size value: '{value}', use a number with an optional K, M or G unit"
+        )
+
+
+def positive_size_type(value):
+    """Accept a non-zero size in bytes with an optional K, M or G unit."""
+    size = size_type(value)
+    if size == 0:
+        raise argparse.ArgumentTypeError(
+            f"invalid size value: '{value}', the size must be greater than zero"
+        )
+    return size
+
+
+def get_arguments(argv=None):
+    """
+    Define and parse the command-line arguments.
+
+    Args:
+        argv (list): The arguments to parse, sys.argv[1:] if None.
+    """
     parser = argparse.ArgumentParser(
         description="Send requests to and get the results back from the Testing Farm conveniently.",
         formatter_class=argparse.RawTextHelpFormatter,
@@ -22,6 +61,32 @@ def get_arguments():
         help="Print out additional information for each request.",
     )
 
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the wall and CPU time, HTTP calls and peak memory of each phase of the run at exit.",
+    )
+
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        help="Store the profile of the run to the JSON file, for tracking the trends across the runs.",
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Store the trace of the HTTP calls, xunit parsing and log downloads of the run to the JSON file.\n"
+        "The trace is in the Chrome Trace Event format, open it in https://ui.perfetto.dev.",
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="Write the metrics of the run to the file in the Prometheus text format at exit,\n"
+        "e.g. to the directory of the node_exporter textfile collector.",
+    )
+
     subparsers = parser.add_subparsers(dest="action")
 
     test = subparsers.add_parser(
@@ -114,8 +179,9 @@ def get_arguments():
     test.add_argument(
         "-l",
         "--parallel-limit",
-        type=int,
-        help="Redefine the limit of plans run in parallel.",
+        type=parallel_limit_type,
+        help="Redefine the limit of plans run in parallel.\n"
+        "Use 'auto' to compute the limit for each request from the plan history.",
     )
 
     test.add_argument(
@@ -185,6 +251,30 @@ def get_arguments():
         action="store_true",
         help="Download logs for requested run(s).",
     )
+    report.add_argument(
+        "--store-artifacts",
+        action="store_true",
+        help="Download all the logs of each test case to the compressed, content-addressed artifact store\n"
+        "and link them to the logs directory, implies --download-logs.\n"
+        "The artifacts already in the store are not downloaded again.\n"
+        "The artifacts are stored whole, it cannot be combined with --log-tail or --max-log-size.",
+    )
+    report.add_argument(
+        "--log-tail",
+        type=positive_size_type,
+        metavar="SIZE",
+        help="Download just the last SIZE bytes of each log, e.g. 64K.\n"
+        "The logs are fetched with HTTP Range requests, if the server does not support them\n"
+        "the whole log is streamed and just its end is stored.",
+    )
+    report.add_argument(
+        "--max-log-size",
+        type=positive_size_type,
+        metavar="SIZE",
+        help="Do not download more than SIZE bytes of each log, e.g. 10M.\n"
+        "The larger logs are cut at SIZE bytes, or at their last SIZE bytes with --log-tail.\n"
+        "With --log-tail the servers not supporting the range requests stream the whole log.",
+    )
     report.add_argument(
         "--showarch",
         action="store_true",
@@ -200,12 +290,240 @@ def get_arguments():
         action="store_true",
         help="Build a comparison table for several runs results",
     )
+    report.add_argument(
+        "--latest",
+        action="store_true",
+        help="Include the finished re-runs of the requested tasks and report each plan's latest attempt only.",
+    )
     report.add_argument(
         "-u",
         "--unify-results",
         action="append",
         help="Plan name to be treated as one in plan1=plan2 format, useful for runs comparison in case of renaming.",
     )
+    report.add_argument(
+        "--durations",
+        nargs="?",
+        type=int,
+        const=10,
+        metavar="N",
+        help="Show the N slowest plans and tests for each target instead of the results.\n"
+        "With --compare show the plans and tests with the largest duration changes between the runs.\n"
+        "Default N: '%(const)s'.",
+    )
+    report.add_argument(
+        "--export",
+        metavar="PATH",
+        help="Export the collected results to the Parquet dataset directory, appending to an existing one.\n"
+        "Requires the pyarrow package, install with 'pip install enge[parquet]'.",
+    )
+    report.add_argument(
+        "--parse-workers",
+        type=int,
+        metavar="N",
+        help="Number of the processes to parse the xunit results with.\n"
+        "Default: the number of CPUs.",
+    )
+
+    flaky = subparsers.add_parser(
+        "flaky",
+        help="Rank the tests flipping between PASSED and FAILED over the recent runs.",
+        description="Ingest the results of the requested tasks into the local run history "
+        "and rank the tests by their flip rate over a sliding window of the recent runs.",
+    )
+    flaky.add_argument(
+        "-f",
+        "--file",
+        action="append",
+        help="A filepath is the source for the request_ids, artifact URLs or request URLs to parse. "
+        "Can be provided multiple times -f file1 -f ~/file2",
+    )
+    flaky.add_argument(
+        "-c",
+        "--cmd",
+        action="append",
+        help="Commandline is the source for the request_ids, artifact URLs or request URLs to parse. "
+        "Can be provided multiple times -c id1 -c id2",
+    )
+    flaky.add_argument(
+        "--tag", action="append", help="Query for all task results under a given tag."
+    )
+    flaky.add_argument(
+        "--window",
+        type=int,
+        default=10,
+        help="Number of the recent runs of each test to compute the flip rate from.\n"
+        "Default: '%(default)s'.",
+    )
+    flaky.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Number of the flakiest tests to show.\nDefault: '%(default)s'.",
+    )
+    flaky.add_argument(
+        "-s",
+        "--short",
+        action="store_true",
+        help="Display short test and plan names.",
+    )
+
+    stats = subparsers.add_parser(
+        "stats",
+        help="Compute statistics over the results of the requested tasks.",
+    )
+    stats_subparsers = stats.add_subparsers(dest="stats_command", required=True)
+    # Task sources shared by all the statistics
+    stats_tasks = argparse.ArgumentParser(add_help=False)
+    stats_tasks.add_argument(
+        "-f",
+        "--file",
+        action="append",
+        help="A filepath is the source for the request_ids, artifact URLs or request URLs to parse. "
+        "Can be provided multiple times -f file1 -f ~/file2",
+    )
+    stats_tasks.add_argument(
+        "-c",
+        "--cmd",
+        action="append",
+        help="Commandline is the source for the request_ids, artifact URLs or request URLs to parse. "
+        "Can be provided multiple times -c id1 -c id2",
+    )
+    stats_tasks.add_argument(
+        "--tag", action="append", help="Query for all task results under a given tag."
+    )
+    stats_tasks.add_argument(
+        "--since",
+        type=datetime.date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="Query for the tasks archived on the given date or later.",
+    )
+    stats_tasks.add_argument(
+        "--until",
+        type=datetime.date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="Query for the tasks archived on the given date or earlier.",
+    )
+    latency = stats_subparsers.add_parser(
+        "latency",
+        parents=[stats_tasks],
+        formatter_class=argparse.RawTextHelpFormatter,
+        help="Percentiles of the queue, setup and run time of the requests.",
+    )
+    latency.add_argument(
+        "--by",
+        nargs="+",
+        choices=("compose", "arch", "plan"),
+        default=["compose", "arch", "plan"],
+        help="Group the statistics by the given request properties.\nDefault: '%(default)s'.",
+    )
+    cost = stats_subparsers.add_parser(
+        "cost",
+        parents=[stats_tasks],
+        formatter_class=argparse.RawTextHelpFormatter,
+        help="Machine hours spent by the requests, with the share of the re-runs and errors.",
+    )
+    cost.add_argument(
+        "--by",
+        nargs="+",
+        choices=("tag", "compose", "arch", "plan"),
+        default=["tag", "compose", "arch", "plan"],
+        help="Group the statistics by the given properties, the tag is the BusinessUnit tag of the request.\n"
+        "Default: '%(default)s'.",
+    )
+
+    logs = subparsers.add_parser(
+        "logs",
+        help="Work with the log files downloaded by the report command.",
+    )
+    logs_subparsers = logs.add_subparsers(dest="logs_command", required=True)
+    # Selection of the downloaded logs shared by all the logs commands
+    logs_select = argparse.ArgumentParser(add_help=False)
+    logs_select.add_argument(
+        "--uuid",
+        action="append",
+        help="Use the logs of the given request only. Can be provided multiple times.",
+    )
+    logs_select.add_argument(
+        "--tag",
+        action="append",
+        help="Use the logs of the requests archived under a given tag only.",
+    )
+    logs_select.add_argument(
+        "--target",
+        action="append",
+        help="Use the logs from the given target compose only. Can be provided multiple times.",
+    )
+    logs_select.add_argument(
+        "--plan",
+        help="Use the logs of the plans matching the regular expression only.\n"
+        "The logs are stored under the last part of the plan name.",
+    )
+    logs_select.add_argument(
+        "--workers",
+        type=int,
+        help="Number of the processes to use.\nDefault: the number of CPUs.",
+    )
+    logs_grep = logs_subparsers.add_parser(
+        "grep",
+        parents=[logs_select],
+        formatter_class=argparse.RawTextHelpFormatter,
+        help="Search the downloaded logs for the regular expression.",
+    )
+    logs_grep.add_argument("pattern", help="The regular expression to search for.")
+    logs_grep.add_argument(
+        "-i",
+        "--ignore-case",
+        action="store_true",
+        help="Ignore the case of the pattern and the logs.",
+    )
+    logs_grep.add_argument(
+        "--count",
+        action="store_true",
+        help="Show just the number of the matching lines in each log.",
+    )
+    logs_triage = logs_subparsers.add_parser(
+        "triage",
+        parents=[logs_select],
+        formatter_class=argparse.RawTextHelpFormatter,
+        help="Cluster the logs of the failing tests by the signature of their errors.",
+    )
+    logs_triage.add_argument(
+        "--lines",
+        type=int,
+        default=3,
+        help="Number of the first error lines of each log to build the signature from.\n"
+        "Default: '%(default)s'.",
+    )
+    logs_triage.add_argument(
+        "--show-tests",
+        action="store_true",
+        help="List the test cases of each cluster.",
+    )
+    logs_gc = logs_subparsers.add_parser(
+        "gc",
+        formatter_class=argparse.RawTextHelpFormatter,
+        help="Evict the logs over the age limit and the least recently used logs over the size cap.",
+    )
+    logs_gc.add_argument(
+        "--max-size",
+        type=size_type,
+        metavar="SIZE",
+        help="Size cap of the logs directory, e.g. 5G.\n"
+        "Overrides the max_size from the [logs] section of the configuration.",
+    )
+    logs_gc.add_argument(
+        "--max-age",
+        type=float,
+        metavar="DAYS",
+        help="Evict the logs not used for more than DAYS days.\n"
+        "Overrides the max_age from the [logs] section of the configuration.",
+    )
+    logs_gc.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Just show the logs to evict, do not remove them.",
+    )
 
     rerun = subparsers.add_parser(
         "rerun",
@@ -243,8 +561,51 @@ def get_arguments():
         action="store_true",
         help="Re-run only FAILED state jobs.",
     )
+    rerun.add_argument(
+        "--granularity",
+        choices=["plan", "test"],
+        default="plan",
+        help="Re-run the whole failing plans or just the failing tests in them.\nDefault: '%(default)s'.",
+    )
+    rerun.add_argument(
+        "--auto",
+        action="store_true",
+        help="Watch the re-runs and re-run the requests erroring again,\n"
+        "until everything finishes, the attempt limit is hit or the budget is used up.",
+    )
+    rerun.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Maximum number of re-run attempts with --auto.\nDefault: '%(default)s'.",
+    )
+    rerun.add_argument(
+        "--budget",
+        type=float,
+        help="Machine hours available for the re-runs with --auto, unlimited by default.",
+    )
+    rerun.add_argument(
+        "--backoff",
+        type=int,
+        default=60,
+        help="Seconds to wait before the second attempt with --auto, doubled for each following attempt.\n"
+        "Default: '%(default)s'.",
+    )
+    rerun.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of re-run requests submitted concurrently.\nDefault: '%(default)s'.",
+    )
 
-    return parser.parse_args()
+    args = parser.parse_args(argv)
+    if getattr(args, "store_artifacts", False) and (
+        args.log_tail is not None or args.max_log_size is not None
+    ):
+        report.error(
+            "argument --store-artifacts: not allowed with the argument --log-tail or --max-log-size"
+        )
+    return args
 
 
 args = get_arguments()
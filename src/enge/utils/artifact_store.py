@@ -0,0 +1,205 @@
+"""Content-addressed, compressed store of the downloaded test artifacts."""
+import contextlib
+import gzip
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from enge.utils import http
+from enge.utils.local_store import load_json, save_json
+from enge.utils.metrics import metrics
+
+LOGGER = logging.getLogger(__name__)
+
+GZIP_SUFFIX = ".gz"
+ZSTD_SUFFIX = ".zst"
+COMPRESSED_SUFFIXES = (GZIP_SUFFIX, ZSTD_SUFFIX)
+
+
+@contextlib.contextmanager
+def open_artifact(path):
+    """
+    Get the content of the stored artifact as a bytes-like object.
+
+    The plain files are memory mapped, the compressed ones are decompressed to the memory.
+    """
+    if path.endswith(ZSTD_SUFFIX):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} requires the zstandard package.")
+        with open(path, "rb") as artifact_file:
+            yield zstandard.ZstdDecompressor().stream_reader(artifact_file).read()
+    elif path.endswith(GZIP_SUFFIX):
+        with gzip.open(path, "rb") as artifact_file:
+            yield artifact_file.read()
+    else:
+        with open(path, "rb") as artifact_file:
+            try:
+                data = mmap.mmap(artifact_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                yield b""
+                return
+            with data:
+                yield data
+
+
+class ArtifactStore:
+    """
+    Keep the downloaded artifacts compressed and stored just once, no matter how many runs produced them.
+
+    The artifacts are stored as blobs named by the SHA-256 digest of their content,
+    compressed with zstd if the zstandard package is available and with gzip otherwise:
+    <directory>/blobs/<first two digest characters>/<digest>.zst
+    The index maps the artifact URLs to the digests of their content, the artifacts of
+    the finished requests do not change, so the known URLs are never downloaded again.
+    The blobs are exposed in the logs directory layout through hardlinks, symlinks are used
+    if the logs directory is on another filesystem.
+
+    Attributes:
+        directory (str): Directory of the store.
+        index (dict): Artifact URL to the content digest mapping.
+        suffix (str): Suffix of the newly stored blobs, determines their compression.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.expanduser(directory)
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.index = load_json(self.index_path, default={})
+        self.suffix = ZSTD_SUFFIX if zstandard is not None else GZIP_SUFFIX
+        self.downloaded = 0
+        self.reused = 0
+        self._changed = False
+
+    def blob_path(self, digest):
+        """Get the path to the stored blob, None if the content is not stored."""
+        for suffix in COMPRESSED_SUFFIXES:
+            path = os.path.join(
+                self.directory, "blobs", digest[:2], f"{digest}{suffix}"
+            )
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _compressor(self, raw_file):
+        if self.suffix == ZSTD_SUFFIX:
+            return zstandard.ZstdCompressor().stream_writer(raw_file)
+        return gzip.GzipFile(fileobj=raw_file, mode="wb", mtime=0)
+
+    def fetch(self, url):
+        """
+        Get the artifact into the store, download it only if its URL is not known yet.
+
+        The content is hashed and compressed while it is streamed, so the artifacts
+        are never held in the memory as a whole.
+
+        Returns:
+            str: Path to the stored blob.
+        """
+        digest = self.index.get(url)
+        if digest is not None:
+            blob_path = self.blob_path(digest)
+            if blob_path is not None:
+                self.reused += 1
+                metrics.inc(
+                    "enge_cache_lookups_total", cache="artifacts", outcome="hit"
+                )
+                return blob_path
+        metrics.inc("enge_cache_lookups_total", cache="artifacts", outcome="miss")
+
+        os.makedirs(self.directory, exist_ok=True)
+        hasher = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.directory, prefix=".enge_", suffix=".tmp"
+        )
+        try:
+            with http.get(url, stream=True) as response:
+                response.raise_for_status()
+                with os.fdopen(fd, "wb") as raw_file, self._compressor(
+                    raw_file
+                ) as blob_file:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        hasher.update(chunk)
+                        blob_file.write(chunk)
+                        metrics.inc("enge_log_downloaded_bytes_total", len(chunk))
+            digest = hasher.hexdigest()
+            blob_path = self.blob_path(digest)
+            if blob_path is None:
+                blob_path = os.path.join(
+                    self.directory, "blobs", digest[:2], f"{digest}{self.suffix}"
+                )
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(tmp_path, blob_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        self.index[url] = digest
+        self._changed = True
+        self.downloaded += 1
+        return blob_path
+
+    def link(self, blob_path, link_path):
+        """
+        Expose the stored blob at the given path, the blob suffix is appended to the path.
+
+        Returns:
+            str: Path to the link.
+        """
+        link_path += os.path.splitext(blob_path)[1]
+        os.makedirs(os.path.dirname(link_path), exist_ok=True)
+        if os.path.lexists(link_path):
+            os.unlink(link_path)
+        try:
+            os.link(blob_path, link_path)
+        except OSError:
+            os.symlink(os.path.abspath(blob_path), link_path)
+        return link_path
+
+    def prune(self, keep=(), dry_run=False):
+        """
+        Remove the blobs not linked from any logs directory anymore.
+
+        The hardlinked blobs are detected by their link count, the symlinked ones
+        have to be passed in the keep argument.
+
+        Args:
+            keep (set): Resolved paths to the blobs to keep.
+            dry_run (bool): Just report the blobs to remove, do not remove them.
+
+        Returns:
+            tuple: The number of the removed blobs and the number of the bytes freed.
+        """
+        blobs_directory = os.path.join(self.directory, "blobs")
+        removed_digests = set()
+        freed = 0
+        for root, _, files in os.walk(blobs_directory):
+            for name in files:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                if stat.st_nlink > 1 or os.path.realpath(path) in keep:
+                    continue
+                if not dry_run:
+                    os.unlink(path)
+                removed_digests.add(name.split(".")[0])
+                freed += stat.st_size
+        if removed_digests and not dry_run:
+            self.index = {
+                url: digest
+                for url, digest in self.index.items()
+                if digest not in removed_digests
+            }
+            self._changed = True
+            self.save()
+        return len(removed_digests), freed
+
+    def save(self):
+        if self._changed:
+            save_json(self.index_path, self.index)
+            self._changed = False
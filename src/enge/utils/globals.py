@@ -1,6 +1,15 @@
 """Single place for all global variables"""
+import os
 
 ARTIFACT_MAPPING = {"brew": "redhat-brew-build", "copr": "fedora-copr-build"}
 DEFAULT_CONFIG_PATHS = ("~/.config/enge.ini", "~/.enge.ini")
-TESTING_FARM_ENDPOINT = "https://api.dev.testing-farm.io/v0.1/requests"
-LOG_ARTIFACT_BASE_URL = "http://artifacts.osci.redhat.com/testing-farm"
+# The service URLs can be overridden from the environment, e.g. to point enge to a local stand-in
+TESTING_FARM_ENDPOINT = os.environ.get(
+    "TESTING_FARM_ENDPOINT", "https://api.dev.testing-farm.io/v0.1/requests"
+)
+LOG_ARTIFACT_BASE_URL = os.environ.get(
+    "LOG_ARTIFACT_BASE_URL", "http://artifacts.osci.redhat.com/testing-farm"
+)
+COPR_URL = os.environ.get("COPR_URL", "https://copr.fedorainfracloud.org")
+LOGS_BASE_DIRECTORY = "/var/tmp/enge/logs"
+LOGS_MANIFEST = "results.json"
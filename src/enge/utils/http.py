@@ -0,0 +1,55 @@
+"""Instrumented HTTP calls, the enge modules reach the web services through here."""
+import time
+import urllib.parse
+
+import requests
+
+from enge.utils.metrics import metrics
+from enge.utils.profiler import profiler
+from enge.utils.tracer import tracer
+
+
+def response_size(response, stream=False):
+    """
+    Get the number of the bytes received in the response.
+
+    The body of a streamed response is not read yet, its declared length is used instead.
+    """
+    if response is None:
+        return 0
+    if stream:
+        return int(response.headers.get("Content-Length") or 0)
+    return len(response.content)
+
+
+def request(method, url, **kwargs):
+    """
+    Make the HTTP call with the requests package and record it in the run profile, trace and metrics.
+
+    Accepts the same keyword arguments as the requests functions.
+    """
+    host = urllib.parse.urlsplit(url).netloc
+    with tracer.span(f"{method} {host}", "http", method=method, url=url) as span:
+        response = None
+        started = time.perf_counter()
+        try:
+            response = getattr(requests, method.lower())(url, **kwargs)
+            return response
+        finally:
+            metrics.observe(
+                "enge_http_request_duration_seconds",
+                time.perf_counter() - started,
+                host=host,
+            )
+            size = response_size(response, kwargs.get("stream", False))
+            profiler.record_http(size)
+            span["status"] = response.status_code if response is not None else None
+            span["bytes"] = size
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,188 @@
+"""Lineage of the original requests and their re-runs."""
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from enge.utils.local_store import load_json, save_json
+from enge.utils.request_store import FINISHED_STATES, request_store
+
+LOGGER = logging.getLogger(__name__)
+
+# The lineages with no re-run submitted for this long are forgotten
+LINEAGE_RETENTION = timedelta(days=90)
+
+
+class RerunLineage:
+    """
+    Keep track of the re-runs submitted for the original requests.
+
+    The re-runs seen finished are marked, so their state is not fetched again.
+    The whole lineage of a request is forgotten once no re-run of it was submitted
+    within the retention.
+    The lineage is stored as a JSON document in the following format:
+    {
+        "<rerun_uuid>": {
+            "parent": "<uuid of the request this one re-runs>",
+            "root": "<uuid of the very first request>",
+            "attempt": 1,
+            "plans": ["/plans/a", "/plans/b"],
+            "arch": "x86_64",
+            "compose": "CentOS-Stream-9",
+            "submitted": 1711360000,
+            "finished": true,
+        },
+    }
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reruns = load_json(path, default={})
+        self._changed = False
+
+    def record(self, rerun_uuid, parent_uuid, plans, arch=None, compose=None):
+        parent = self.reruns.get(parent_uuid, {})
+        self.reruns[rerun_uuid] = {
+            "parent": parent_uuid,
+            "root": parent.get("root", parent_uuid),
+            "attempt": parent.get("attempt", 0) + 1,
+            "plans": plans,
+            "arch": arch,
+            "compose": compose,
+            "submitted": int(time.time()),
+        }
+        self._changed = True
+
+    def prune(self):
+        """Forget the lineages, whose latest re-run was submitted before the retention."""
+        latest = {}
+        for entry in self.reruns.values():
+            latest[entry["root"]] = max(
+                latest.get(entry["root"], 0), entry.get("submitted", 0)
+            )
+        horizon = time.time() - LINEAGE_RETENTION.total_seconds()
+        expired = {root for root, submitted in latest.items() if submitted < horizon}
+        if expired:
+            LOGGER.debug(
+                f"Forgetting the re-runs of {len(expired)} expired request(s)."
+            )
+            self.reruns = {
+                rerun_uuid: entry
+                for rerun_uuid, entry in self.reruns.items()
+                if entry["root"] not in expired
+            }
+            self._changed = True
+
+    def save(self):
+        self.prune()
+        if self._changed:
+            save_json(self.path, self.reruns)
+            self._changed = False
+
+    def root(self, request_uuid):
+        return self.reruns.get(request_uuid, {}).get("root", request_uuid)
+
+    def attempt(self, request_uuid):
+        return self.reruns.get(request_uuid, {}).get("attempt", 0)
+
+    def covers(self, rerun_uuid, plan_name, arch=None, compose=None):
+        """
+        Check if the re-run request re-runs the given plan in the given environment.
+
+        The re-runs recorded without the environment cover the plan in any environment.
+        """
+        entry = self.reruns[rerun_uuid]
+        for key, value in (("arch", arch), ("compose", compose)):
+            if value is not None and entry.get(key) not in (None, value):
+                return False
+        plans = entry["plans"]
+        return plan_name in plans or any(
+            re.search(plan, plan_name) for plan in plans if plan
+        )
+
+    def descendants(self, request_uuids):
+        """Get all re-runs of the given requests, including the re-runs of the re-runs."""
+        roots = {self.root(request_uuid) for request_uuid in request_uuids}
+        return [
+            rerun_uuid
+            for rerun_uuid, entry in self.reruns.items()
+            if entry["root"] in roots and rerun_uuid not in request_uuids
+        ]
+
+    def split_descendants(self, request_uuids, workers=8):
+        """
+        Get the finished and still pending re-runs of the given requests.
+
+        Only the state of the re-runs not known to be finished is fetched,
+        the newly finished ones are marked in the saved lineage.
+
+        Returns:
+            tuple: A list of the finished and a list of the pending re-run UUIDs.
+        """
+        descendants = self.descendants(request_uuids)
+        unknown = [
+            rerun_uuid
+            for rerun_uuid in descendants
+            if not self.reruns[rerun_uuid].get("finished")
+            and request_store.get_finished(rerun_uuid) is None
+        ]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            states = list(
+                executor.map(
+                    lambda rerun_uuid: request_store.get(rerun_uuid)["state"],
+                    unknown,
+                )
+            )
+        pending = [
+            rerun_uuid
+            for rerun_uuid, state in zip(unknown, states)
+            if state not in FINISHED_STATES
+        ]
+        pending_uuids = set(pending)
+        finished = [
+            rerun_uuid for rerun_uuid in descendants if rerun_uuid not in pending_uuids
+        ]
+        for rerun_uuid in finished:
+            if not self.reruns[rerun_uuid].get("finished"):
+                self.reruns[rerun_uuid]["finished"] = True
+                self._changed = True
+        self.save()
+        return finished, pending
+
+    def latest_attempts(self, parsed_dict):
+        """
+        Keep each plan only in the results of its latest attempt.
+
+        Plans are matched by their name, architecture and compose within the lineage
+        of the very first request.
+
+        Args:
+            parsed_dict (dict): Results as returned by the parse_request_xunit.
+
+        Returns:
+            dict: Results with the plans superseded by a later attempt removed.
+        """
+
+        def _plan_key(request_uuid, suite):
+            return (self.root(request_uuid), suite.name, suite.arch, suite.compose)
+
+        latest = {}
+        for request_uuid, details in parsed_dict.items():
+            for suite in details.testsuites:
+                key = _plan_key(request_uuid, suite)
+                if key not in latest or self.attempt(request_uuid) > self.attempt(
+                    latest[key]
+                ):
+                    latest[key] = request_uuid
+
+        merged = {}
+        for request_uuid, details in parsed_dict.items():
+            suites = [
+                suite
+                for suite in details.testsuites
+                if latest[_plan_key(request_uuid, suite)] == request_uuid
+            ]
+            if suites or not details.testsuites:
+                merged[request_uuid] = details.with_testsuites(suites)
+        return merged
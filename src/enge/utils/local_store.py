@@ -0,0 +1,47 @@
+"""Helpers to persist small pieces of local state between enge runs."""
+import json
+import logging
+import os
+import tempfile
+
+LOGGER = logging.getLogger(__name__)
+
+
+def load_json(path, default=None):
+    """
+    Load a JSON document stored at the given path.
+
+    A missing or corrupted file is not an error, the local state is only
+    an optimization, so the default value is returned instead.
+    """
+    path = os.path.expanduser(path)
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError) as err:
+        LOGGER.debug(f"Unable to load the local state from {path}: {err}")
+        return default
+
+
+def save_json(path, data):
+    """
+    Atomically store the data as a JSON document at the given path.
+
+    The data is written to a temporary file in the same directory first
+    and moved over the original file afterwards, so concurrent enge runs
+    never read a partially written file.
+    """
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".enge_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(data, tmp_file)
+        os.replace(tmp_path, path)
+    except OSError as err:
+        LOGGER.debug(f"Unable to store the local state to {path}: {err}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
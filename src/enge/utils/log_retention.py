@@ -0,0 +1,137 @@
+"""Retention of the downloaded logs and the cached files within the configured size and age limits."""
+import logging
+import os
+import shutil
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+# The logs of each request are stored in the <request uuid>_logs directory
+REQUEST_LOGS_SUFFIX = "_logs"
+
+
+def mark_used(request_path):
+    """Record the use of the request logs or a cached file, the least recently used are evicted first."""
+    try:
+        os.utime(request_path)
+    except OSError as err:
+        LOGGER.debug(f"Unable to mark {request_path} as used: {err}")
+
+
+def _directory_size(path):
+    """
+    Get the apparent size of the files in the directory.
+
+    The artifacts hardlinked from the artifact store count to each request linking them,
+    the symlinks count just for the link itself.
+    """
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return size
+
+
+def request_logs(logs_directory):
+    """
+    Get the logs directories of the requests, the least recently used first.
+
+    Returns:
+        list: List of (path, last used timestamp, size in bytes) tuples.
+    """
+    if not os.path.isdir(logs_directory):
+        return []
+    entries = []
+    for name in os.listdir(logs_directory):
+        path = os.path.join(logs_directory, name)
+        if not name.endswith(REQUEST_LOGS_SUFFIX) or not os.path.isdir(path):
+            continue
+        entries.append((path, os.stat(path).st_mtime, _directory_size(path)))
+    return sorted(entries, key=lambda entry: entry[1])
+
+
+def cached_files(cache_directory):
+    """
+    Get the files in the cache directory, the least recently used first.
+
+    Returns:
+        list: List of (path, last used timestamp, size in bytes) tuples.
+    """
+    if not os.path.isdir(cache_directory):
+        return []
+    entries = []
+    for entry in os.scandir(cache_directory):
+        if entry.is_file(follow_symlinks=False):
+            stat = entry.stat(follow_symlinks=False)
+            entries.append((entry.path, stat.st_mtime, stat.st_size))
+    return sorted(entries, key=lambda entry: entry[1])
+
+
+def evict_logs(logs_directory, max_size=None, max_age=None, dry_run=False):
+    """
+    Evict the logs of the requests not used for longer than max_age days, then evict
+    the least recently used logs until the directory fits into max_size bytes.
+
+    Args:
+        logs_directory (str): Directory with the downloaded logs.
+        max_size (int): Size cap of the directory in bytes, None for no cap.
+        max_age (float): Age limit in days, None for no limit.
+        dry_run (bool): Just report the logs to evict, do not remove them.
+
+    Returns:
+        tuple: A list of the (path, last used timestamp, size) tuples of the evicted logs
+            and the size of the logs kept.
+    """
+    return _evict(request_logs(logs_directory), max_size, max_age, dry_run)
+
+
+def evict_cache(cache_directory, max_size=None, max_age=None):
+    """
+    Evict the cached files the same way as the logs, see evict_logs.
+
+    Returns:
+        tuple: A list of the (path, last used timestamp, size) tuples of the evicted files
+            and the size of the files kept.
+    """
+    return _evict(cached_files(cache_directory), max_size, max_age)
+
+
+def _evict(entries, max_size=None, max_age=None, dry_run=False):
+    total_size = sum(size for _, _, size in entries)
+    oldest_allowed = time.time() - max_age * 86400 if max_age is not None else None
+
+    evicted = []
+    for entry in entries:
+        path, last_used, size = entry
+        too_old = oldest_allowed is not None and last_used < oldest_allowed
+        too_large = max_size is not None and total_size > max_size
+        if not too_old and not too_large:
+            # The entries are ordered by their last use, the rest is newer
+            break
+        if not dry_run:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError as err:
+                LOGGER.warning(f"Unable to evict {path}: {err}")
+                continue
+        LOGGER.debug(f"Evicted {path}.")
+        evicted.append(entry)
+        total_size -= size
+    return evicted, total_size
+
+
+def symlinked_targets(logs_directory):
+    """Get the absolute paths the symlinks in the logs directory point to."""
+    targets = set()
+    for root, _, files in os.walk(logs_directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                targets.add(os.path.realpath(path))
+    return targets
@@ -0,0 +1,236 @@
+"""Prometheus metrics of an enge run, written for the node_exporter textfile collector."""
+import atexit
+import bisect
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the HTTP latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Name to the (type, help) mapping of the exported metrics
+METRICS = {
+    "enge_requests_dispatched_total": (
+        "counter",
+        "Testing Farm requests dispatched by the run, re-runs included.",
+    ),
+    "enge_reruns_submitted_total": (
+        "counter",
+        "Re-run requests submitted by the run.",
+    ),
+    "enge_request_results_total": (
+        "counter",
+        "Reported Testing Farm requests by their state and overall result.",
+    ),
+    "enge_http_request_duration_seconds": (
+        "histogram",
+        "Latency of the HTTP calls by the host.",
+    ),
+    "enge_cache_lookups_total": (
+        "counter",
+        "Lookups in the local caches by the cache and the outcome.",
+    ),
+    "enge_cache_hit_ratio": (
+        "gauge",
+        "Ratio of the local cache lookups served without the network.",
+    ),
+    "enge_log_downloaded_bytes_total": (
+        "counter",
+        "Bytes of the test logs and artifacts downloaded.",
+    ),
+    "enge_wait_seconds_total": (
+        "counter",
+        "Time spent waiting for the requests to finish.",
+    ),
+    "enge_run_duration_seconds": (
+        "gauge",
+        "Wall time of the run.",
+    ),
+    "enge_last_run_timestamp_seconds": (
+        "gauge",
+        "Time the run finished at.",
+    ),
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    """
+    Cumulative histogram of the observed values.
+
+    Attributes:
+        counts (list): Number of the observations per bucket, the last one is +Inf.
+        sum (float): Sum of the observed values.
+    """
+
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+
+
+class Metrics:
+    """
+    Collect the counters, gauges and histograms of the run and write them in the Prometheus text format.
+
+    The samples are labelled with the enge command, so the files of several commands
+    can be collected side by side. The file is written at the exit of the interpreter,
+    so it covers the runs ending with sys.exit as well.
+
+    Attributes:
+        path (str): Path to write the metrics to, None if the metrics are not collected.
+        command (str): The enge command of the run.
+        samples (dict): (metric name, sorted label pairs) to the value or Histogram mapping.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.command = None
+        self.samples = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def enable(self, path, command):
+        self.path = path
+        self.command = command
+        self._started = time.time()
+        atexit.register(self.save)
+
+    def _key(self, name, labels):
+        return name, tuple(sorted({"command": self.command, **labels}.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Increase the counter by the value."""
+        if self.path is None:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self.samples[key] = self.samples.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Set the gauge to the value."""
+        if self.path is None:
+            return
+        with self._lock:
+            self.samples[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """Add the value to the histogram."""
+        if self.path is None:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self.samples.setdefault(key, Histogram()).observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """Add the time spent in the block to the counter, can be used as a decorator as well."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inc(name, time.perf_counter() - started, **labels)
+
+    def _cache_ratios(self):
+        """Set the hit ratio gauges from the cache lookup counters."""
+        lookups = {}
+        for (name, labels), value in list(self.samples.items()):
+            if name != "enge_cache_lookups_total":
+                continue
+            labels = dict(labels)
+            hits, total = lookups.get(labels["cache"], (0, 0))
+            if labels["outcome"] == "hit":
+                hits += value
+            lookups[labels["cache"]] = (hits, total + value)
+        for cache, (hits, total) in lookups.items():
+            self.set("enge_cache_hit_ratio", hits / total, cache=cache)
+
+    def render(self):
+        """Get the metrics in the Prometheus text exposition format."""
+        self.set("enge_run_duration_seconds", time.time() - self._started)
+        self.set("enge_last_run_timestamp_seconds", time.time())
+        self._cache_ratios()
+
+        lines = []
+        with self._lock:
+            samples = sorted(self.samples.items(), key=lambda sample: sample[0])
+        for metric_name, (metric_type, metric_help) in METRICS.items():
+            metric_samples = [
+                (labels, value)
+                for (name, labels), value in samples
+                if name == metric_name
+            ]
+            if not metric_samples:
+                continue
+            lines.append(f"# HELP {metric_name} {metric_help}")
+            lines.append(f"# TYPE {metric_name} {metric_type}")
+            for labels, value in metric_samples:
+                if metric_type != "histogram":
+                    lines.append(f"{metric_name}{_format_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), value.counts):
+                    cumulative += count
+                    bucket_labels = _format_labels(labels + (("le", bound),))
+                    lines.append(f"{metric_name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{metric_name}_sum{_format_labels(labels)} {value.sum}")
+                lines.append(
+                    f"{metric_name}_count{_format_labels(labels)} {cumulative}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def save(self):
+        """
+        Atomically write the metrics to the file.
+
+        The textfile collector may read the file at any time, so the metrics are written
+        to a temporary file in the same directory first and moved over the file afterwards.
+        """
+        if self.path is None:
+            return
+        path = os.path.expanduser(self.path)
+        directory = os.path.dirname(path) or "."
+        content = self.render()
+        self.path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=directory, prefix=".enge_", suffix=".tmp"
+            )
+        except OSError as err:
+            LOGGER.warning(f"Unable to write the metrics to {path}: {err}")
+            return
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                tmp_file.write(content)
+            # The temporary file is private, the collector needs to read the metrics
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            LOGGER.warning(f"Unable to write the metrics to {path}: {err}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        LOGGER.debug(f"The metrics stored to {path}")
+
+
+metrics = Metrics()
@@ -4,12 +4,19 @@ import logging
 import os
 import sys
 
+from enge.utils import parse_size
 from enge.utils.arg_parser import args
 from enge.utils.config_parser import load_config
-from enge.utils.globals import DEFAULT_CONFIG_PATHS
+from enge.utils.globals import DEFAULT_CONFIG_PATHS, LOGS_BASE_DIRECTORY
+from enge.utils.metrics import metrics
+from enge.utils.profiler import profiler
+from enge.utils.tracer import tracer
 
 logger = logging.getLogger(__name__)
 
+# Days after which the cached requests and results not used by the stats commands are evicted
+STATS_CACHE_MAX_AGE = 180
+
 
 class ParsedOpts:
     def __init__(self, cli_args=None):
@@ -25,11 +32,63 @@ class ParsedOpts:
         self.archive_tasks_default = os.path.expanduser(
             self.common.get("archive_tasks_default") or "~/.enge/jobs_archive/"
         )
+        self.cache_directory = os.path.expanduser(
+            self.common.get("cache_directory") or "~/.enge/cache/"
+        )
+        self.artifact_store_directory = os.path.expanduser(
+            self.common.get("artifact_store") or "~/.enge/artifacts/"
+        )
+        self.rerun_lineage_file = os.path.expanduser(
+            self.common.get("rerun_lineage") or "~/.enge/rerun_lineage.json"
+        )
+        self.plan_history_file = os.path.expanduser(
+            self.common.get("plan_history") or "~/.enge/plan_history.json"
+        )
+        self.flaky_history_file = os.path.expanduser(
+            self.common.get("flaky_history") or "~/.enge/flaky_history.json"
+        )
+
+        # The section is missing from the configs created by the older versions
+        logs_options = self.options.get("logs", {})
+        self.logs_directory = os.path.expanduser(
+            logs_options.get("directory") or LOGS_BASE_DIRECTORY
+        )
+        try:
+            self.logs_max_size = (
+                parse_size(logs_options["max_size"])
+                if logs_options.get("max_size")
+                else None
+            )
+            self.logs_max_age = (
+                float(logs_options["max_age"]) if logs_options.get("max_age") else None
+            )
+        except ValueError as err:
+            logger.critical(
+                f"Invalid value in the logs section of the configuration: {err}"
+            )
+            sys.exit(99)
+
+        stats_options = self.options.get("stats", {})
+        try:
+            self.stats_cache_max_size = (
+                parse_size(stats_options["cache_max_size"])
+                if stats_options.get("cache_max_size")
+                else None
+            )
+            self.stats_cache_max_age = float(
+                stats_options.get("cache_max_age") or STATS_CACHE_MAX_AGE
+            )
+        except ValueError as err:
+            logger.critical(
+                f"Invalid value in the stats section of the configuration: {err}"
+            )
+            sys.exit(99)
 
         if self.cli_args.action == "test":
             self.parallel_limit = (
                 self.cli_args.parallel_limit or self.tests.get("parallel_limit") or None
             )
+            self.parallel_limit_max = int(self.tests.get("parallel_limit_max") or 20)
             self.copr_reference = (
                 (self.cli_args.copr.ref if self.cli_args.copr else None)
                 or self.copr_api.get("build_reference")
@@ -110,4 +169,22 @@ class ParsedOpts:
         raise AttributeError(f"'ParsedOpts' object has no attribute '{item}'")
 
 
-parsed_opts = ParsedOpts(cli_args=args)
+command = " ".join(
+    filter(
+        None,
+        (
+            args.action,
+            getattr(args, "stats_command", None),
+            getattr(args, "logs_command", None),
+        ),
+    )
+)
+if args.trace:
+    tracer.enable(args.trace)
+if args.metrics_file:
+    metrics.enable(args.metrics_file, command)
+if args.profile or args.profile_json:
+    profiler.enable(command, print_summary=args.profile, json_path=args.profile_json)
+
+with profiler.phase("config load"):
+    parsed_opts = ParsedOpts(cli_args=args)
@@ -0,0 +1,104 @@
+"""Historical plan sizes and durations used to size the parallel-limit."""
+import logging
+import math
+import re
+import time
+
+from enge.utils.local_store import load_json, save_json
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PlanHistory:
+    """
+    Keep track of the number of tests and the durations of the plans reported in the past.
+
+    The history is stored as a JSON document in the following format:
+    {
+        "/plans/tier0/basic": {
+            "tests": 12,
+            "duration": 754.0,
+            "updated": 1711360000,
+        },
+    }
+
+    Attributes:
+        path (str): Path to the history file.
+        plans (dict): Plan name to the recorded plan statistics mapping.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.plans = load_json(path, default={})
+        self._changed = False
+
+    def record(self, plan, tests=None, duration=None):
+        """Record the latest known test count and duration of the plan."""
+        if not plan or plan == "pipeline":
+            return
+        entry = self.plans.setdefault(plan, {})
+        if tests:
+            entry["tests"] = int(tests)
+        if duration:
+            entry["duration"] = float(duration)
+        entry["updated"] = int(time.time())
+        self._changed = True
+
+    def save(self):
+        if self._changed:
+            save_json(self.path, self.plans)
+            self._changed = False
+
+    def matching_plans(self, plan_name):
+        """
+        Get the recorded plans, that would be selected by the requested plan name.
+
+        The Testing Farm treats the plan name as a regular expression,
+        so does the lookup, falling back to the prefix match for invalid patterns.
+        """
+        try:
+            pattern = re.compile(plan_name or "")
+            return {k: v for k, v in self.plans.items() if pattern.search(k)}
+        except re.error:
+            return {k: v for k, v in self.plans.items() if k.startswith(plan_name)}
+
+    def parallel_limit(self, plan_name, maximum):
+        """
+        Compute the parallel-limit for the requested plan.
+
+        Running more plans in parallel than the total run time divided by the longest
+        plan does not make the job finish sooner, as the longest plan is always the critical path.
+        Plans without a recorded duration are estimated from their test count
+        multiplied by the average test duration.
+
+        Args:
+            plan_name (str): The requested plan name (regular expression).
+            maximum (int): Upper cap for the limit.
+
+        Returns:
+            int: The limit, maximum if there is no history for the plan.
+        """
+        plans = self.matching_plans(plan_name)
+        if not plans:
+            LOGGER.debug(
+                f"No history for {plan_name}, using the parallel-limit maximum {maximum}."
+            )
+            return maximum
+
+        timed = [p for p in plans.values() if p.get("duration") and p.get("tests")]
+        test_duration = (
+            sum(p["duration"] for p in timed) / sum(p["tests"] for p in timed)
+            if timed
+            else 1.0
+        )
+        durations = [
+            p.get("duration") or p.get("tests", 1) * test_duration
+            for p in plans.values()
+        ]
+        slots = math.ceil(sum(durations) / max(durations))
+        limit = max(1, min(maximum, len(plans), slots))
+        LOGGER.debug(
+            f"Computed parallel-limit {limit} for {plan_name} "
+            f"from {len(plans)} plan(s) with {sum(durations):.0f}s of the total run time."
+        )
+        return limit
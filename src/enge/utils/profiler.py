@@ -0,0 +1,200 @@
+"""Per-phase timing, HTTP traffic and memory profile of an enge run."""
+import atexit
+import contextlib
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+
+from prettytable import PrettyTable
+
+from enge.utils import format_size
+from enge.utils.local_store import save_json
+from enge.utils.tracer import tracer
+
+LOGGER = logging.getLogger(__name__)
+
+# The time not spent in any of the phases, e.g. the imports and argument checks
+OTHER_PHASE = "other"
+
+
+class PhaseStats:
+    """
+    Resources used by one phase of the run, summed over all its entries.
+
+    Attributes:
+        entries (int): Number of times the phase was entered.
+        wall (float): Wall time in seconds.
+        cpu (float): CPU time of the process in seconds.
+        http_calls (int): Number of the HTTP calls made.
+        http_bytes (int): Number of the bytes received in the HTTP responses.
+        peak_memory (int): Peak of the memory traced by tracemalloc in bytes.
+    """
+
+    __slots__ = ("entries", "wall", "cpu", "http_calls", "http_bytes", "peak_memory")
+
+    def __init__(self):
+        self.entries = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.http_calls = 0
+        self.http_bytes = 0
+        self.peak_memory = 0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Profiler:
+    """
+    Account the wall time, CPU time, HTTP traffic and peak memory of the run to its phases.
+
+    The phases nest, the time spent in a nested phase is accounted to the nested phase only,
+    so the times of all the phases add up to the wall time of the run.
+    Only the phases entered from the main thread are tracked, the work of the other threads
+    is accounted to the phase of the main thread, that waits for them.
+    The profile is printed and stored at the exit of the interpreter, so it covers the runs
+    ending with sys.exit as well.
+
+    Attributes:
+        enabled (bool): Whether the run is being profiled, the phases are no-op otherwise.
+        command (str): The profiled subcommand.
+        phases (dict): Phase name to the PhaseStats mapping, in the order of the first entry.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.command = None
+        self.phases = {}
+        self.print_summary = False
+        self.json_path = None
+        self._stack = []
+        self._lock = threading.Lock()
+
+    def enable(self, command, print_summary=True, json_path=None):
+        self.enabled = True
+        self.command = command
+        self.print_summary = print_summary
+        self.json_path = json_path
+        tracemalloc.start()
+        # Each frame of the stack holds the phase name and the times it was last accounted at
+        self._stack = [[OTHER_PHASE, time.perf_counter(), time.process_time()]]
+        atexit.register(self.finish)
+
+    def _account(self, frame, wall, cpu):
+        stats = self.phases.setdefault(frame[0], PhaseStats())
+        stats.wall += wall - frame[1]
+        stats.cpu += cpu - frame[2]
+        stats.peak_memory = max(stats.peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        frame[1], frame[2] = wall, cpu
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Account the resources used within the block, can be used as a decorator as well.
+
+        The phase is recorded as a span of the trace too, if the run is traced.
+        """
+        with tracer.span(name, "phase"):
+            in_main_thread = threading.current_thread() == threading.main_thread()
+            if not self.enabled or not in_main_thread:
+                yield
+                return
+            with self._lock:
+                wall, cpu = time.perf_counter(), time.process_time()
+                self._account(self._stack[-1], wall, cpu)
+                self._stack.append([name, wall, cpu])
+                self.phases.setdefault(name, PhaseStats()).entries += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    wall, cpu = time.perf_counter(), time.process_time()
+                    self._account(self._stack.pop(), wall, cpu)
+                    self._stack[-1][1:] = [wall, cpu]
+
+    def record_http(self, size):
+        """Account an HTTP call receiving the size bytes to the current phase."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.phases.setdefault(self._stack[-1][0], PhaseStats())
+            stats.http_calls += 1
+            stats.http_bytes += size
+
+    def to_dict(self):
+        return {
+            "command": self.command,
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+        }
+
+    def build_table(self):
+        profile_table = PrettyTable()
+        profile_table.field_names = [
+            "Phase",
+            "Entries",
+            "Wall",
+            "CPU",
+            "HTTP Calls",
+            "HTTP Bytes",
+            "Peak Memory",
+        ]
+        total = PhaseStats()
+        # The time outside of the phases goes last
+        phases = sorted(self.phases.items(), key=lambda phase: phase[0] == OTHER_PHASE)
+        for index, (name, stats) in enumerate(phases):
+            profile_table.add_row(
+                (
+                    name,
+                    stats.entries if name != OTHER_PHASE else "",
+                    f"{stats.wall:.3f}s",
+                    f"{stats.cpu:.3f}s",
+                    stats.http_calls,
+                    format_size(stats.http_bytes),
+                    format_size(stats.peak_memory),
+                ),
+                divider=index == len(phases) - 1,
+            )
+            total.wall += stats.wall
+            total.cpu += stats.cpu
+            total.http_calls += stats.http_calls
+            total.http_bytes += stats.http_bytes
+            total.peak_memory = max(total.peak_memory, stats.peak_memory)
+        profile_table.add_row(
+            (
+                "Total",
+                "",
+                f"{total.wall:.3f}s",
+                f"{total.cpu:.3f}s",
+                total.http_calls,
+                format_size(total.http_bytes),
+                format_size(total.peak_memory),
+            )
+        )
+        profile_table.align = "r"
+        profile_table.align["Phase"] = "l"
+        return profile_table
+
+    def finish(self):
+        """Close the phases still open and print or store the profile."""
+        if not self.enabled:
+            return
+        with self._lock:
+            wall, cpu = time.perf_counter(), time.process_time()
+            while self._stack:
+                self._account(self._stack.pop(), wall, cpu)
+        self.enabled = False
+        tracemalloc.stop()
+
+        if self.print_summary:
+            print(f"\nProfile of the enge {self.command} run:", file=sys.stderr)
+            print(self.build_table(), file=sys.stderr)
+        if self.json_path:
+            save_json(self.json_path, self.to_dict())
+            LOGGER.debug(f"The profile stored to {self.json_path}")
+
+
+profiler = Profiler()
@@ -0,0 +1,83 @@
+"""In-process store of the Testing Farm request documents."""
+import logging
+import os
+import threading
+
+from enge.utils import http
+from enge.utils.globals import TESTING_FARM_ENDPOINT
+from enge.utils.local_store import load_json, save_json
+from enge.utils.log_retention import mark_used
+from enge.utils.metrics import metrics
+
+LOGGER = logging.getLogger(__name__)
+
+# States of the request, that are not going to change anymore
+FINISHED_STATES = ("complete", "error", "canceled")
+
+
+class RequestStore:
+    """
+    Keep the request documents fetched from the Testing Farm API during the run.
+
+    Any module, that needs the details of a request, should look them up here first,
+    so each request is fetched from the API just once per run.
+    The finished requests do not change anymore, their documents can also be persisted
+    in the directory, so they are not fetched again by the following runs.
+    The persistence is enabled just by the commands bounding the directory size.
+
+    Attributes:
+        directory (str): Directory to persist the finished request documents in, None to disable.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def _path(self, request_uuid):
+        return os.path.join(self.directory, f"{request_uuid}.json")
+
+    def put(self, request_json):
+        with self._lock:
+            self.requests[request_json["id"]] = request_json
+        if (
+            self.directory
+            and request_json["state"] in FINISHED_STATES
+            and not os.path.exists(self._path(request_json["id"]))
+        ):
+            save_json(self._path(request_json["id"]), request_json)
+
+    def _get_stored(self, request_uuid):
+        with self._lock:
+            request_json = self.requests.get(request_uuid)
+        if request_json is None and self.directory:
+            request_json = load_json(self._path(request_uuid))
+            if request_json is not None:
+                mark_used(self._path(request_uuid))
+                with self._lock:
+                    self.requests[request_uuid] = request_json
+        return request_json
+
+    def get_finished(self, request_uuid):
+        """Get the stored request document, only if the request has already finished."""
+        request_json = self._get_stored(request_uuid)
+        if request_json and request_json["state"] in FINISHED_STATES:
+            metrics.inc("enge_cache_lookups_total", cache="requests", outcome="hit")
+            return request_json
+        metrics.inc("enge_cache_lookups_total", cache="requests", outcome="miss")
+        return None
+
+    def get(self, request_uuid):
+        """Get the request document, fetch it from the API if not stored yet."""
+        request_json = self._get_stored(request_uuid)
+        outcome = "hit" if request_json is not None else "miss"
+        metrics.inc("enge_cache_lookups_total", cache="requests", outcome=outcome)
+        if request_json is None:
+            LOGGER.debug(f"Fetching the request {request_uuid} from the API.")
+            response = http.get(os.path.join(TESTING_FARM_ENDPOINT, request_uuid))
+            request_json = response.json()
+            self.put(request_json)
+        return request_json
+
+
+request_store = RequestStore()
@@ -0,0 +1,248 @@
+"""Compact in-memory model of the parsed request results."""
+import enum
+import logging
+import sys
+
+from enge.utils import parse_duration
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Result(enum.StrEnum):
+    """
+    Result of a plan or a test case as reported in the xunit.
+
+    The members compare equal to the upper-cased result strings,
+    each record keeps just a reference to the shared member.
+    The results unknown to enge, e.g. NOT_APPLICABLE, are kept as reported
+    in the pseudo-members created on their first use.
+    """
+
+    PASSED = "PASSED"
+    INFO = "INFO"
+    SKIPPED = "SKIPPED"
+    WARN = "WARN"
+    FAILED = "FAILED"
+    ERROR = "ERROR"
+    PENDING = "PENDING"
+    UNDEFINED = "UNDEFINED"
+
+    @classmethod
+    def _missing_(cls, value):
+        if not isinstance(value, str):
+            LOGGER.debug(f"Unknown result {value}, treating as {cls.UNDEFINED}.")
+            return cls.UNDEFINED
+        name = value.upper()
+        if name not in cls._value2member_map_:
+            LOGGER.debug(f"Unknown result {value}, keeping it as {name}.")
+            member = str.__new__(cls, name)
+            member._name_ = name
+            member._value_ = name
+            cls._value2member_map_[name] = member
+        return cls._value2member_map_[name]
+
+
+def intern(value):
+    """Intern the string, so the names repeated across the requests are stored just once."""
+    return sys.intern(value) if value is not None else None
+
+
+class TestcaseResult:
+    """
+    Result of a single test case.
+
+    Attributes:
+        name (str): Interned test case name.
+        result (Result): The test case result.
+        duration (float): Duration in seconds, None if not reported.
+    """
+
+    __slots__ = ("name", "result", "duration")
+
+    def __init__(self, name, result, duration=None):
+        self.name = intern(name)
+        self.result = Result(result)
+        self.duration = duration
+
+    @classmethod
+    def from_element(cls, elem):
+        """Create the test case result from the xunit testcase element."""
+        return cls(
+            elem.get("name"),
+            elem.get("result"),
+            parse_duration(elem.get("time")),
+        )
+
+    def __repr__(self):
+        return f"TestcaseResult({self.name!r}, {self.result})"
+
+
+class TestsuiteResult:
+    """
+    Result of a plan run in one environment.
+
+    Attributes:
+        name (str): Interned plan name.
+        arch (str): Interned architecture the plan ran on.
+        compose (str): Interned compose the plan ran on.
+        result (Result): The plan result.
+        tests (int): Number of the tests reported for the plan, None if not reported.
+        duration (float): Duration in seconds, None if not reported.
+        testcases (list): Results of the test cases.
+    """
+
+    __slots__ = ("name", "arch", "compose", "result", "tests", "duration", "testcases")
+
+    def __init__(
+        self,
+        name,
+        arch,
+        compose,
+        result,
+        tests=None,
+        duration=None,
+        testcases=None,
+    ):
+        self.name = intern(name)
+        self.arch = intern(arch)
+        self.compose = intern(compose)
+        self.result = Result(result)
+        self.tests = tests
+        self.duration = duration
+        self.testcases = testcases if testcases is not None else []
+
+    @classmethod
+    def from_element(cls, elem, default_compose=None):
+        """
+        Create the plan result from the xunit testsuite element, without the test cases.
+
+        Args:
+            elem (lxml.etree._Element): The testsuite element.
+            default_compose (str): Compose to use if the testsuite does not report one.
+        """
+        # With the latest Testing Farm release, the testsuite name does not include the target name
+        # it consist of only the plan name
+        name = elem.get("name").split(":")[-1]
+        # The provisioned environment may name the compose differently than requested,
+        # the older xunit reports just a single unnamed environment
+        environment_elem = elem.find("./testing-environment[@name='requested']")
+        if environment_elem is None:
+            environment_elem = next(
+                (
+                    environment_elem
+                    for environment_elem in elem.iterfind("./testing-environment")
+                    if environment_elem.get("name") is None
+                ),
+                None,
+            )
+        environment = (
+            {
+                prop.get("name"): prop.get("value")
+                for prop in environment_elem.iterfind("./property")
+            }
+            if environment_elem is not None
+            else {}
+        )
+        tests = elem.get("tests")
+        duration = parse_duration(elem.get("time"))
+        if duration is None:
+            duration = sum(
+                parse_duration(testcase.get("time")) or 0
+                for testcase in elem.iterfind("./testcase")
+            )
+        return cls(
+            name,
+            environment.get("arch", name),
+            environment.get("compose", default_compose),
+            elem.get("result"),
+            int(tests) if tests else None,
+            duration,
+        )
+
+    def with_testcases(self, testcases):
+        """Get a copy of the plan result with the given test cases."""
+        return TestsuiteResult(
+            self.name,
+            self.arch,
+            self.compose,
+            self.result,
+            self.tests,
+            self.duration,
+            testcases,
+        )
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "arch": self.arch,
+            "compose": self.compose,
+            "result": str(self.result),
+            "tests": self.tests,
+            "duration": self.duration,
+            # Test cases as [name, result, duration] lists to keep the stored results small
+            "testcases": [
+                [testcase.name, str(testcase.result), testcase.duration]
+                for testcase in self.testcases
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["name"],
+            data["arch"],
+            data["compose"],
+            data["result"],
+            data["tests"],
+            data["duration"],
+            [TestcaseResult(*testcase) for testcase in data["testcases"]],
+        )
+
+    def __repr__(self):
+        return f"TestsuiteResult({self.name!r}, {self.arch!r}, {self.compose!r}, {self.result})"
+
+
+class RequestResult:
+    """
+    Results of a single Testing Farm request.
+
+    Attributes:
+        uuid (str): The request UUID.
+        target (str): Interned compose requested for the first environment.
+        created (str): Time the request was created at.
+        testsuites (list): Results of the plans.
+    """
+
+    __slots__ = ("uuid", "target", "created", "testsuites")
+
+    def __init__(self, uuid, target, created=None, testsuites=None):
+        self.uuid = uuid
+        self.target = intern(target)
+        self.created = created
+        self.testsuites = testsuites if testsuites is not None else []
+
+    def with_testsuites(self, testsuites):
+        """Get a copy of the request result with the given plan results."""
+        return RequestResult(self.uuid, self.target, self.created, testsuites)
+
+    def to_dict(self):
+        """Get the results as a JSON serializable dictionary, to be stored locally."""
+        return {
+            "uuid": self.uuid,
+            "target": self.target,
+            "created": self.created,
+            "testsuites": [testsuite.to_dict() for testsuite in self.testsuites],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create the results from the dictionary created by to_dict."""
+        return cls(
+            data["uuid"],
+            data["target"],
+            data["created"],
+            [TestsuiteResult.from_dict(testsuite) for testsuite in data["testsuites"]],
+        )
+
+    def __repr__(self):
+        return f"RequestResult({self.uuid!r}, {self.target!r}, {len(self.testsuites)} testsuite(s))"
@@ -10,16 +10,63 @@ from copr.v3 import BuildProxy, CoprNoResultException
 from copr.v3 import exceptions as coprexcept
 
 from . import FormatText
+from .globals import COPR_URL
+from .local_store import load_json, save_json
+from .tracer import tracer
 
 LOGGER = getLogger(__name__)
 
 
+COPR_PAGE_SIZE = 100
+# Builds in these states do not change anymore and can be stored in the local index
+COPR_FINAL_STATES = ("succeeded", "failed", "canceled", "skipped", "forked")
+
+
+class CoprBuildIndex:
+    """
+    Local incremental index of the COPR builds of a single package.
+
+    Stored as a JSON document in the following format:
+    {
+        "head": 7000001,
+        "builds": {"<version>": {"id": 7000001, "state": "succeeded"}},
+    }
+    Every build with ID lower or equal to the head is either recorded in the index,
+    or does not need to be, as it has failed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        data = load_json(path, default={})
+        self.head = data.get("head", 0)
+        self.builds = data.get("builds", {})
+
+    def add(self, build):
+        if build.state not in COPR_FINAL_STATES or build.state == "failed":
+            return
+        version = build.source_package["version"]
+        if self.builds.get(version, {}).get("id", 0) < build.id:
+            self.builds[version] = {"id": build.id, "state": build.state}
+
+    def find(self, pattern):
+        """Get the ID of the newest indexed build with a version matching the pattern."""
+        matching = [
+            entry["id"]
+            for version, entry in self.builds.items()
+            if re.match(pattern, version)
+        ]
+        return max(matching) if matching else None
+
+    def save(self):
+        save_json(self.path, {"head": self.head, "builds": self.builds})
+
+
 class CoprRef:
     def __init__(self, ref_arg):
         self.ref = ref_arg
         self.build_id = None
         self.build_reference = None
-        self.session = BuildProxy({"copr_url": "https://copr.fedorainfracloud.org"})
+        self.session = BuildProxy({"copr_url": COPR_URL})
         self.copr_build_baseurl = None
         self.compose_mapping = None
         try:
@@ -51,7 +98,8 @@ class CoprRef:
             reference = [options.copr_api.get("build_reference")]
         build_reference = reference[0] if isinstance(reference, list) else reference
         self.copr_build_baseurl = os.path.join(
-            "https://copr.fedorainfracloud.org/coprs",
+            COPR_URL,
+            "coprs",
             group,
             owner,
             rpm_name,
@@ -71,14 +119,13 @@ class CoprRef:
 
         if self.build_reference:
 
-            def _get_correct_build_list(build_ref=None):
+            def _get_correct_build(build_ref=None):
                 """
-                Get a clean list of COPR builds that match the specified reference.
+                Get the latest non-failed COPR build that matches the specified reference.
 
                 Returns:
-                    list: A list of COPR builds that match the specified reference.
+                    Munch: The matching COPR build, None if no build matches.
                 """
-                clean_build_list = []
                 reference_pattern = fr".*{build_reference}(\..*|$)"
                 message = f"Gathering the fedora-copr-build information for the referenced {build_ref}."
                 # If no value is provided for the --copr argument nor is set in the config,
@@ -86,8 +133,18 @@ class CoprRef:
                 if self.build_reference == [None]:
                     message = f"Gathering the fedora-copr-build information for the project's latest copr build."
                 LOGGER.info(message)
+                build_index = CoprBuildIndex(
+                    os.path.join(
+                        options.cache_directory,
+                        f"copr_{copr_owner}_{repository}_{package}.json".replace(
+                            "@", ""
+                        ),
+                    )
+                )
                 try:
-                    query = self.session.get_list(copr_owner, repository)
+                    build = self.find_latest_build(
+                        copr_owner, repository, package, reference_pattern, build_index
+                    )
                 except CoprNoResultException as no_copr:
                     LOGGER.critical(
                         "There seems to be an issue with the copr_api configuration."
@@ -99,37 +156,25 @@ class CoprRef:
                     LOGGER.debug(f"{type(no_copr).__name__}: {no_copr}")
                     sys.exit(99)
 
-                for build_munch in query:
-                    if (
-                        build_munch.state != "failed"
-                        and build_munch.source_package["name"] == package
-                        and build_munch.source_package["version"] is not None
-                        and re.match(
-                            reference_pattern, build_munch.source_package["version"]
-                        )
-                    ):
-                        clean_build_list.append(build_munch)
-
-                if not clean_build_list:
+                if not build:
                     LOGGER.warning(
                         f"No build for given reference {build_reference} found!"
                     )
                     LOGGER.warning(self.copr_build_baseurl + "s")
-                return clean_build_list
+                return build
 
-            for build_munch in _get_correct_build_list(build_reference):
-                build = build_munch
+            build = _get_correct_build(build_reference)
+            if build:
                 for build_info in self.get_build_dictionary(build, composes):
                     info.append(build_info)
-                # Break so just the latest is selected
-                break
 
         elif self.build_id:
             LOGGER.info(
                 f"Gathering the fedora-copr-build information for the referenced buildID {build_reference}."
             )
             try:
-                build_munch = self.session.get(build_reference)
+                with tracer.span("copr get", "copr", build=build_reference):
+                    build_munch = self.session.get(build_reference)
             except coprexcept.CoprNoResultException as no_copr:
                 LOGGER.critical(f"{type(no_copr).__name__}: {no_copr}")
                 LOGGER.critical(f"Cowardly refusing to continue.")
@@ -181,6 +226,79 @@ class CoprRef:
 
         return info
 
+    def find_latest_build(self, owner, repository, package, pattern, build_index):
+        """
+        Find the newest non-failed build of the package with a version matching the pattern.
+
+        The builds are queried page by page, newest first, and the query stops at the first
+        matching build. Builds already recorded in the local index are never queried again,
+        when the query reaches the index head, the index is searched instead.
+
+        Args:
+            owner (str): COPR project owner, prefixed with '@' for groups.
+            repository (str): COPR project name.
+            package (str): Name of the package.
+            pattern (str): Regular expression the build version has to match.
+            build_index (CoprBuildIndex): Local index of the already seen builds.
+
+        Returns:
+            Munch: The matching COPR build, None if no build matches.
+        """
+        offset = 0
+        newest_id = None
+        lowest_pending_id = None
+        while True:
+            with tracer.span("copr get_list", "copr", package=package, offset=offset):
+                page = self.session.get_list(
+                    owner,
+                    repository,
+                    packagename=package,
+                    pagination={
+                        "limit": COPR_PAGE_SIZE,
+                        "offset": offset,
+                        "order": "id",
+                        "order_type": "DESC",
+                    },
+                )
+            reached_head = len(page) < COPR_PAGE_SIZE
+            for build_munch in page:
+                if build_munch.id <= build_index.head:
+                    reached_head = True
+                    break
+                newest_id = newest_id or build_munch.id
+                if build_munch.state not in COPR_FINAL_STATES:
+                    lowest_pending_id = build_munch.id
+                if (
+                    build_munch.source_package["name"] != package
+                    or build_munch.source_package["version"] is None
+                ):
+                    continue
+                build_index.add(build_munch)
+                if build_munch.state != "failed" and re.match(
+                    pattern, build_munch.source_package["version"]
+                ):
+                    build_index.save()
+                    return build_munch
+            if reached_head:
+                break
+            offset += COPR_PAGE_SIZE
+
+        # Every build newer than the index head was seen, move the head right below
+        # the oldest build, that can still change its state
+        if newest_id:
+            build_index.head = max(
+                build_index.head,
+                lowest_pending_id - 1 if lowest_pending_id else newest_id,
+            )
+        build_index.save()
+
+        build_id = build_index.find(pattern)
+        if build_id is None:
+            return None
+        LOGGER.debug(f"The build {build_id} was found in the local build index.")
+        with tracer.span("copr get", "copr", build=build_id):
+            return self.session.get(build_id)
+
     def get_build_dictionary(self, build, composes):
         """
         Get the dictionary containing build information for each target distribution.
@@ -256,6 +374,81 @@ class CoprRef:
         return build_info
 
 
+# Koji build state of a finished build, the build metadata do not change afterwards
+KOJI_BUILD_COMPLETE = 1
+
+
+def multicall(session, method, calls):
+    """
+    Send the calls of the Koji hub method in a single batched request.
+
+    Args:
+        session (koji.ClientSession): Logged in Koji session.
+        method (str): Name of the hub method.
+        calls (list): List of keyword arguments, one item for each call.
+
+    Returns:
+        list: Results of the calls in the same order as requested.
+    """
+    if not calls:
+        return []
+    with tracer.span(f"koji {method}", "koji", calls=len(calls)):
+        if len(calls) == 1:
+            return [getattr(session, method)(**calls[0])]
+        with session.multicall(strict=True) as batch:
+            results = [getattr(batch, method)(**kwargs) for kwargs in calls]
+    return [result.result for result in results]
+
+
+class KojiBuildIndex:
+    """
+    Index of the Koji builds NVRs to their build task IDs and volume names.
+
+    The metadata of the complete builds never change, so they can be optionally
+    persisted in a JSON document and reused by the following queries.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.complete_builds = load_json(path, default={}) if path else {}
+        self.nvrs = dict(self.complete_builds)
+        self.tasks = {
+            task_id: volume_name for task_id, volume_name in self.nvrs.values()
+        }
+        self._changed = False
+
+    def __contains__(self, task_id):
+        return task_id in self.tasks
+
+    def add_builds(self, builds):
+        """Index the build info dictionaries returned by the Koji hub in a single pass."""
+        for build_info in builds:
+            task_id = build_info.get("task_id")
+            if not task_id:
+                continue
+            entry = [task_id, build_info.get("volume_name")]
+            self.nvrs[build_info["nvr"]] = entry
+            self.tasks[task_id] = entry[1]
+            if build_info.get("state") == KOJI_BUILD_COMPLETE:
+                self.complete_builds[build_info["nvr"]] = entry
+                self._changed = True
+
+    def by_reference(self, reference):
+        """Get the task ID to volume name mapping of the builds with NVR containing any of the references."""
+        return {
+            task_id: volume_name
+            for nvr, (task_id, volume_name) in self.nvrs.items()
+            if any(ref in nvr for ref in reference)
+        }
+
+    def volume_name(self, task_id):
+        return self.tasks.get(task_id)
+
+    def save(self):
+        if self.path and self._changed:
+            save_json(self.path, self.complete_builds)
+
+
 class BrewRef:
     def __init__(self, ref_arg):
         self.ref = ref_arg
@@ -264,6 +457,8 @@ class BrewRef:
         self.session = None
         self.compose_mapping = None
         self.epel_composes = None
+        # Listings of all the builds of a package, queried once for all the references
+        self.package_builds = {}
         try:
             self.task_id = int(ref_arg[0])
         except (ValueError, TypeError):
@@ -290,7 +485,8 @@ class BrewRef:
         compose_selection = []
 
         self.session = koji.ClientSession(options.brew_api.get("session_url"))
-        self.session.gssapi_login()
+        with tracer.span("koji gssapi_login", "koji"):
+            self.session.gssapi_login()
 
         self.compose_mapping = options.tests_compose_mapping
         if not self.compose_mapping:
@@ -347,6 +543,13 @@ class BrewRef:
 
         return info
 
+    def list_package_builds(self, package, session):
+        """Get all the builds of the package, listed just once for each package."""
+        if package not in self.package_builds:
+            with tracer.span("koji listBuilds", "koji", prefix=package):
+                self.package_builds[package] = session.listBuilds(prefix=package)
+        return self.package_builds[package]
+
     def get_brew_task_and_compose(self, package, reference, session, options):
         """
         Get the Brew build task IDs and associated composes for a given package and reference.
@@ -358,38 +561,56 @@ class BrewRef:
         Returns:
             dict: A dictionary with Brew task IDs as keys and associated composes as values.
         """
-        query = session.listBuilds(prefix=package)
         brewbuild_baseurl = options.brew_api.get("taskid_url")
-        tasks = []
+        build_index = KojiBuildIndex(
+            os.path.join(options.cache_directory, f"koji_{package}.json")
+            if options.brew_api.get("cache_builds")
+            else None
+        )
+        tasks = {}
         if self.build_reference:
             LOGGER.info(
                 f"Gathering the brew build information for the {package} version {reference}."
             )
-            # Append the list of TaskID's collected from the listBuilds query
-            tasks = [
-                build_info.get("task_id")
-                for build_info in query
-                for ref in reference
-                if ref in build_info.get("nvr")
-            ]
-            volume_names = [
-                build_info.get("volume_name")
-                for build_info in query
-                for ref in reference
-                if ref in build_info.get("nvr")
+            # Query just the builds prefixed by the referenced versions in a single call
+            build_index.add_builds(
+                build
+                for builds in multicall(
+                    session,
+                    "listBuilds",
+                    [{"prefix": f"{package}-{ref}"} for ref in reference],
+                )
+                for build in builds
+            )
+            # The references matching just a part of the NVR, e.g. the release, are not
+            # found by the prefix query, look them up in the listing of all the package builds
+            unresolved = [
+                ref for ref in reference if not build_index.by_reference([ref])
             ]
+            if unresolved:
+                LOGGER.debug(
+                    f"No build prefixed by {unresolved} found, querying all {package} builds."
+                )
+                build_index.add_builds(self.list_package_builds(package, session))
+            tasks = build_index.by_reference(reference)
 
         elif self.task_id:
             LOGGER.info(
                 f"Gathering the brew build information for the {package} taskID {reference}."
             )
-            tasks = reference
-            volume_names = [
-                build_info.get("volume_name")
-                for task in tasks
-                for build_info in query
-                if int(task) == build_info.get("task_id")
-            ]
+            uncached = [task for task in reference if int(task) not in build_index]
+            build_index.add_builds(
+                build
+                for builds in multicall(
+                    session, "listBuilds", [{"taskID": int(task)} for task in uncached]
+                )
+                for build in builds
+            )
+            tasks = {
+                task: build_index.volume_name(int(task))
+                for task in reference
+                if int(task) in build_index
+            }
         else:
             LOGGER.critical("No build artifact reference nor ID provided!")
             LOGGER.critical(
@@ -397,18 +618,19 @@ class BrewRef:
                 "either through the command line or the config file."
             )
 
-        task_ids = list(set(tasks))
-        if not task_ids:
+        build_index.save()
+
+        if not tasks:
             LOGGER.warning(
                 f"No suitable tasks found for the provided reference {reference}."
             )
             LOGGER.warning("Please validate that the reference is correct.")
             sys.exit(99)
 
-        for i in range(len(task_ids)):
+        for task_id, volume_name in tasks.items():
             LOGGER.info(
-                f"Available build task ID {task_ids[i]} for {volume_names[i]} assigned."
+                f"Available build task ID {task_id} for {volume_name} assigned."
             )
-            LOGGER.info(f"LINK: {brewbuild_baseurl}{task_ids[i]}")
+            LOGGER.info(f"LINK: {brewbuild_baseurl}{task_id}")
 
-        return {task_ids[i]: volume_names[i] for i in range(len(task_ids))}
+        return tasks
@@ -0,0 +1,91 @@
+"""Chrome trace of the network, parse and log download spans of an enge run."""
+import atexit
+import contextlib
+import logging
+import os
+import threading
+import time
+
+from enge.utils.local_store import save_json
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Tracer:
+    """
+    Record the spans of the run in the Chrome Trace Event format, viewable in Perfetto.
+
+    Each span is stored as a complete event on the thread it ran on, the spans nest
+    by their time within the thread, so the HTTP calls show up under the phase
+    they were made in and the calls made by the worker threads on their own tracks.
+    The trace is stored at the exit of the interpreter.
+
+    Attributes:
+        path (str): Path to store the trace to, None if the run is not traced.
+        events (list): The recorded trace events.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self, path):
+        self.path = path
+        self._origin = time.perf_counter()
+        atexit.register(self.save)
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        """
+        Record the block as a span, can be used as a decorator as well.
+
+        Yields the arguments of the span, so the results known only at the end
+        of the block, like the HTTP status, can be added to them.
+        """
+        if self.path is None:
+            yield args
+            return
+        started = time.perf_counter()
+        try:
+            yield args
+        finally:
+            finished = time.perf_counter()
+            thread = threading.current_thread()
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((started - self._origin) * 1e6, 1),
+                "dur": round((finished - started) * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": thread.native_id,
+                "args": args,
+            }
+            with self._lock:
+                self.events.append(event)
+                self._threads[thread.native_id] = thread.name
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            thread_names = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self._threads.items()
+            ]
+            events = thread_names + sorted(self.events, key=lambda event: event["ts"])
+        save_json(self.path, {"traceEvents": events, "displayTimeUnit": "ms"})
+        LOGGER.debug(f"The trace of {len(self.events)} span(s) stored to {self.path}")
+        self.path = None
+
+
+tracer = Tracer()
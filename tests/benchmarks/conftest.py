@@ -0,0 +1,158 @@
+"""
+Shared fixtures of the offline benchmarks
+
+The benchmarks replay the recorded Testing Farm request document with the synthetic
+xunit results, all the HTTP calls are served from the memory and the real network
+is never reached.
+"""
+import copy
+import functools
+import json
+import os
+import uuid
+
+import pytest
+import requests
+
+from enge.utils import http
+from enge.utils.arg_parser import get_arguments
+from enge.utils.globals import TESTING_FARM_ENDPOINT
+from enge.utils.opt_manager import parsed_opts
+from enge.utils.request_store import request_store
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(__file__), "data")
+
+# Number of the test cases in the xunit of a single request
+TESTCASES = (10, 1_000, 10_000, 100_000)
+TESTS_PER_PLAN = 50
+
+
+def recorded_request():
+    with open(os.path.join(DATA_DIRECTORY, "request.json")) as request_file:
+        return json.load(request_file)
+
+
+@functools.lru_cache
+def synthetic_xunit(testcases, compose="CentOS-Stream-9", arch="x86_64"):
+    """Generate the xunit of a request with the given number of test cases, every 7th of them failing."""
+    testsuites = []
+    for plan in range(0, testcases, TESTS_PER_PLAN):
+        tests = range(plan, min(plan + TESTS_PER_PLAN, testcases))
+        failing = any(test % 7 == 0 for test in tests)
+        testcases_xml = "".join(
+            f'<testcase name="/tests/component{plan}/feature/test{test}" '
+            f'result="{"failed" if test % 7 == 0 else "passed"}" time="00:00:{test % 60:02d}">'
+            "<logs>"
+            f'<log href="https://artifacts.example.com/{plan}/{test}/testout.log" name="testout.log"/>'
+            f'<log href="https://artifacts.example.com/{plan}/{test}/journal.txt" name="journal.txt"/>'
+            "</logs></testcase>"
+            for test in tests
+        )
+        testsuites.append(
+            f'<testsuite name="/plans/tier{plan % 3}/component{plan}" '
+            f'result="{"failed" if failing else "passed"}" tests="{len(tests)}">'
+            '<testing-environment name="requested">'
+            f'<property name="arch" value="{arch}"/><property name="compose" value="{compose}"/>'
+            "</testing-environment>"
+            f"{testcases_xml}</testsuite>"
+        )
+    return f'<testsuites overall-result="failed">{"".join(testsuites)}</testsuites>'
+
+
+class FakeResponse:
+    def __init__(self, data=None, text=None):
+        self._data = data
+        self.text = text if text is not None else json.dumps(data)
+        self.content = self.text.encode()
+        self.status_code = 200
+        self.reason = "OK"
+        self.headers = {}
+
+    def __bool__(self):
+        return True
+
+    def json(self):
+        return copy.deepcopy(self._data)
+
+
+class FakeFarm:
+    """
+    Serve the request documents and their xunit results from the memory.
+
+    Attributes:
+        requests (dict): Request UUID to the request document mapping.
+        xunits (dict): Xunit URL to the xunit text mapping.
+    """
+
+    def __init__(self):
+        self.requests = {}
+        self.xunits = {}
+
+    def add_request(self, testcases, state="complete"):
+        """Add a copy of the recorded request with the xunit of the given size, return its URL."""
+        request_json = recorded_request()
+        request_uuid = str(uuid.uuid4())
+        request_json["id"] = request_uuid
+        request_json["state"] = state
+        xunit_url = f"https://artifacts.example.com/{request_uuid}/results.xml"
+        request_json["result"]["xunit_url"] = xunit_url
+        self.requests[request_uuid] = request_json
+        self.xunits[xunit_url] = synthetic_xunit(testcases)
+        return os.path.join(TESTING_FARM_ENDPOINT, request_uuid)
+
+    def get(self, url, **kwargs):
+        if url in self.xunits:
+            return FakeResponse(text=self.xunits[url])
+        return FakeResponse(self.requests[url.rstrip("/").split("/")[-1]])
+
+    def post(self, url, **kwargs):
+        return FakeResponse({"id": str(uuid.uuid4())})
+
+
+def pytest_sessionstart(session):
+    """Fail the comparing run without a baseline, it would pass without checking anything."""
+    benchmark_session = getattr(session.config, "_benchmarksession", None)
+    if (
+        benchmark_session
+        and benchmark_session.compare
+        and not benchmark_session.compared_mapping
+    ):
+        pytest.exit(
+            f"No benchmark baseline in {benchmark_session.storage}, record it with `tox -e benchmark-baseline`.",
+            returncode=pytest.ExitCode.USAGE_ERROR,
+        )
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch, tmp_path):
+    """Refuse the real network and keep the local state of the benchmarks in the temporary directory."""
+
+    def _refuse(*args, **kwargs):
+        raise RuntimeError("The benchmarks must not reach the network.")
+
+    monkeypatch.setattr(requests, "get", _refuse)
+    monkeypatch.setattr(requests, "post", _refuse)
+    monkeypatch.setattr(requests.Session, "request", _refuse)
+    monkeypatch.setattr(request_store, "directory", None)
+    monkeypatch.setattr(request_store, "requests", {})
+    for option in ("plan_history_file", "rerun_lineage_file", "flaky_history_file"):
+        monkeypatch.setattr(parsed_opts, option, str(tmp_path / f"{option}.json"))
+
+
+@pytest.fixture
+def farm(monkeypatch):
+    fake_farm = FakeFarm()
+    monkeypatch.setattr(http, "get", fake_farm.get)
+    monkeypatch.setattr(http, "post", fake_farm.post)
+    return fake_farm
+
+
+@pytest.fixture
+def cli_args(monkeypatch):
+    """Parse the given command-line into the options of the run."""
+
+    def _cli_args(*argv):
+        monkeypatch.setattr(parsed_opts, "cli_args", get_arguments(list(argv)))
+        return parsed_opts.cli_args
+
+    return _cli_args
@@ -0,0 +1,106 @@
+"""
+Benchmarks of the report hot paths
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from enge.report import __main__ as report
+from enge.utils.results import Result
+
+from .conftest import TESTCASES
+
+# Number of the task IDs in the tasks file
+TASKS = (10, 1_000, 100_000)
+
+
+def _count_testcases(parsed_dict):
+    return sum(
+        len(testsuite.testcases)
+        for request_result in parsed_dict.values()
+        for testsuite in request_result.testsuites
+    )
+
+
+@pytest.fixture
+def parsed_requests(farm, cli_args):
+    """Parse the given number of the requests with the given number of the test cases each."""
+
+    def _parsed_requests(testcases, count=1):
+        cli_args("report")
+        request_urls = [farm.add_request(testcases) for _ in range(count)]
+        return report.parse_request_xunit(request_urls, "benchmark")
+
+    return _parsed_requests
+
+
+@pytest.mark.parametrize("tasks", TASKS)
+def test_parse_tasks(benchmark, cli_args, tmp_path, tasks):
+    """Benchmark the task IDs read from the file, in all the formats the file may hold"""
+    formats = (
+        "{}",
+        "https://api.dev.testing-farm.io/v0.1/requests/{}",
+        "http://artifacts.osci.redhat.com/testing-farm/{}/",
+    )
+    task_ids = [f"{task:08x}-89ca-4d62-8f81-959bf8ab4d03" for task in range(tasks)]
+    tasks_file = tmp_path / "tasks"
+    tasks_file.write_text(
+        "".join(
+            formats[index % len(formats)].format(task_id) + "\n"
+            for index, task_id in enumerate(task_ids)
+        )
+    )
+    cli_args("report", "--file", str(tasks_file))
+
+    request_urls, _ = benchmark(report.parse_tasks)
+
+    assert len(request_urls) == tasks
+
+
+@pytest.mark.parametrize("testcases", TESTCASES)
+def test_parse_request_xunit(benchmark, farm, cli_args, testcases):
+    """Benchmark the request and its xunit parsed into the result model"""
+    cli_args("report")
+    request_url = farm.add_request(testcases)
+
+    parsed_dict = benchmark(report.parse_request_xunit, [request_url], "benchmark")
+
+    assert _count_testcases(parsed_dict) == testcases
+
+
+@pytest.mark.parametrize("parse_workers", (1, 4))
+def test_parse_request_xunit_many(benchmark, farm, cli_args, parse_workers):
+    """Benchmark the xunit of many requests parsed in-process and by the worker processes"""
+    cli_args("report", "--parse-workers", str(parse_workers))
+    request_urls = [farm.add_request(10_000) for _ in range(16)]
+
+    parsed_dict = benchmark(report.parse_request_xunit, request_urls, "benchmark")
+
+    assert list(parsed_dict) == [url.split("/")[-1] for url in request_urls]
+    assert _count_testcases(parsed_dict) == 16 * 10_000
+
+
+@pytest.mark.parametrize("testcases", TESTCASES)
+def test_build_table(benchmark, monkeypatch, parsed_requests, cli_args, testcases):
+    """Benchmark the results table of a request rendered with the test cases"""
+    parsed_dict = parsed_requests(testcases)
+    monkeypatch.setattr(report, "parse_results", lambda: parsed_dict)
+    cli_args("report", "--level2")
+
+    table = benchmark(lambda: report.build_table().get_string())
+
+    assert table.count(Result.FAILED) >= testcases // 7
+
+
+@pytest.mark.parametrize("testcases", TESTCASES)
+def test_build_table_comparison(
+    benchmark, monkeypatch, parsed_requests, cli_args, testcases
+):
+    """Benchmark the test case results of two requests rendered side by side"""
+    parsed_dict = parsed_requests(testcases, count=2)
+    monkeypatch.setattr(report, "parse_results", lambda: parsed_dict)
+    cli_args("report", "--compare", "--level2")
+
+    table = benchmark(lambda: report.build_table_comparison().get_string())
+
+    assert table.count(Result.FAILED) >= 2 * (testcases // 7)
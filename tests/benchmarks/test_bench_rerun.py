@@ -0,0 +1,59 @@
+"""
+Benchmarks of the re-run and dispatch hot paths
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from enge.dispatch.tf_send_request import SubmitTest
+from enge.report.__main__ import filter_passed, parse_request_xunit
+from enge.rerun import __main__ as rerun
+
+from .conftest import TESTCASES
+
+
+@pytest.mark.parametrize("testcases", TESTCASES)
+@pytest.mark.parametrize("granularity", ("plan", "test"))
+def test_qualify_results(
+    benchmark, monkeypatch, capsys, farm, cli_args, testcases, granularity
+):
+    """Benchmark the failed plans and tests of a request qualified for a re-run, the parsing excluded"""
+    cli_args("report")
+    request_url = farm.add_request(testcases)
+    parsed_dict = filter_passed(parse_request_xunit([request_url], "benchmark"))
+    monkeypatch.setattr(rerun, "parse_latest_attempts", lambda *args: parsed_dict)
+    cli_args("rerun", "--fail", "--granularity", granularity)
+
+    def _qualify():
+        jobs = rerun.RerunJobs([request_url], "benchmark")
+        jobs.qualify_results()
+        return jobs
+
+    jobs = benchmark(_qualify)
+    capsys.readouterr()
+
+    assert jobs.rerun_uuids == [request_url.split("/")[-1]]
+
+
+@pytest.mark.parametrize("parallel_limit", (12, "auto"))
+def test_build_payload(benchmark, parallel_limit):
+    """Benchmark the request payload built for the dispatch"""
+    submit = SubmitTest()
+    submit.api_key = "benchmark"
+    submit.tests_git_url = "https://github.com/danmyway/enge-tests"
+    submit.tests_git_branch = "main"
+    submit.plan = "/plans/tier0"
+    submit.architecture = "x86_64"
+    submit.compose = "CentOS-Stream-9"
+    submit.artifact_id = "7204515"
+    submit.artifact_type = "fedora-copr-build"
+    submit.package = "enge"
+    submit.business_unit_tag = "enge"
+    submit.tmt_distro = "centos-9"
+    submit.boot_method = "bios"
+    submit.parallel_limit = parallel_limit
+    submit.parallel_limit_max = 20
+
+    _, payload = benchmark(submit.build_payload)
+
+    assert payload["environments"][0]["os"]["compose"] == "CentOS-Stream-9"
@@ -0,0 +1,19 @@
+"""
+Shared test configuration
+
+The enge package parses the command-line and loads the configuration on import,
+make it use the example configuration shipped with the repository instead of the pytest arguments.
+The import happens here, before the nested conftest files and the test modules import enge,
+and the command-line is restored right after, the tests build their options with get_arguments.
+"""
+import os
+import sys
+
+EXAMPLE_CONFIG = os.path.join(os.path.dirname(os.path.dirname(__file__)), "enge.ini")
+
+_argv = sys.argv
+sys.argv = ["enge", "--config", EXAMPLE_CONFIG, "report"]
+try:
+    import enge.utils.opt_manager  # noqa: F401,E402
+finally:
+    sys.argv = _argv
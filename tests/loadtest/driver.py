@@ -0,0 +1,209 @@
+"""
+Load test of the enge test, report and rerun commands against the local fake Testing Farm
+
+Dispatches the given number of the jobs, reports them with --wait and re-runs the failed ones,
+then prints the throughput of each command and the percentiles of the latency of its HTTP calls,
+taken from the --trace of the command.
+
+    python tests/loadtest/driver.py --jobs 1000 --latency 0.05
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from prettytable import PrettyTable
+
+from fake_farm import (
+    COPR_CHROOTS,
+    COPR_PACKAGE,
+    GIT_PATH,
+    add_farm_arguments,
+    environment,
+    farm_from_arguments,
+    serve,
+)
+
+TAG = "loadtest"
+COPR_BUILD_ID = 7204515
+COMPOSES = ["CentOS-Stream-8", "CentOS-Stream-9", "Fedora-40"]
+
+CONFIG = """\
+[common]
+archive_tasks_latest = {directory}/latest_jobs
+archive_tasks_default = {directory}/jobs_archive/
+cache_directory = {directory}/cache/
+artifact_store = {directory}/artifacts/
+rerun_lineage = {directory}/rerun_lineage.json
+plan_history = {directory}/plan_history.json
+flaky_history = {directory}/flaky_history.json
+
+[logs]
+directory = {directory}/logs
+
+[project]
+name = {package}
+owner = {package}
+repo_url = {base_url}{git_path}/{package}
+
+[copr_api]
+package = {package}
+
+[brew_api]
+session_url =
+taskid_url =
+
+[testing_farm]
+api_key = loadtest
+cloud_resources_tag = loadtest
+
+[tests]
+composes = {composes}
+parallel_limit = 20
+"""
+
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def http_latencies(trace_path):
+    """Get the durations of the HTTP calls recorded in the trace in seconds."""
+    try:
+        with open(trace_path) as trace_file:
+            events = json.load(trace_file)["traceEvents"]
+    except (OSError, ValueError):
+        return []
+    return [event["dur"] / 1e6 for event in events if event.get("cat") == "http"]
+
+
+def run_enge(name, arguments, config_path, env, directory):
+    """
+    Run the enge command with the trace recorded.
+
+    Returns:
+        tuple: Return code, wall time in seconds and the HTTP call latencies.
+    """
+    trace_path = os.path.join(directory, f"trace_{name}.json")
+    command = [sys.executable, "-m", "enge", "-c", config_path, "--trace", trace_path]
+    started = time.perf_counter()
+    with open(os.path.join(directory, f"{name}.log"), "w") as output:
+        returncode = subprocess.call(
+            command + arguments, env=env, stdout=output, stderr=subprocess.STDOUT
+        )
+    return returncode, time.perf_counter() - started, http_latencies(trace_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1000, help="Number of the jobs to dispatch."
+    )
+    parser.add_argument(
+        "--targets",
+        type=int,
+        default=1,
+        choices=range(1, len(COMPOSES) + 1),
+        help="Number of the targets each plan is dispatched to.",
+    )
+    parser.add_argument(
+        "--keep",
+        metavar="DIRECTORY",
+        help="Keep the configuration, outputs and traces of the commands in the directory.",
+    )
+    add_farm_arguments(parser)
+    args = parser.parse_args()
+
+    farm = farm_from_arguments(args)
+    server = serve(farm)
+    directory = args.keep or tempfile.mkdtemp(prefix="enge_loadtest_")
+    os.makedirs(directory, exist_ok=True)
+
+    composes = {
+        f"target{index}": {
+            "compose": compose,
+            "distro": compose.lower(),
+            "chroot": COPR_CHROOTS[index],
+        }
+        for index, compose in enumerate(COMPOSES[: args.targets])
+    }
+    config_path = os.path.join(directory, "enge.ini")
+    with open(config_path, "w") as config_file:
+        config_file.write(
+            CONFIG.format(
+                directory=directory,
+                package=COPR_PACKAGE,
+                base_url=farm.base_url,
+                git_path=GIT_PATH,
+                composes=composes,
+            )
+        )
+    env = dict(os.environ, **environment(farm))
+    plans = [f"/plans/load{plan:05d}" for plan in range(args.jobs // args.targets)]
+
+    print(
+        f"Running {len(plans) * args.targets} jobs against {farm.base_url}, "
+        f"the outputs are stored in {directory}"
+    )
+    commands = (
+        ("test", ["test", "--copr", str(COPR_BUILD_ID), "--tag", TAG, "-p", *plans]),
+        ("report", ["report", "--wait", "--tag", TAG]),
+        ("rerun", ["rerun", "--fail", "--tag", TAG]),
+    )
+    results_table = PrettyTable()
+    results_table.field_names = [
+        "Command",
+        "Exit Code",
+        "Jobs",
+        "Wall",
+        "Jobs/s",
+        "HTTP Calls",
+        "p50",
+        "p90",
+        "p99",
+        "Max",
+    ]
+    for name, arguments in commands:
+        submitted_before = len(farm.requests)
+        returncode, wall, latencies = run_enge(
+            name, arguments, config_path, env, directory
+        )
+        # The report handles all the dispatched jobs, the others the jobs they submit
+        jobs = (
+            len(farm.requests)
+            if name == "report"
+            else len(farm.requests) - submitted_before
+        )
+        results_table.add_row(
+            (
+                name,
+                returncode,
+                jobs,
+                f"{wall:.2f}s",
+                f"{jobs / wall:.1f}",
+                len(latencies),
+                *(
+                    f"{percentile(latencies, share) * 1000:.1f}ms"
+                    for share in (0.5, 0.9, 0.99, 1.0)
+                ),
+            )
+        )
+    server.shutdown()
+
+    results_table.align = "r"
+    results_table.align["Command"] = "l"
+    print(results_table)
+    print(f"Calls served: {farm.calls}, injected errors: {farm.errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Local stand-in of the Testing Farm for the load tests
+
+Implements the subset of the Testing Farm requests API enge uses, the artifacts
+with the xunit results and the test logs, the Copr build API and the tests repository.
+The requests go through the queued, running and complete states in real time, the
+latency of the responses, the rate of the failed API calls and the duration of the jobs
+are configurable. Point enge to the server with the environment variables printed at start.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PATH = "/v0.1/requests"
+ARTIFACTS_PATH = "/artifacts"
+COPR_PATH = "/copr"
+GIT_PATH = "/git"
+
+COPR_PACKAGE = "enge"
+COPR_CHROOTS = ["epel-8-x86_64", "epel-9-x86_64", "fedora-40-x86_64"]
+
+
+class FakeFarm:
+    """
+    State of the fake Testing Farm, the requests and their results.
+
+    The results of the test cases are pseudo-random, but stable for each request,
+    so every document, xunit and log of a request is consistent no matter when it is served.
+
+    Attributes:
+        latency (float): Seconds to delay each response by.
+        error_rate (float): Share of the requests API calls failing with 503.
+        queue_time (float): Seconds each request spends in the queued state.
+        job_duration (float): Seconds each request spends in the running state.
+        tests_per_plan (int): Number of the test cases in each plan.
+        failure_rate (float): Share of the failing test cases.
+        requests (dict): Request UUID to the (posted payload, creation time) mapping.
+        calls (dict): Route name to the number of the served calls.
+        errors (int): Number of the injected errors.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        error_rate=0.0,
+        queue_time=1.0,
+        job_duration=2.0,
+        tests_per_plan=5,
+        failure_rate=0.1,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.queue_time = queue_time
+        self.job_duration = job_duration
+        self.tests_per_plan = tests_per_plan
+        self.failure_rate = failure_rate
+        self.base_url = None
+        self.requests = {}
+        self.calls = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def count(self, route):
+        with self._lock:
+            self.calls[route] = self.calls.get(route, 0) + 1
+
+    def inject_error(self):
+        if self.error_rate and random.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return True
+        return False
+
+    def submit(self, payload):
+        request_uuid = str(uuid.uuid4())
+        with self._lock:
+            self.requests[request_uuid] = (payload, time.time())
+        return request_uuid
+
+    def state(self, request_uuid):
+        elapsed = time.time() - self.requests[request_uuid][1]
+        if elapsed < self.queue_time:
+            return "queued"
+        if elapsed < self.queue_time + self.job_duration:
+            return "running"
+        return "complete"
+
+    def testcase_result(self, request_uuid, plan, test):
+        digest = hashlib.sha1(f"{request_uuid}{plan}{test}".encode()).digest()
+        return "failed" if digest[0] < 256 * self.failure_rate else "passed"
+
+    def plans(self, request_uuid):
+        payload = self.requests[request_uuid][0]
+        return (payload["test"]["fmf"]["name"] or "/plans").split("|")
+
+    def tests(self, request_uuid):
+        """Get the names of the test cases run by the request, the re-runs select just some of them."""
+        test_pattern = self.requests[request_uuid][0]["test"]["fmf"].get("test_name")
+        for test in range(self.tests_per_plan):
+            name = f"/tests/test{test}"
+            if not test_pattern or re.match(test_pattern, name):
+                yield test, name
+
+    def overall_result(self, request_uuid):
+        for plan in self.plans(request_uuid):
+            for test, _ in self.tests(request_uuid):
+                if self.testcase_result(request_uuid, plan, test) == "failed":
+                    return "failed"
+        return "passed"
+
+    def document(self, request_uuid):
+        """Get the request document the way the Testing Farm API returns it."""
+        payload, created = self.requests[request_uuid]
+        state = self.state(request_uuid)
+        complete = state == "complete"
+        created_iso = datetime.datetime.fromtimestamp(created).isoformat()
+        return {
+            "id": request_uuid,
+            "user_id": "00000000-0000-0000-0000-000000000000",
+            "token_id": "00000000-0000-0000-0000-000000000000",
+            "test": payload["test"],
+            "state": state,
+            "environments_requested": payload["environments"],
+            "notes": None,
+            "result": {
+                "summary": None,
+                "overall": self.overall_result(request_uuid) if complete else None,
+                "xunit": None,
+                "xunit_url": (
+                    f"{self.base_url}{ARTIFACTS_PATH}/{request_uuid}/results.xml"
+                    if complete
+                    else None
+                ),
+            },
+            "run": {"artifacts": f"{self.base_url}{ARTIFACTS_PATH}/{request_uuid}"},
+            "settings": payload.get("settings"),
+            "queued_time": str(self.queue_time),
+            "run_time": self.job_duration if complete else None,
+            "created": created_iso,
+            "updated": created_iso,
+        }
+
+    def xunit(self, request_uuid):
+        """Get the xunit results of the finished request."""
+        payload = self.requests[request_uuid][0]
+        artifacts_url = f"{self.base_url}{ARTIFACTS_PATH}/{request_uuid}"
+        testsuites = []
+        for environment in payload["environments"]:
+            for plan in self.plans(request_uuid):
+                testcases = []
+                for test, name in self.tests(request_uuid):
+                    result = self.testcase_result(request_uuid, plan, test)
+                    log_url = f"{artifacts_url}{plan}/test{test}/testout.log"
+                    testcases.append(
+                        f'<testcase name="{name}" result="{result}" time="00:00:{test % 60:02d}">'
+                        f'<logs><log href="{log_url}" name="testout.log"/></logs>'
+                        "</testcase>"
+                    )
+                plan_result = (
+                    "failed" if 'result="failed"' in "".join(testcases) else "passed"
+                )
+                testsuites.append(
+                    f'<testsuite name="{plan}" result="{plan_result}" tests="{len(testcases)}">'
+                    '<testing-environment name="requested">'
+                    f'<property name="arch" value="{environment["arch"]}"/>'
+                    f'<property name="compose" value="{environment["os"]["compose"]}"/>'
+                    "</testing-environment>"
+                    f'{"".join(testcases)}</testsuite>'
+                )
+        return (
+            f'<testsuites overall-result="{self.overall_result(request_uuid)}">'
+            f'{"".join(testsuites)}</testsuites>'
+        )
+
+    def log(self, request_uuid, path):
+        lines = [f"Running {path} of {request_uuid}"] * 20
+        lines.append(f"ERROR: {path} failed at {datetime.datetime.now()}")
+        return "\n".join(lines) + "\n"
+
+    def copr_build(self, build_id):
+        """Get the Copr build the way the Copr API returns it."""
+        return {
+            "id": build_id,
+            "state": "succeeded",
+            "ownername": COPR_PACKAGE,
+            "projectname": COPR_PACKAGE,
+            "source_package": {
+                "name": COPR_PACKAGE,
+                "version": "0.1.0-1.20240325081402577118.main.1.g1234567",
+                "url": None,
+            },
+            "chroots": COPR_CHROOTS,
+        }
+
+
+class FakeFarmHandler(BaseHTTPRequestHandler):
+    # Keep the connections of the clients reusing them open
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def farm(self):
+        return self.server.farm
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _api_error(self):
+        if self.farm.inject_error():
+            self._send(503, {"message": "Service Unavailable"})
+            return True
+        return False
+
+    def do_POST(self):
+        time.sleep(self.farm.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") != API_PATH:
+            self._send(404, {"message": "Not Found"})
+            return
+        self.farm.count("POST request")
+        if self._api_error():
+            return
+        request_uuid = self.farm.submit(payload)
+        self._send(200, {"id": request_uuid, "test": payload["test"]})
+
+    def do_GET(self):
+        time.sleep(self.farm.latency)
+        path = self.path.split("?")[0].rstrip("/")
+        parts = path.split("/")
+        farm = self.farm
+
+        if path.startswith(API_PATH + "/"):
+            farm.count("GET request")
+            if self._api_error():
+                return
+            if parts[-1] not in farm.requests:
+                self._send(404, {"message": "Not Found"})
+                return
+            self._send(200, farm.document(parts[-1]))
+        elif path.startswith(ARTIFACTS_PATH + "/"):
+            request_uuid = parts[2]
+            if request_uuid not in farm.requests:
+                self._send(404, "Not Found", "text/plain")
+            elif len(parts) == 3:
+                farm.count("GET artifacts")
+                self._send(200, f"Artifacts of {request_uuid}", "text/html")
+            elif parts[-1] == "results.xml":
+                farm.count("GET xunit")
+                self._send(200, farm.xunit(request_uuid), "application/xml")
+            else:
+                farm.count("GET log")
+                self._send(
+                    200, farm.log(request_uuid, "/".join(parts[3:])), "text/plain"
+                )
+        elif path.startswith(f"{COPR_PATH}/api_3/build/"):
+            farm.count("GET copr build")
+            self._send(200, farm.copr_build(int(parts[-1])))
+        elif path.startswith(GIT_PATH):
+            farm.count("GET git")
+            self._send(200, "Tests repository", "text/html")
+        else:
+            self._send(404, {"message": "Not Found"})
+
+
+def serve(farm, host="127.0.0.1", port=0):
+    """
+    Start the fake Testing Farm server in a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server, shut it down once done.
+    """
+    server = ThreadingHTTPServer((host, port), FakeFarmHandler)
+    server.daemon_threads = True
+    server.farm = farm
+    farm.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def environment(farm):
+    """Get the environment variables pointing enge to the fake Testing Farm."""
+    return {
+        "TESTING_FARM_ENDPOINT": f"{farm.base_url}{API_PATH}",
+        "LOG_ARTIFACT_BASE_URL": f"{farm.base_url}{ARTIFACTS_PATH}",
+        "COPR_URL": f"{farm.base_url}{COPR_PATH}",
+    }
+
+
+def add_farm_arguments(parser):
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Seconds to delay each response by."
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of the requests API calls failing with 503.",
+    )
+    parser.add_argument(
+        "--queue-time",
+        type=float,
+        default=1.0,
+        help="Seconds each request spends queued.",
+    )
+    parser.add_argument(
+        "--job-duration",
+        type=float,
+        default=2.0,
+        help="Seconds each request spends running.",
+    )
+    parser.add_argument(
+        "--tests-per-plan", type=int, default=5, help="Test cases in each plan."
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.1,
+        help="Share of the failing test cases.",
+    )
+
+
+def farm_from_arguments(args):
+    return FakeFarm(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        queue_time=args.queue_time,
+        job_duration=args.job_duration,
+        tests_per_plan=args.tests_per_plan,
+        failure_rate=args.failure_rate,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_farm_arguments(parser)
+    args = parser.parse_args()
+
+    farm = farm_from_arguments(args)
+    server = serve(farm, args.host, args.port)
+    print("Point enge to the fake Testing Farm with:")
+    for name, value in environment(farm).items():
+        print(f"export {name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,11 @@ Unit tests for command-line options
 """
 import pytest
 
-from tesar.dispatch.__init__ import get_arguments
+from enge.utils.arg_parser import get_arguments
 
 
 def test_cmd_args_are_appended():
-    """Unit test covering tesar report -c test1 -c test2 behavior for results aggregation"""
+    """Unit test covering enge report -c test1 -c test2 behavior for results aggregation"""
     # Make sure -c are treated as list
     args = get_arguments(
         [
@@ -29,3 +29,18 @@ def test_cmd_args_are_appended():
                 "http://artifacts.osci.redhat.com/testing-farm/14612a82-002d-4a8d-a5c4-613a0a75efeb/",
             ]
         )
+
+
+@pytest.mark.parametrize("size", ("inf", "-1K", "10X"))
+def test_invalid_size_refused(size):
+    """Unit test covering the sizes refused by the size options"""
+    with pytest.raises(SystemExit):
+        get_arguments(["report", "--max-log-size", size])
+
+
+@pytest.mark.parametrize("option", ("--log-tail", "--max-log-size"))
+def test_store_artifacts_whole(option):
+    """Unit test covering the log size options refused with the artifact store"""
+    with pytest.raises(SystemExit):
+        get_arguments(["report", "--store-artifacts", option, "64K"])
+    assert get_arguments(["report", "--download-logs", option, "64K"])
@@ -0,0 +1,128 @@
+"""
+Unit tests for the content-addressed artifact store
+"""
+import os
+
+import pytest
+
+from enge.utils import artifact_store, http, log_retention
+from enge.utils.artifact_store import ArtifactStore, open_artifact
+
+ARTIFACTS = {
+    "https://artifacts.example.com/1/testout.log": b"PASS\n" * 100,
+    "https://artifacts.example.com/2/testout.log": b"PASS\n" * 100,
+    "https://artifacts.example.com/3/testout.log": b"FAIL\n" * 100,
+    "https://artifacts.example.com/4/testout.log": b"ERROR\n" * 100,
+}
+
+
+class FakeArtifactResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """Serve the artifacts, record the downloaded URLs."""
+    urls = []
+
+    def _get(url, **kwargs):
+        urls.append(url)
+        return FakeArtifactResponse(ARTIFACTS[url])
+
+    monkeypatch.setattr(http, "get", _get)
+    return urls
+
+
+@pytest.fixture(params=(artifact_store.GZIP_SUFFIX, artifact_store.ZSTD_SUFFIX))
+def store(request, tmp_path):
+    if request.param == artifact_store.ZSTD_SUFFIX:
+        pytest.importorskip("zstandard")
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    store.suffix = request.param
+    return store
+
+
+def test_fetch(store, fetched):
+    """The artifact is stored compressed and its known URL is not downloaded again"""
+    url = "https://artifacts.example.com/1/testout.log"
+    blob_path = store.fetch(url)
+    assert blob_path.endswith(store.suffix)
+    with open_artifact(blob_path) as data:
+        assert bytes(data) == ARTIFACTS[url]
+    store.save()
+
+    store = ArtifactStore(store.directory)
+    assert store.fetch(url) == blob_path
+    assert fetched == [url]
+    assert (store.downloaded, store.reused) == (0, 1)
+    assert not [name for name in os.listdir(store.directory) if name.endswith(".tmp")]
+
+
+def test_fetch_deduplicated(store, fetched):
+    """The identical content of several URLs is stored just once"""
+    blob_paths = [store.fetch(url) for url in list(ARTIFACTS)[:3]]
+    assert blob_paths[0] == blob_paths[1] != blob_paths[2]
+    assert len(fetched) == 3
+    assert len(set(store.index.values())) == 2
+    blobs = [
+        name
+        for _, _, files in os.walk(os.path.join(store.directory, "blobs"))
+        for name in files
+    ]
+    assert len(blobs) == 2
+
+
+def test_link_hardlink_and_symlink(store, fetched, monkeypatch, tmp_path):
+    """The blob is hardlinked, or symlinked where the hardlink is not possible"""
+    blob_path = store.fetch("https://artifacts.example.com/1/testout.log")
+    link_path = store.link(blob_path, str(tmp_path / "logs" / "hard"))
+    assert link_path.endswith(store.suffix)
+    assert os.path.samefile(link_path, blob_path)
+    assert not os.path.islink(link_path)
+
+    def _cross_device(source, destination):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", _cross_device)
+    link_path = store.link(blob_path, str(tmp_path / "logs" / "soft"))
+    assert os.path.islink(link_path)
+    assert os.path.realpath(link_path) == os.path.realpath(blob_path)
+
+
+def test_prune_keeps_linked_blobs(store, fetched, tmp_path):
+    """Only the blobs neither hardlinked nor symlinked from the logs are removed"""
+    logs = tmp_path / "logs"
+    hardlinked, unlinked, symlinked = (
+        store.fetch(f"https://artifacts.example.com/{artifact}/testout.log")
+        for artifact in (1, 3, 4)
+    )
+    store.link(hardlinked, str(logs / "hard"))
+    os.symlink(symlinked, logs / "soft")
+    keep = log_retention.symlinked_targets(str(logs))
+    assert keep == {os.path.realpath(symlinked)}
+
+    unlinked_size = os.path.getsize(unlinked)
+    assert store.prune(keep=keep, dry_run=True) == (1, unlinked_size)
+    assert os.path.exists(unlinked)
+
+    assert store.prune(keep=keep) == (1, unlinked_size)
+    assert not os.path.exists(unlinked)
+    assert os.path.exists(hardlinked) and os.path.exists(symlinked)
+    assert "https://artifacts.example.com/3/testout.log" not in store.index
+    assert "https://artifacts.example.com/3/testout.log" not in (
+        ArtifactStore(store.directory).index
+    )
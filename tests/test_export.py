@@ -0,0 +1,121 @@
+"""
+Unit tests for the Parquet export of the report
+"""
+
+import os
+import uuid
+
+import pytest
+
+from enge.report import __main__ as report
+from enge.utils import http
+from enge.utils.arg_parser import get_arguments
+from enge.utils.globals import TESTING_FARM_ENDPOINT
+from enge.utils.opt_manager import parsed_opts
+from enge.utils.request_store import request_store
+
+pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+
+PASSING_PLAN = (
+    '<testsuite name="/plans/passing" result="passed" tests="1">'
+    '<testcase name="/tests/pass" result="passed"/></testsuite>'
+)
+FAILING_PLAN = (
+    '<testsuite name="/plans/failing" result="failed" tests="2">'
+    '<testcase name="/tests/pass" result="passed"/>'
+    '<testcase name="/tests/fail" result="failed"/></testsuite>'
+)
+
+
+class FakeResponse:
+    def __init__(self, data=None, content=b""):
+        self._data = data
+        self.content = content
+
+    def __bool__(self):
+        return True
+
+    def json(self):
+        return self._data
+
+
+class FakeFarm:
+    """Serve the finished requests and their xunit results from the memory."""
+
+    def __init__(self):
+        self.responses = {}
+
+    def add_request(self, overall, testsuites):
+        request_uuid = str(uuid.uuid4())
+        xunit_url = f"https://artifacts.example.com/{request_uuid}/results.xml"
+        url = os.path.join(TESTING_FARM_ENDPOINT, request_uuid)
+        self.responses[url] = FakeResponse(
+            {
+                "id": request_uuid,
+                "state": "complete",
+                "created": "2026-10-01T10:00:00",
+                "test": {"fmf": {"name": None}},
+                "environments_requested": [
+                    {"arch": "x86_64", "os": {"compose": "CentOS-Stream-9"}}
+                ],
+                "result": {"overall": overall, "summary": None, "xunit_url": xunit_url},
+            }
+        )
+        self.responses[xunit_url] = FakeResponse(
+            content=(
+                f'<testsuites overall-result="{overall}">{testsuites}</testsuites>'
+            ).encode()
+        )
+        return url
+
+    def get(self, url, **kwargs):
+        return self.responses[url]
+
+
+def test_export_with_skip_pass(monkeypatch, tmp_path):
+    """The export keeps the passing requests, plans and test cases skipped from the report"""
+    dataset = tmp_path / "dataset"
+    farm = FakeFarm()
+    passing_url = farm.add_request("passed", PASSING_PLAN)
+    failing_url = farm.add_request("failed", PASSING_PLAN + FAILING_PLAN)
+    monkeypatch.setattr(http, "get", farm.get)
+    monkeypatch.setattr(
+        report, "parse_tasks", lambda: ([passing_url, failing_url], "test")
+    )
+    monkeypatch.setattr(
+        parsed_opts,
+        "cli_args",
+        get_arguments(["report", "--skip-pass", "--export", str(dataset)]),
+    )
+    monkeypatch.setattr(parsed_opts, "plan_history_file", str(tmp_path / "plans.json"))
+    monkeypatch.setattr(request_store, "directory", None)
+    monkeypatch.setattr(request_store, "requests", {})
+
+    parsed_dict = report.parse_results()
+
+    failing_uuid = failing_url.split("/")[-1]
+    assert list(parsed_dict) == [failing_uuid]
+    assert [testsuite.name for testsuite in parsed_dict[failing_uuid].testsuites] == [
+        "/plans/failing"
+    ]
+    assert [
+        testcase.name for testcase in parsed_dict[failing_uuid].testsuites[0].testcases
+    ] == ["/tests/fail"]
+
+    requests_table = pyarrow_parquet.read_table(dataset / "requests").to_pylist()
+    assert {row["uuid"] for row in requests_table} == {
+        passing_url.split("/")[-1],
+        failing_uuid,
+    }
+    testcases_table = pyarrow_parquet.read_table(dataset / "testcases").to_pylist()
+    assert sorted(
+        (row["uuid"], row["plan"], row["test"], row["result"])
+        for row in testcases_table
+    ) == sorted(
+        [
+            (passing_url.split("/")[-1], "/plans/passing", "/tests/pass", "PASSED"),
+            (failing_uuid, "/plans/passing", "/tests/pass", "PASSED"),
+            (failing_uuid, "/plans/failing", "/tests/pass", "PASSED"),
+            (failing_uuid, "/plans/failing", "/tests/fail", "FAILED"),
+        ]
+    )
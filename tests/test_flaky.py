@@ -0,0 +1,120 @@
+"""
+Unit tests for the flaky tests history
+"""
+from enge.flaky.__main__ import FlakyHistory
+from enge.utils import results
+
+KEY = "/plans/tier0\t/tests/login\tCentOS-Stream-9\tx86_64"
+
+
+RESULT_CODES = {
+    "P": results.Result.PASSED,
+    "F": results.Result.FAILED,
+    "E": results.Result.ERROR,
+}
+
+
+def add_results(history, key, codes):
+    for code in codes:
+        history.add(key, RESULT_CODES[code])
+
+
+def test_history_requests_bounded(tmp_path):
+    """Only the requests within the retention are remembered, the older ones are not ingested"""
+    path = str(tmp_path / "flaky_history.json")
+    history = FlakyHistory(path, 10)
+    for request_uuid, created in (
+        ("old", "2024-01-01T08:00:00.000000"),
+        ("recent", "2024-03-01T08:00:00.000000"),
+        ("latest", "2024-05-01T08:00:00.000000"),
+    ):
+        assert history.ingest(
+            results.RequestResult(request_uuid, "CentOS-Stream-9", created)
+        )
+    history.save()
+
+    history = FlakyHistory(path, 10)
+    assert set(history.requests) == {"recent", "latest"}
+    assert history.horizon == "2024-02-01T08:00:00"
+    assert not history.ingest(
+        results.RequestResult("recent", "CentOS-Stream-9", "2024-03-01")
+    )
+    assert not history.ingest(
+        results.RequestResult("old", "CentOS-Stream-9", "2024-01-01")
+    )
+    assert history.ingest(results.RequestResult("new", "CentOS-Stream-9", "2024-04-01"))
+
+
+def test_history_flips_within_window(tmp_path):
+    """The flips are counted within the window, the results falling out of it drop their flips"""
+    history = FlakyHistory(str(tmp_path / "flaky_history.json"), 4)
+    add_results(history, KEY, "PPFP")
+    assert history.tests[KEY]["history"] == "PPFP"
+    assert history.tests[KEY]["flips"] == 2
+    # The errors are not results of the test itself, they do not change the history
+    add_results(history, KEY, "E")
+    assert history.tests[KEY]["history"] == "PPFP"
+    add_results(history, KEY, "PF")
+    assert history.tests[KEY]["history"] == "FPPF"
+    assert history.tests[KEY]["flips"] == 2
+    add_results(history, KEY, "FFF")
+    assert history.tests[KEY]["history"] == "FFFF"
+    assert history.tests[KEY]["flips"] == 0
+
+
+def test_history_resized_window(tmp_path):
+    """The stored histories are cut down to a smaller window and their flips recounted"""
+    path = str(tmp_path / "flaky_history.json")
+    history = FlakyHistory(path, 10)
+    add_results(history, KEY, "FPFPPPPP")
+    history.save()
+
+    history = FlakyHistory(path, 5)
+    assert history.tests[KEY]["history"] == "PPPPP"
+    assert history.tests[KEY]["flips"] == 0
+    assert history.ranked() == []
+
+
+def test_history_ranked(tmp_path):
+    """The tests are ranked by the flip rate, then by the flips, the stable ones are left out"""
+    history = FlakyHistory(str(tmp_path / "flaky_history.json"), 10)
+    for test, results in (
+        ("stable", "PPPP"),
+        ("once", "PPPF"),
+        ("often", "PFPF"),
+        ("longer", "PFPFPPPPPF"),
+    ):
+        add_results(
+            history, f"/plans/tier0\t/tests/{test}\tCentOS-Stream-9\tx86_64", results
+        )
+    assert [(test[1], test[4], test[5]) for test in history.ranked()] == [
+        ("/tests/often", "PFPF", 3),
+        ("/tests/longer", "PFPFPPPPPF", 5),
+        ("/tests/once", "PPPF", 1),
+    ]
+    assert history.ranked()[0][6] == 1.0
+
+
+def test_history_ingest_request(tmp_path):
+    """Each test case of the request is added to the history of its plan and environment"""
+    history = FlakyHistory(str(tmp_path / "flaky_history.json"), 10)
+    for request_uuid, result in (("first", "passed"), ("second", "failed")):
+        testsuite = results.TestsuiteResult(
+            "/plans/tier0",
+            "x86_64",
+            "CentOS-Stream-9",
+            result,
+            testcases=[
+                results.TestcaseResult("/tests/login", result),
+                results.TestcaseResult("/tests/logout", "passed"),
+            ],
+        )
+        request_result = results.RequestResult(
+            request_uuid, "CentOS-Stream-9", "2024-03-01T08:00:00", [testsuite]
+        )
+        assert history.ingest(request_result)
+    assert not history.ingest(request_result)
+    assert history.tests[KEY]["history"] == "PF"
+    assert history.ranked() == [
+        ("/plans/tier0", "/tests/login", "CentOS-Stream-9", "x86_64", "PF", 1, 1.0)
+    ]
@@ -0,0 +1,87 @@
+"""
+Unit tests for the retention of the downloaded logs
+"""
+import os
+import time
+
+from enge.utils import log_retention
+
+DAY = 86400
+
+
+def make_request_logs(logs_directory, name, size, age_days):
+    """Create the logs directory of a request, last used the given number of days ago."""
+    path = logs_directory / f"{name}{log_retention.REQUEST_LOGS_SUFFIX}"
+    (path / "plan").mkdir(parents=True)
+    (path / "plan" / "test.log").write_bytes(b"x" * size)
+    used = time.time() - age_days * DAY
+    os.utime(path, (used, used))
+    return str(path)
+
+
+def evicted_paths(evicted):
+    return [path for path, _, _ in evicted]
+
+
+def test_evict_logs_max_size(tmp_path):
+    """The least recently used logs are evicted until the rest fits into the size cap"""
+    oldest = make_request_logs(tmp_path, "oldest", 1000, 3)
+    older = make_request_logs(tmp_path, "older", 1000, 2)
+    newest = make_request_logs(tmp_path, "newest", 1000, 1)
+    (tmp_path / "unrelated").mkdir()
+
+    evicted, kept = log_retention.evict_logs(str(tmp_path), max_size=1500)
+
+    assert evicted_paths(evicted) == [oldest, older]
+    assert kept == 1000
+    assert not os.path.exists(oldest) and not os.path.exists(older)
+    assert os.path.exists(newest)
+    assert os.path.exists(tmp_path / "unrelated")
+
+
+def test_evict_logs_max_age(tmp_path):
+    """The logs not used within the age limit are evicted, no matter their size"""
+    old = make_request_logs(tmp_path, "old", 10, 40)
+    recent = make_request_logs(tmp_path, "recent", 10, 5)
+
+    evicted, kept = log_retention.evict_logs(str(tmp_path), max_age=30)
+
+    assert evicted_paths(evicted) == [old]
+    assert kept == 10
+    assert os.path.exists(recent)
+
+
+def test_evict_logs_dry_run(tmp_path):
+    """The dry run reports the logs to evict and keeps them"""
+    old = make_request_logs(tmp_path, "old", 1000, 40)
+    recent = make_request_logs(tmp_path, "recent", 1000, 1)
+
+    evicted, kept = log_retention.evict_logs(
+        str(tmp_path), max_size=1000, max_age=30, dry_run=True
+    )
+
+    assert evicted_paths(evicted) == [old]
+    assert kept == 1000
+    assert os.path.exists(old) and os.path.exists(recent)
+
+
+def test_evict_logs_within_limits(tmp_path):
+    """Nothing is evicted without the limits or within them"""
+    make_request_logs(tmp_path, "recent", 1000, 1)
+    assert log_retention.evict_logs(str(tmp_path)) == ([], 1000)
+    assert log_retention.evict_logs(str(tmp_path), 1000, 30) == ([], 1000)
+    assert log_retention.evict_logs(str(tmp_path / "missing"), 1000, 30) == ([], 0)
+
+
+def test_symlinked_targets(tmp_path):
+    """The symlinks of the logs resolve to their targets, the regular files are left out"""
+    target = tmp_path / "blob.gz"
+    target.write_bytes(b"")
+    logs = tmp_path / "logs" / f"request{log_retention.REQUEST_LOGS_SUFFIX}"
+    logs.mkdir(parents=True)
+    os.symlink(target, logs / "test.log.gz")
+    (logs / "other.log").write_bytes(b"")
+
+    assert log_retention.symlinked_targets(str(tmp_path / "logs")) == {
+        os.path.realpath(target)
+    }
@@ -0,0 +1,99 @@
+"""
+Unit tests for the report command
+"""
+import pytest
+
+from enge.report import __main__ as report
+from enge.utils import http
+from enge.utils.arg_parser import get_arguments
+
+LOG = b"".join(b"line %d\n" % line for line in range(1000))
+
+
+class FakeLogResponse:
+    """Response of the log server, honouring the Range header unless told otherwise."""
+
+    def __init__(self, content, headers, ranges=True):
+        self.headers = {}
+        self.content = content
+        self.status_code = 200
+        byte_range = headers.get("Range")
+        if byte_range and ranges:
+            if not content:
+                self.status_code = 416
+                return
+            tail = int(byte_range.removeprefix("bytes=-"))
+            first = max(len(content) - tail, 0)
+            self.status_code = 206
+            self.content = content[first:]
+            self.headers[
+                "Content-Range"
+            ] = f"bytes {first}-{len(content) - 1}/{len(content)}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+
+@pytest.fixture
+def log_server(monkeypatch):
+    """Serve the log, with or without the support of the range requests."""
+    served = {"content": LOG, "ranges": True}
+
+    def _get(url, headers=None, **kwargs):
+        return FakeLogResponse(served["content"], headers or {}, served["ranges"])
+
+    monkeypatch.setattr(http, "get", _get)
+    return served
+
+
+def test_download_log_tail_range(log_server):
+    """Unit test covering the tail of the log fetched with a range request"""
+    data, truncated = report.download_log("https://logs.example.com/log", tail=100)
+    assert truncated
+    assert LOG.endswith(data)
+    assert data.startswith(b"line ") and len(data) <= 100
+
+
+def test_download_log_tail_without_ranges(log_server):
+    """Unit test covering the tail of the log streamed by a server ignoring the range"""
+    log_server["ranges"] = False
+    data, truncated = report.download_log(
+        "https://logs.example.com/log", tail=100, max_size=1000
+    )
+    assert truncated
+    assert data.endswith(b"line 999\n")
+    assert LOG.endswith(data)
+    assert data.startswith(b"line ")
+
+
+def test_download_log_max_size_without_tail(log_server):
+    """Unit test covering the log cut at the maximum size"""
+    data, truncated = report.download_log("https://logs.example.com/log", max_size=1000)
+    assert truncated
+    assert data == LOG[:1000]
+
+
+def test_download_log_empty(log_server):
+    """Unit test covering the unsatisfiable range of an empty log"""
+    log_server["content"] = b""
+    assert report.download_log("https://logs.example.com/log", tail=100) == (
+        b"",
+        False,
+    )
+
+
+@pytest.mark.parametrize("option", ("--log-tail", "--max-log-size"))
+def test_log_size_must_be_positive(option):
+    """Unit test covering the refused zero log sizes"""
+    with pytest.raises(SystemExit):
+        get_arguments(["report", option, "0"])
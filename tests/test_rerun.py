@@ -0,0 +1,223 @@
+"""
+Unit tests for the re-run payloads and their lineage
+"""
+import time
+import uuid
+
+import pytest
+import requests
+
+from enge.rerun import __main__ as rerun
+from enge.rerun.auto import AutoRerun
+from enge.utils.arg_parser import get_arguments
+from enge.utils.lineage import LINEAGE_RETENTION, RerunLineage
+from enge.utils.opt_manager import parsed_opts
+from enge.utils.request_store import request_store
+
+PLAN_FILTER = "tag:tier0"
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeSubmit:
+    """Submitter answering every posted payload with a new request ID."""
+
+    def __init__(self):
+        self.posted = []
+        self.compose = None
+        self.plan = None
+        self.print_header = True
+
+    def build_payload(self):
+        return {}, {}
+
+    def post_request(self, payload, header):
+        self.posted.append(payload)
+        return FakeResponse({"id": str(uuid.uuid4())})
+
+    def process_response(self, response):
+        return response.json()["id"]
+
+
+def test_errored_request_rerun_with_plan_filter(monkeypatch, tmp_path):
+    """The re-run of an errored request selecting the plans by the filter is recorded in the lineage"""
+    lineage_file = str(tmp_path / "rerun_lineage.json")
+    monkeypatch.setattr(parsed_opts, "cli_args", get_arguments(["rerun", "--error"]))
+    monkeypatch.setattr(parsed_opts, "rerun_lineage_file", lineage_file)
+    monkeypatch.setattr(request_store, "directory", None)
+    monkeypatch.setattr(request_store, "requests", {})
+    original_uuid = str(uuid.uuid4())
+    request_store.put(
+        {
+            "id": original_uuid,
+            "state": "error",
+            "test": {"fmf": {"name": None, "plan_filter": PLAN_FILTER}},
+            "environments_requested": [
+                {"arch": "x86_64", "os": {"compose": "CentOS-Stream-9"}}
+            ],
+        }
+    )
+    jobs = rerun.RerunJobs([original_uuid], "test")
+    jobs.processed_data = {
+        original_uuid: [("pipeline", "CentOS-Stream-9", None, "x86_64")]
+    }
+    submit = FakeSubmit()
+
+    submitted = rerun.submit_rerun_payloads(
+        submit, jobs.build_rerun_payloads([original_uuid])
+    )
+
+    assert submit.posted[0]["test"]["fmf"]["name"] is None
+    assert submit.plan == PLAN_FILTER
+    [(parent_uuid, rerun_uuid)] = submitted
+    assert parent_uuid == original_uuid
+    lineage = RerunLineage(lineage_file)
+    assert lineage.reruns[rerun_uuid]["plans"] == [PLAN_FILTER]
+    assert lineage.reruns[rerun_uuid]["arch"] == "x86_64"
+    assert lineage.reruns[rerun_uuid]["compose"] == "CentOS-Stream-9"
+
+
+def test_pending_rerun_covers_its_environment_only(tmp_path):
+    """The pending re-run of a plan does not block the re-run of the same plan on another environment"""
+    lineage = RerunLineage(str(tmp_path / "rerun_lineage.json"))
+    lineage.record("rerun", "original", ["/plans/tier0"], "x86_64", "CentOS-Stream-9")
+    lineage.record("legacy", "original", ["/plans/tier0"])
+
+    assert lineage.covers("rerun", "/plans/tier0", "x86_64", "CentOS-Stream-9")
+    assert not lineage.covers("rerun", "/plans/tier0", "x86_64", "CentOS-Stream-8")
+    assert not lineage.covers("rerun", "/plans/tier0", "aarch64", "CentOS-Stream-9")
+    assert not lineage.covers("rerun", "/plans/tier1", "x86_64", "CentOS-Stream-9")
+    # The re-runs recorded without the environment cover all of them
+    assert lineage.covers("legacy", "/plans/tier0", "aarch64", "CentOS-Stream-8")
+
+
+def test_failed_submission_keeps_lineage(monkeypatch, tmp_path):
+    """A failed submission does not stop the others, the submitted re-runs are recorded"""
+    lineage_file = str(tmp_path / "rerun_lineage.json")
+    monkeypatch.setattr(parsed_opts, "cli_args", get_arguments(["rerun", "--fail"]))
+    monkeypatch.setattr(parsed_opts, "rerun_lineage_file", lineage_file)
+
+    class FailingSubmit(FakeSubmit):
+        def post_request(self, payload, header):
+            if payload["test"]["fmf"]["name"] == "/plans/unreachable":
+                raise requests.ConnectionError("Connection refused")
+            return super().post_request(payload, header)
+
+    rerun_payloads = [
+        (
+            f"original-{plan}",
+            {
+                "test": {"fmf": {"name": f"/plans/{plan}"}},
+                "environments": [
+                    {"arch": "x86_64", "os": {"compose": "CentOS-Stream-9"}}
+                ],
+            },
+        )
+        for plan in ("tier0", "unreachable", "tier1")
+    ]
+
+    submitted = rerun.submit_rerun_payloads(FailingSubmit(), rerun_payloads)
+
+    assert [parent_uuid for parent_uuid, _ in submitted] == [
+        "original-tier0",
+        "original-tier1",
+    ]
+    lineage = RerunLineage(lineage_file)
+    assert {
+        rerun_uuid: entry["plans"] for rerun_uuid, entry in lineage.reruns.items()
+    } == {
+        submitted[0][1]: ["/plans/tier0"],
+        submitted[1][1]: ["/plans/tier1"],
+    }
+
+
+def test_auto_estimate_per_environment(monkeypatch):
+    """Each environment of the re-run request is estimated by its share of the run time"""
+    monkeypatch.setattr(
+        parsed_opts, "cli_args", get_arguments(["rerun", "--auto", "--budget", "2"])
+    )
+    monkeypatch.setattr(request_store, "directory", None)
+    monkeypatch.setattr(request_store, "requests", {})
+    environments = [
+        {"arch": arch, "os": {"compose": "CentOS-Stream-9"}}
+        for arch in ("x86_64", "aarch64", "s390x")
+    ]
+    request_store.put(
+        {
+            "id": "multiarch",
+            "state": "complete",
+            "run_time": 3 * 3600,
+            "environments_requested": environments,
+        }
+    )
+    request_store.put(
+        {
+            "id": "single",
+            "state": "complete",
+            "run_time": 1800,
+            "environments_requested": environments[:1],
+        }
+    )
+    auto = AutoRerun(rerun.RerunJobs([], "test"), FakeSubmit())
+
+    assert auto.estimate_hours(
+        [("multiarch", {}), ("multiarch", {}), ("single", {})]
+    ) == pytest.approx(2.5)
+
+
+def test_lineage_skips_finished_descendants(monkeypatch, tmp_path):
+    """Only the state of the re-runs not known to be finished is fetched"""
+    monkeypatch.setattr(request_store, "directory", None)
+    monkeypatch.setattr(request_store, "requests", {})
+    lineage_file = str(tmp_path / "rerun_lineage.json")
+    lineage = RerunLineage(lineage_file)
+    for rerun_uuid in ("marked", "stored", "running", "fetched"):
+        lineage.record(rerun_uuid, "original", ["/plans/tier0"])
+    lineage.reruns["marked"]["finished"] = True
+    request_store.put({"id": "stored", "state": "complete"})
+    states = {"running": "running", "fetched": "error"}
+    fetched = []
+
+    def _get(request_uuid):
+        fetched.append(request_uuid)
+        return {"id": request_uuid, "state": states[request_uuid]}
+
+    monkeypatch.setattr(request_store, "get", _get)
+
+    finished, pending = lineage.split_descendants(["original"])
+
+    assert sorted(fetched) == ["fetched", "running"]
+    assert finished == ["marked", "stored", "fetched"]
+    assert pending == ["running"]
+    # The finished re-runs are not fetched by the next run
+    fetched.clear()
+    assert RerunLineage(lineage_file).split_descendants(["original"]) == (
+        finished,
+        pending,
+    )
+    assert fetched == ["running"]
+
+
+def test_lineage_expired(tmp_path):
+    """The lineages with no re-run submitted within the retention are forgotten"""
+    lineage_file = str(tmp_path / "rerun_lineage.json")
+    lineage = RerunLineage(lineage_file)
+    lineage.record("old-rerun", "old", ["/plans/tier0"])
+    lineage.record("old-rerun-2", "old-rerun", ["/plans/tier0"])
+    lineage.record("recent-rerun", "recent", ["/plans/tier0"])
+    lineage.record("recent-rerun-2", "recent-rerun", ["/plans/tier0"])
+    expired = time.time() - LINEAGE_RETENTION.total_seconds() - 1
+    for rerun_uuid in ("old-rerun", "old-rerun-2", "recent-rerun"):
+        lineage.reruns[rerun_uuid]["submitted"] = int(expired)
+    lineage.save()
+
+    assert sorted(RerunLineage(lineage_file).reruns) == [
+        "recent-rerun",
+        "recent-rerun-2",
+    ]
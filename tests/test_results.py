@@ -0,0 +1,144 @@
+"""
+Unit tests for the compact result model
+"""
+import gc
+import tracemalloc
+
+import lxml.etree
+
+from enge.utils import results
+
+REQUESTS = 30
+PLANS = 20
+TESTS = 50
+
+
+def _xunit(compose="CentOS-Stream-9", arch="x86_64"):
+    """Generate the xunit document of a single request similar to the Testing Farm one."""
+    testsuites = []
+    for plan in range(PLANS):
+        testcases = "".join(
+            f'<testcase name="/tests/component{plan}/feature/test{test}" result="{"failed" if test == 0 else "passed"}" time="00:00:{test % 60:02d}">'
+            f'<logs><log href="https://artifacts.example.com/{plan}/{test}/testout.log" name="testout.log"/></logs>'
+            "</testcase>"
+            for test in range(TESTS)
+        )
+        testsuites.append(
+            f'<testsuite name="/plans/tier{plan % 3}/component{plan}" result="failed" tests="{TESTS}">'
+            "<testing-environment>"
+            f'<property name="arch" value="{arch}"/><property name="compose" value="{compose}"/>'
+            "</testing-environment>"
+            f"{testcases}</testsuite>"
+        )
+    return (
+        f'<testsuites overall-result="failed">{"".join(testsuites)}</testsuites>'
+    ).encode()
+
+
+def _parse_dicts(xunit):
+    """Parse the xunit into the nested dictionaries, the way enge used to keep the results."""
+    xml = lxml.etree.fromstring(xunit)
+    testsuites = []
+    for elem in xml.xpath("//testsuite"):
+        testsuites.append(
+            {
+                "testsuite_name": elem.xpath("./@name")[0].split(":")[-1],
+                "testsuite_arch": elem.xpath(
+                    "./testing-environment/property[@name='arch']/@value"
+                )[0],
+                "testsuite_result": elem.xpath("./@result")[0].upper(),
+                "testcases": [
+                    {
+                        "testcase_name": test.xpath("./@name")[0],
+                        "testcase_result": test.xpath("./@result")[0].upper(),
+                    }
+                    for test in elem.xpath("./testcase")
+                ],
+            }
+        )
+    return {"target_name": "CentOS-Stream-9", "testsuites": testsuites}
+
+
+def _parse_model(xunit):
+    xml = lxml.etree.fromstring(xunit)
+    request = results.RequestResult("uuid", "CentOS-Stream-9")
+    for elem in xml.iterfind("testsuite"):
+        testsuite = results.TestsuiteResult.from_element(elem, request.target)
+        testsuite.testcases.extend(
+            results.TestcaseResult.from_element(test)
+            for test in elem.iterfind("testcase")
+        )
+        request.testsuites.append(testsuite)
+    return request
+
+
+def _retained_memory(parse):
+    """Measure the memory retained by the results of all the requests."""
+    xunit = _xunit()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        parsed = [parse(xunit) for _ in range(REQUESTS)]
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(parsed) == REQUESTS
+    return retained
+
+
+def test_result_enum():
+    """Unit test covering the result parsing from the xunit values"""
+    assert results.Result("failed") is results.Result.FAILED
+    assert results.Result("PASSED") == "PASSED"
+    # The results unknown to enge are kept as reported
+    assert results.Result("not_applicable") == "NOT_APPLICABLE"
+    assert str(results.Result("not_applicable")) == "NOT_APPLICABLE"
+    assert results.Result("not_applicable") is results.Result("NOT_APPLICABLE")
+    assert results.Result(None) is results.Result.UNDEFINED
+
+
+def test_model_from_xunit():
+    """Unit test covering the plan and test case results created from the xunit elements"""
+    request = _parse_model(_xunit(compose="Fedora-40", arch="aarch64"))
+    assert len(request.testsuites) == PLANS
+    testsuite = request.testsuites[1]
+    assert testsuite.name == "/plans/tier1/component1"
+    assert (testsuite.arch, testsuite.compose) == ("aarch64", "Fedora-40")
+    assert testsuite.result is results.Result.FAILED
+    assert testsuite.tests == TESTS
+    # The plan does not report the time, the test case times are summed up instead
+    assert testsuite.duration == sum(test % 60 for test in range(TESTS))
+    assert [testcase.result for testcase in testsuite.testcases[:2]] == [
+        results.Result.FAILED,
+        results.Result.PASSED,
+    ]
+    # The names repeated across the requests are stored only once
+    other = _parse_model(_xunit())
+    assert other.testsuites[1].testcases[3].name is testsuite.testcases[3].name
+
+
+def test_model_requested_environment():
+    """Unit test covering the plan environment taken from the requested one, not the provisioned one"""
+    elem = lxml.etree.fromstring(
+        '<testsuite name="/plans/tier0" result="passed" tests="0">'
+        '<testing-environment name="requested">'
+        '<property name="arch" value="x86_64"/><property name="compose" value="CentOS-Stream-9"/>'
+        "</testing-environment>"
+        '<testing-environment name="provisioned">'
+        '<property name="arch" value="x86_64"/><property name="compose" value="CentOS-Stream-9-20240325.0"/>'
+        "</testing-environment>"
+        "</testsuite>"
+    )
+    testsuite = results.TestsuiteResult.from_element(elem, "Fedora-40")
+    assert (testsuite.arch, testsuite.compose) == ("x86_64", "CentOS-Stream-9")
+
+
+def test_model_memory():
+    """Benchmark the memory retained by the compact model against the nested dictionaries"""
+    dicts_memory = _retained_memory(_parse_dicts)
+    model_memory = _retained_memory(_parse_model)
+    assert model_memory * 4 < dicts_memory, (
+        f"{REQUESTS} requests of {PLANS * TESTS} test cases: "
+        f"dictionaries {dicts_memory / 2**20:.1f} MiB, model {model_memory / 2**20:.1f} MiB"
+    )
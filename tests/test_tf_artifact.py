@@ -0,0 +1,71 @@
+"""
+Unit tests for the build artifact lookups
+"""
+from types import SimpleNamespace
+
+from enge.utils.tf_artifact import BrewRef
+
+PACKAGE = "enge"
+BUILDS = [
+    {
+        "nvr": f"{PACKAGE}-{version}",
+        "task_id": task_id,
+        "volume_name": "DEFAULT",
+        "state": 1,
+    }
+    for version, task_id in (
+        ("1.2-1.el8", 101),
+        ("1.2-1.el9", 102),
+        ("1.3-0.rc1.el9", 103),
+    )
+]
+
+
+class FakeCall:
+    def __init__(self, result):
+        self.result = result
+
+
+class FakeSession:
+    """Koji session answering listBuilds from the BUILDS, recording the queried prefixes."""
+
+    def __init__(self):
+        self.prefixes = []
+
+    def listBuilds(self, prefix):
+        self.prefixes.append(prefix)
+        return [build for build in BUILDS if build["nvr"].startswith(prefix)]
+
+    def multicall(self, strict=False):
+        session = self
+
+        class Batch:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def listBuilds(self, **kwargs):
+                return FakeCall(session.listBuilds(**kwargs))
+
+        return Batch()
+
+
+def test_brew_references_partially_matched():
+    """The references missed by the prefix query are looked up in a single listing of all the builds"""
+    session = FakeSession()
+    options = SimpleNamespace(
+        brew_api={"taskid_url": "https://brew.example.com/taskinfo?taskID="},
+        cache_directory=None,
+    )
+    references = ["1.2-1.el8", "rc1", "1.2-1"]
+    brew_ref = BrewRef(references)
+
+    tasks = brew_ref.get_brew_task_and_compose(PACKAGE, references, session, options)
+
+    assert tasks == {101: "DEFAULT", 102: "DEFAULT", 103: "DEFAULT"}
+    assert session.prefixes.count(PACKAGE) == 1
+
+    brew_ref.get_brew_task_and_compose(PACKAGE, ["rc1"], session, options)
+    assert session.prefixes.count(PACKAGE) == 1
@@ -0,0 +1,24 @@
+"""
+Unit tests for the error signatures of the logs triage
+"""
+import pytest
+
+from enge.logs.triage import normalize
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    (
+        ("No such file /usr/lib/python3/site.py", "No such file <path>"),
+        ("cannot open ~/.config/enge", "cannot open <path>"),
+        ("see ./tests/test_a.py for details", "see <path> for details"),
+        ("error in src/enge/report/main.py", "error in <path>"),
+        ("copied (/etc/hosts) to /tmp/", "copied (<path>) to <path>"),
+        ("Error: read and/or write denied", "Error: read and/or write denied"),
+        ("Error: client/server mismatch", "Error: client/server mismatch"),
+        ("Error: 3/4 checks failed", "Error: 3/4 checks failed"),
+    ),
+)
+def test_normalize_paths(line, expected):
+    """Unit test covering the paths replaced in the error lines and the slashed words kept"""
+    assert normalize(line) == expected